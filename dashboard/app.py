@@ -3,6 +3,7 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
 
 # -------------------------------------------------
 # PAGE CONFIG
@@ -26,24 +27,48 @@ st.markdown("""
 # -------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
 
-@st.cache_data
-def load_data(filename):
-    return pd.read_csv(os.path.join(DATA_DIR, filename), parse_dates=["DateTime"])
+from rollup_cube import RollupCube, CUBE_NPZ
+from chart_pyramid import ChartPyramid, PYRAMID_NPZ
+from data_access import read_dataset
+from live_refresh import watch_sources
+from charts import line_chart
 
-df_baseline = load_data("Reporting_AdjustedBaseline_GRU.csv")
-df_savings = load_data("Reporting_Savings_GRU.csv")
-df_c1 = load_data("Reporting_CostSavings_C1.csv")
-df_tou = load_data("Reporting_CostSavings_TOU.csv")
-df_co2 = load_data("Reporting_CO2_Avoidance_GRU.csv")
+# Caches are keyed on the version of the file they read, so a pipeline
+# rerun refreshes just the affected data
+versions = watch_sources(["adjusted", "cube", "pyramid"])
+
+@st.cache_data(max_entries=4)
+def load_data(name, version, columns=()):
+    # Only the columns the page uses (DateTime is always included)
+    return read_dataset(name, list(columns))
+
+df_baseline = load_data("adjusted", versions["adjusted"])
+
+
+@st.cache_resource(max_entries=2)
+def load_cube(version):
+    return RollupCube.load(CUBE_NPZ)
+
+
+cube = load_cube(versions["cube"])
+
+
+@st.cache_resource(max_entries=2)
+def load_pyramid(version):
+    return ChartPyramid.load(PYRAMID_NPZ)
+
+
+pyramid = load_pyramid(versions["pyramid"])
 
 # -------------------------------------------------
 # SIDEBAR FILTERS
 # -------------------------------------------------
 st.sidebar.header("Filters")
 
-start_date = df_baseline["DateTime"].min()
-end_date = df_baseline["DateTime"].max()
+start_date = df_baseline.index.min()
+end_date = df_baseline.index.max()
 
 date_range = st.sidebar.date_input(
     "Select date range",
@@ -56,35 +81,26 @@ else:
     start_date = date_range[0]
     end_date = date_range[0]
 
-mask = (
-    (df_baseline["DateTime"] >= pd.to_datetime(start_date)) &
-    (df_baseline["DateTime"] <= pd.to_datetime(end_date))
-)
-
-df_baseline_f = df_baseline.loc[mask]
-df_savings_f = df_savings.loc[mask]
-df_c1_f = df_c1.loc[mask]
-df_tou_f = df_tou.loc[mask]
-df_co2_f = df_co2.loc[mask]
-
 # -------------------------------------------------
-# KPI SECTION
+# KPI SECTION (rollup cube, O(1) per range)
 # -------------------------------------------------
 st.header("Key Performance Indicators")
 
+range_start = pd.to_datetime(start_date)
+range_end = pd.to_datetime(end_date) + pd.Timedelta(days=1)
+
+kpis = cube.range_kpis(range_start, range_end)
+
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    total_energy = df_savings_f["Savings Energy (kWh)"].sum()
-    st.metric("Total Energy Savings (kWh)", f"{total_energy:,.0f}")
+    st.metric("Total Energy Savings (kWh)", f"{kpis['energy_savings_kwh']:,.0f}")
 
 with col2:
-    total_cost = df_c1_f["Cost Savings (RM)"].sum()
-    st.metric("Total Cost Savings (C1) (RM)", f"{total_cost:,.0f}")
+    st.metric("Total Cost Savings (C1) (RM)", f"{kpis['cost_savings_c1_rm']:,.0f}")
 
 with col3:
-    total_co2 = df_co2_f["Cumulative CO2 Avoided (tonnes)"].iloc[-1]
-    st.metric("Total CO₂ Avoided (tonnes)", f"{total_co2:,.2f}")
+    st.metric("Total CO₂ Avoided (tonnes)", f"{kpis['co2_avoided_tonnes']:,.2f}")
 
 st.markdown("---")
 
@@ -92,24 +108,27 @@ st.markdown("---")
 # PLACEHOLDERS FOR PLOTS (NEXT PHASE)
 # -------------------------------------------------
 st.header("Adjusted Baseline vs Actual (Preview)")
-st.line_chart(
-    df_baseline_f.set_index("DateTime")[[
-        "Actual Power (kW)",
-        "Adjusted Baseline Power (kW)"
-    ]]
+line_chart(
+    pyramid.frame(
+        ["Actual Power (kW)", "Adjusted Baseline Power (kW)"],
+        range_start, range_end
+    )
 )
 
 st.header("Cumulative Cost Savings (C1 vs TOU)")
-st.line_chart(
-    pd.DataFrame({
-        "C1": df_c1_f["Cumulative Cost Savings (RM)"].values,
-        "TOU": df_tou_f["Cumulative TOU Cost Savings (RM)"].values
-    }, index=df_c1_f["DateTime"])
+line_chart(
+    pyramid.frame(
+        ["C1 Cumulative Cost Savings (RM)", "TOU Cumulative Cost Savings (RM)"],
+        range_start, range_end, envelope=False
+    ).rename(columns={
+        "C1 Cumulative Cost Savings (RM)": "C1",
+        "TOU Cumulative Cost Savings (RM)": "TOU",
+    })
 )
 
 st.header("Cumulative CO₂ Avoidance")
-st.line_chart(
-    df_co2_f.set_index("DateTime")["Cumulative CO2 Avoided (tonnes)"]
+line_chart(
+    pyramid.frame(["Cumulative CO2 Avoided (tonnes)"], range_start, range_end, envelope=False)
 )
 
 st.markdown("""
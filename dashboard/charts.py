@@ -0,0 +1,68 @@
+# dashboard/charts.py
+"""
+Lightweight line / bar charts for the dashboards.
+
+st.line_chart / st.bar_chart build an Altair chart and validate it against
+the Vega-Lite schema on every call (0.1-0.25 s of CPU per chart, held under
+the GIL, so concurrent sessions queue behind each other) and ship the data
+melted to long form. These helpers send a fixed Vega-Lite spec, built once
+per process and shared by every session, with the data in wide form and a
+fold transform: a chart costs a few ms and a fraction of the payload.
+"""
+
+import functools
+import inspect
+
+import streamlit as st
+
+import perf
+
+HEIGHT = 350
+
+# Streamlit >= 1.46 sizes charts with `width`; older versions (1.29 pinned)
+# only know `use_container_width`
+if "width" in inspect.signature(st.vega_lite_chart).parameters:
+    _STRETCH = {"width": "stretch"}
+else:
+    _STRETCH = {"use_container_width": True}
+
+
+def _field(name):
+    """Vega-Lite treats '.', '[' and ']' in field names as accessors."""
+    return name.replace("\\", "\\\\").replace(".", "\\.").replace("[", "\\[").replace("]", "\\]")
+
+
+@functools.lru_cache(maxsize=None)
+def _spec(mark, x, columns):
+    x_encoding = {"field": _field(x), "type": "temporal", "title": None}
+    if mark == "bar":
+        x_encoding.update(type="ordinal", timeUnit="yearmonth")
+    return {
+        "mark": {"type": mark, "tooltip": True},
+        "height": HEIGHT,
+        "transform": [{"fold": [_field(c) for c in columns], "as": ["Series", "Value"]}],
+        "encoding": {
+            "x": x_encoding,
+            "y": {"field": "Value", "type": "quantitative", "title": None},
+            "color": {"field": "Series", "type": "nominal", "title": None,
+                      "legend": {"orient": "bottom"}},
+        },
+    }
+
+
+def _chart(mark, data):
+    df = data.to_frame() if data.ndim == 1 else data
+    x = df.index.name or "index"
+    data = df.reset_index(names=x)
+    perf.record_chart(", ".join(df.columns), data)
+    st.vega_lite_chart(data, _spec(mark, x, tuple(df.columns)), **_STRETCH)
+
+
+def line_chart(data):
+    """Time-indexed frame (or series) as one line per column."""
+    _chart("line", data)
+
+
+def bar_chart(data):
+    """Month-indexed frame (or series) as bars."""
+    _chart("bar", data)
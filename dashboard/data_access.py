@@ -0,0 +1,262 @@
+# dashboard/data_access.py
+"""
+Lazy, column-projected data access for the dashboards.
+
+Each dataset is read only when a section asks for it, and only with the
+columns that section needs, cast to the compact dtypes declared in
+src/schema.py. Pipeline results come from the columnar results store
+(data/store, see src/results_store.py) in the column layout of the CSV
+they replace; the baseline period is read from its CSV (pyarrow engine,
+multithreaded). Independent datasets requested together are read
+concurrently.
+
+Every source file has a cheap version (mtime, size); the dashboards key
+their caches on the versions of just the files each cache depends on, and
+DataWatcher polls them so a pipeline rerun is picked up without a restart.
+
+RUN (cold-start / memory report):
+    python dashboard/data_access.py
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+
+# The default mimalloc pool keeps freed CSV parse buffers mapped; the
+# system allocator hands them back, which keeps the Streamlit server's
+# resident memory close to what the frames actually use.
+pa.set_memory_pool(pa.system_memory_pool())
+
+# ----------------------------------------------------
+# PATHS
+# ----------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+DASHBOARD_DIR = os.path.join(BASE_DIR, "dashboard")
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+
+import schema
+import results_store
+
+TIME_COL = "DateTime"
+
+# dataset -> (file, time column or None)
+DATASETS = {
+    "baseline": ("PenangBaselineData.csv", TIME_COL),
+    "adjusted": ("Reporting_AdjustedBaseline_GRU.csv", TIME_COL),
+    "savings": ("Reporting_Savings_GRU.csv", TIME_COL),
+    "compare": ("Reporting_Cost_C1_vs_TOU.csv", TIME_COL),
+    "co2": ("Reporting_CO2_Avoidance_GRU.csv", TIME_COL),
+    "md": ("Reporting_MD_Savings.csv", None),
+    "clean": ("Reporting_Clean_30min.csv", TIME_COL),
+}
+
+# datasets served from the results store: dataset -> (store dataset,
+# {column as served: column in the store}, columns or None for every stored
+# column); the columns are those of the CSV each one replaces
+STORE_VIEWS = {
+    "adjusted": ("savings", {}, schema.DATASETS["adjusted"][2]),
+    "savings": ("savings", {}, schema.DATASETS["savings"][2]),
+    "compare": ("savings", {
+        "C1 Cumulative Cost Savings (RM)": "Cumulative Cost Savings (RM)",
+        "TOU Cumulative Cost Savings (RM)": "Cumulative TOU Cost Savings (RM)",
+    }, schema.DATASETS["compare"][2]),
+    "co2": ("savings", {}, schema.DATASETS["co2"][2]),
+    "md": ("md", {}, None),
+    "clean": ("clean", {}, None),
+}
+
+# pre-aggregated artifacts the dashboards load alongside the datasets
+ARTIFACTS = {
+    "cube": "Reporting_Rollup_Cube.npz",
+    "pyramid": "Reporting_Chart_Pyramid.npz",
+}
+
+# a rewritten file counts as changed once it has been stable this long,
+# so a half-written CSV is never picked up mid-pipeline
+SETTLE_SECONDS = 2.0
+
+
+def dataset_path(name):
+    return os.path.join(DATA_DIR, DATASETS[name][0])
+
+
+def store_dir():
+    return os.path.join(DATA_DIR, "store")
+
+
+def source_path(name):
+    """Path of a dataset or artifact (the store manifest for store datasets)."""
+    if name in ARTIFACTS:
+        return os.path.join(DATA_DIR, ARTIFACTS[name])
+    if name in STORE_VIEWS:
+        # rewritten last on every store write
+        return os.path.join(store_dir(), "manifest.json")
+    return dataset_path(name)
+
+
+def dataset_columns(name):
+    """Columns of dataset `name`, time column first."""
+    time_col = DATASETS[name][1]
+    if name not in STORE_VIEWS:
+        columns = pd.read_csv(dataset_path(name), nrows=0).columns
+    else:
+        store_name, _, columns = STORE_VIEWS[name]
+        if columns is None:
+            with open(source_path(name)) as fh:
+                columns = json.load(fh)[store_name]["columns"]
+    return ([time_col] if time_col else []) + [c for c in columns if c != time_col]
+
+
+# ----------------------------------------------------
+# DATA VERSIONS
+# ----------------------------------------------------
+def source_version(name):
+    """Cheap fingerprint of one source file: (mtime_ns, size), None if missing."""
+    try:
+        stat = os.stat(source_path(name))
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class DataWatcher:
+    """
+    Polls source versions. `current` holds the version each source is being
+    served at; poll() moves a source forward once its new version has held
+    for SETTLE_SECONDS and returns the names that moved.
+    """
+
+    def __init__(self, names, settle=SETTLE_SECONDS):
+        self.names = list(names)
+        self.settle = settle
+        self.current = {name: source_version(name) for name in self.names}
+        self._pending = {}  # name -> (version, first seen)
+
+    def poll(self):
+        now = time.monotonic()
+        changed = []
+        for name in self.names:
+            version = source_version(name)
+            if version == self.current[name]:
+                self._pending.pop(name, None)
+                continue
+            seen = self._pending.get(name)
+            if seen is None or seen[0] != version:
+                self._pending[name] = (version, now)
+            elif now - seen[1] >= self.settle:
+                self.current[name] = version
+                del self._pending[name]
+                changed.append(name)
+        return changed
+
+
+# ----------------------------------------------------
+# READERS
+# ----------------------------------------------------
+def _read_store(name, columns, start=None, end=None):
+    store_name, renames, _ = STORE_VIEWS[name]
+    if columns is None:
+        columns = [c for c in dataset_columns(name) if c != TIME_COL]
+    df = results_store.read_dataset(
+        store_name, [renames.get(c, c) for c in columns], start, end, root=store_dir()
+    )
+    df = df.rename(columns={stored: served for served, stored in renames.items()})
+    return df.reset_index() if df.index.name == TIME_COL else df
+
+
+def read_dataset(name, columns=None, start=None, end=None):
+    """
+    Read `columns` of dataset `name` (all columns when None), optionally
+    only [start, end) (store datasets with a time column).
+    Time-indexed datasets come back indexed and sorted by DateTime.
+    """
+    time_col = DATASETS[name][1]
+    if name in STORE_VIEWS:
+        df = _read_store(name, columns, start, end)
+    else:
+        usecols = None
+        if columns is not None:
+            usecols = ([time_col] if time_col else []) + [c for c in columns if c != time_col]
+        df = pd.read_csv(dataset_path(name), usecols=usecols, engine="pyarrow")
+
+    df = schema.apply(df, name)
+    if time_col is None:
+        return df
+
+    df[time_col] = pd.to_datetime(df[time_col]).astype("datetime64[ns]")
+    return df.set_index(time_col).sort_index()
+
+
+def read_many(requests):
+    """
+    Read several datasets concurrently.
+    requests: {name: columns or None}. Returns {name: DataFrame}.
+    """
+    if len(requests) == 1:
+        (name, columns), = requests.items()
+        return {name: read_dataset(name, columns)}
+
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        futures = {name: pool.submit(read_dataset, name, cols) for name, cols in requests.items()}
+        return {name: f.result() for name, f in futures.items()}
+
+
+# ----------------------------------------------------
+# MEASUREMENT
+# ----------------------------------------------------
+_COLD_START = """
+import resource, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300).run()
+assert not at.exception, [e.value for e in at.exception]
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def cold_start(app):
+    """(seconds, peak RSS in MB) for a first visit in a fresh interpreter."""
+    out = subprocess.run(
+        [sys.executable, "-c", _COLD_START, os.path.join(DASHBOARD_DIR, app)],
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(out[-2]), int(out[-1]) / 1024  # ru_maxrss is KiB on Linux
+
+
+def main():
+    print("📊 Dataset reads: full serial vs projected concurrent")
+    start = time.perf_counter()
+    full = {name: read_dataset(name) for name in DATASETS}
+    serial = time.perf_counter() - start
+    full_mb = sum(df.memory_usage(deep=True).sum() for df in full.values()) / 1e6
+
+    start = time.perf_counter()
+    projected = read_many({
+        "baseline": ["Load Consumption (kW)"],
+        "savings": ["Actual Power (kW)", "Adjusted Baseline Power (kW)"],
+        "md": None,
+    })
+    concurrent = time.perf_counter() - start
+    projected_mb = sum(df.memory_usage(deep=True).sum() for df in projected.values()) / 1e6
+
+    print(f"   all {len(full)} datasets, every column : {serial:.3f}s, {full_mb:.1f} MB in memory")
+    print(f"   first-paint columns only    : {concurrent:.3f}s, {projected_mb:.1f} MB in memory")
+
+    print("📊 Dashboard cold start (fresh process, first visitor)")
+    for app in ("finalize_app.py", "app.py"):
+        seconds, rss = cold_start(app)
+        print(f"   {app:<16} {seconds:.2f}s, peak RSS {rss:.0f} MB")
+
+    print(f"   (this process: peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
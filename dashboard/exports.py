@@ -0,0 +1,225 @@
+# dashboard/exports.py
+"""
+On-demand dataset exports for the dashboard download section.
+
+Exports are only built when a user asks for one. Datasets are streamed in
+chunks (one results-store month partition at a time, or CSV chunks for the
+baseline period), filtered to the selected period as they are read,
+straight into a compressed CSV, a Parquet file or a multi-sheet Excel
+workbook on disk, so memory stays bounded whatever the history length. Finished files are
+cached on disk keyed by dataset, format, data version and date range;
+asking again for the same export is a file lookup.
+
+Formats:
+- csv.gz   one dataset, gzip-compressed CSV
+- parquet  one dataset, zstd-compressed Parquet
+- xlsx     all datasets, one sheet each (needs openpyxl or xlsxwriter)
+
+RUN (timing report):
+    python dashboard/exports.py
+"""
+
+import glob
+import gzip
+import hashlib
+import importlib.util
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from data_access import DATASETS, STORE_VIEWS, dataset_columns, dataset_path, read_dataset
+
+# ----------------------------------------------------
+# SETTINGS
+# ----------------------------------------------------
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "mv_dashboard_exports")
+CHUNK_ROWS = 50_000
+MAX_CACHED_FILES = 64
+
+# Datasets that are exported in full (the baseline period predates any
+# reporting range the user can select)
+FULL_HISTORY = {"baseline"}
+
+EXCEL_ENGINE = next(
+    (engine for engine in ("xlsxwriter", "openpyxl") if importlib.util.find_spec(engine)),
+    None,
+)
+
+FORMATS = {
+    "csv.gz": "application/gzip",
+    "parquet": "application/vnd.apache.parquet",
+}
+if EXCEL_ENGINE:
+    FORMATS["xlsx"] = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# ----------------------------------------------------
+# CHUNKED READS
+# ----------------------------------------------------
+def iter_chunks(name, start, end, chunk_rows=CHUNK_ROWS):
+    """
+    Yield DataFrame chunks of dataset `name` within [start, end) (end
+    exclusive, as SharedTable and RollupCube.range_kpis).
+    """
+    time_col = DATASETS[name][1]
+    if name not in STORE_VIEWS:
+        chunks = pd.read_csv(dataset_path(name), chunksize=chunk_rows)
+    elif time_col is None:
+        chunks = [read_dataset(name)]
+    else:
+        # one month partition per chunk
+        chunks = (
+            read_dataset(name, None, max(start, month.start_time), (month + 1).start_time).reset_index()
+            for month in pd.period_range(start, end - pd.Timedelta(1, "ns"), freq="M")
+        )
+
+    for chunk in chunks:
+        if time_col is not None:
+            chunk[time_col] = pd.to_datetime(chunk[time_col])
+            if name not in FULL_HISTORY:
+                chunk = chunk[(chunk[time_col] >= start) & (chunk[time_col] < end)]
+        else:
+            # MD table: one row per month
+            month = pd.to_datetime(chunk["Month"])
+            chunk = chunk[(month >= start) & (month < end)]
+        if len(chunk):
+            yield chunk
+
+
+# ----------------------------------------------------
+# WRITERS
+# ----------------------------------------------------
+def _write_csv_gz(name, start, end, path):
+    with gzip.open(path, "wt", encoding="utf-8", newline="", compresslevel=6) as fh:
+        header = True
+        for chunk in iter_chunks(name, start, end):
+            chunk.to_csv(fh, index=False, header=header)
+            header = False
+        if header:
+            fh.write(",".join(_columns(name)) + "\n")
+
+
+def _write_parquet(name, start, end, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in iter_chunks(name, start, end):
+            if writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            else:
+                table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+        if writer is None:
+            pd.DataFrame(columns=_columns(name)).to_parquet(path, index=False)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_xlsx(names, start, end, path):
+    with pd.ExcelWriter(path, engine=EXCEL_ENGINE) as writer:
+        for name in names:
+            row = 0
+            for chunk in iter_chunks(name, start, end):
+                chunk.to_excel(writer, sheet_name=name, index=False, header=row == 0,
+                               startrow=row if row == 0 else row + 1)
+                row += len(chunk)
+            if row == 0:
+                pd.DataFrame(columns=_columns(name)).to_excel(writer, sheet_name=name, index=False)
+
+
+def _columns(name):
+    return dataset_columns(name)
+
+
+# ----------------------------------------------------
+# CACHE
+# ----------------------------------------------------
+def export_path(names, fmt, version, start, end):
+    """Cache file for an export, keyed by its inputs."""
+    key = repr((tuple(names), fmt, version, str(start), str(end)))
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    stem = names[0] if len(names) == 1 else "workbook"
+    return os.path.join(EXPORT_DIR, f"{stem}-{digest}.{fmt}")
+
+
+def _prune(keep=MAX_CACHED_FILES):
+    files = sorted(glob.glob(os.path.join(EXPORT_DIR, "*")), key=os.path.getmtime, reverse=True)
+    for path in files[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def build_export(names, fmt, version, start, end):
+    """
+    Path of the export file for `names` in `fmt`, building it if needed.
+    csv.gz / parquet take a single dataset; xlsx writes one sheet per dataset.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt != "xlsx" and len(names) != 1:
+        raise ValueError(f"{fmt} exports hold a single dataset")
+
+    path = export_path(names, fmt, version, start, end)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    tmp = os.path.join(EXPORT_DIR, f".tmp{os.getpid()}-{os.path.basename(path)}")
+    try:
+        if fmt == "csv.gz":
+            _write_csv_gz(names[0], start, end, tmp)
+        elif fmt == "parquet":
+            _write_parquet(names[0], start, end, tmp)
+        else:
+            _write_xlsx(names, start, end, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    _prune()
+    return path
+
+
+# ----------------------------------------------------
+# MEASUREMENT
+# ----------------------------------------------------
+def main():
+    version = ("measure", time.time_ns())
+    start, end = pd.Timestamp("2024-05-01"), pd.Timestamp("2025-01-01")
+
+    print("📊 Export build time and size (cold, then cached)")
+    print(f"   period {start.date()} → {end.date()}, chunks of {CHUNK_ROWS:,} rows")
+    for name in ("baseline", "clean", "savings"):
+        raw = sum(len(c.to_csv(index=False).encode()) for c in iter_chunks(name, start, end))
+        for fmt in ("csv.gz", "parquet"):
+            t = time.perf_counter()
+            path = build_export([name], fmt, version, start, end)
+            cold = time.perf_counter() - t
+            t = time.perf_counter()
+            build_export([name], fmt, version, start, end)
+            warm = time.perf_counter() - t
+            print(
+                f"   {name:<9} {fmt:<8} {os.path.getsize(path) / 1e6:6.2f} MB"
+                f" (plain CSV {raw / 1e6:5.2f} MB)  cold {cold:.2f}s  cached {warm * 1000:.1f} ms"
+            )
+
+    if EXCEL_ENGINE:
+        t = time.perf_counter()
+        path = build_export(list(DATASETS), "xlsx", version, start, end)
+        print(f"   workbook  xlsx     {os.path.getsize(path) / 1e6:6.2f} MB  cold {time.perf_counter() - t:.2f}s")
+    else:
+        print("   (xlsx skipped: install openpyxl or xlsxwriter)")
+
+
+if __name__ == "__main__":
+    main()
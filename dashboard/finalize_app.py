@@ -4,10 +4,20 @@
 #git commit -m "Fix Full M&V timeline index handling and ECM separation"
 #git push origin main
 
-import plotly.graph_objects as go
 import streamlit as st
 import pandas as pd
+import json
 import os
+import sys
+from streamlit.logger import get_logger
+
+import perf
+
+# Streamlit's handler and level (logger.level in .streamlit/config.toml):
+# lines go to the server console
+logger = get_logger("finalize_app")
+perf.start_run("finalize_app")
+perf.mark("header")
 
 # ----------------------------------------------------
 # PAGE CONFIG
@@ -84,42 +94,87 @@ with st.sidebar:
 # ----------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+SRC_DIR = os.path.join(BASE_DIR, "src")
+sys.path.insert(0, SRC_DIR)
+
+from rollup_cube import RollupCube, CUBE_NPZ
+from chart_pyramid import ChartPyramid, PYRAMID_NPZ, ECM_DATE
 
-BASELINE_CSV = os.path.join(DATA_DIR, "PenangBaselineData.csv")
-SAVINGS_CSV = os.path.join(DATA_DIR, "Reporting_Savings_GRU.csv")
-COST_COMPARE_CSV = os.path.join(DATA_DIR, "Reporting_Cost_C1_vs_TOU.csv")
-CO2_CSV = os.path.join(DATA_DIR, "Reporting_CO2_Avoidance_GRU.csv")
-MD_CSV = os.path.join(DATA_DIR, "Reporting_MD_Savings.csv")
-CLEAN_CSV = os.path.join(DATA_DIR, "Reporting_Clean_30min.csv")
+from data_access import ARTIFACTS, DATASETS
+from exports import FORMATS as EXPORT_FORMATS, build_export
+from live_refresh import watch_sources
+from shared_data import SharedTable
+from charts import bar_chart, line_chart
 
 # ----------------------------------------------------
 # LOAD DATA
+# Each dataset is loaded once per server process, with only the columns the
+# page uses, into a read-only SharedTable; every session queries the same
+# arrays by date range without copying them. Caches are keyed on the
+# versions of just the sources they read (results store, baseline CSV,
+# artifacts), so a pipeline rerun only rebuilds the tables derived from
+# what it rewrote.
 # ----------------------------------------------------
-@st.cache_data(show_spinner=False)
-def load_data():
-    return (
-        pd.read_csv(SAVINGS_CSV, parse_dates=["DateTime"]),
-        pd.read_csv(COST_COMPARE_CSV, parse_dates=["DateTime"]),
-        pd.read_csv(CO2_CSV, parse_dates=["DateTime"]),
-        pd.read_csv(MD_CSV),
-        pd.read_csv(BASELINE_CSV, parse_dates=["DateTime"]),
-        pd.read_csv(CLEAN_CSV, parse_dates=["DateTime"])
+perf.mark("load_data")
+versions = watch_sources([*DATASETS, *ARTIFACTS])
+
+
+@perf.tracked(st.cache_resource(show_spinner=False, max_entries=8))
+def shared_table(name, version, columns=None, index_col=None):
+    return SharedTable.load(name, list(columns) if columns else None, index_col)
+
+
+@perf.tracked(st.cache_resource(show_spinner=False, max_entries=2))
+def monthly_aggregate(baseline_version, savings_version, _baseline, _savings):
+    """Monthly mean of the full M&V timeline (IPMVP Option C separation)."""
+    df_base, df_s = _baseline.frame(), _savings.frame()
+
+    # 1️⃣ Build a TRUE full timeline index (baseline + reporting)
+    timeline_df = pd.DataFrame(index=df_base.index.union(df_s.index).sort_values())
+
+    # 2️⃣ Assign series explicitly
+    timeline_df["Baseline Load (kW)"] = df_base["Load Consumption (kW)"]
+    timeline_df["Adjusted Baseline Power (kW)"] = df_s["Adjusted Baseline Power (kW)"]
+    timeline_df["Actual Power (kW)"] = df_s["Actual Power (kW)"]
+
+    # 3️⃣ Enforce IPMVP Option C logic
+    # Baseline ONLY before ECM, Adjusted + Actual ONLY after ECM
+    timeline_df.loc[timeline_df.index >= ECM_DATE, "Baseline Load (kW)"] = None
+    timeline_df.loc[timeline_df.index < ECM_DATE, "Adjusted Baseline Power (kW)"] = None
+    timeline_df.loc[timeline_df.index < ECM_DATE, "Actual Power (kW)"] = None
+
+    # 4️⃣ Aggregate using MEAN (power-based, Option C appropriate)
+    return SharedTable.from_frame(
+        timeline_df.groupby(timeline_df.index.to_period("M").to_timestamp()).mean()
     )
 
-df_s, df_cmp, df_co, df_md, df_base, df_clean = load_data()
 
-df_s = df_s.set_index("DateTime").sort_index()
-df_cmp = df_cmp.set_index("DateTime").sort_index()
-df_co = df_co.set_index("DateTime").sort_index()
-df_base = df_base.set_index("DateTime").sort_index()
-df_clean = df_clean.set_index("DateTime").sort_index()
-df_md["Month"] = pd.to_datetime(df_md["Month"])
+savings = shared_table(
+    "savings", versions["savings"], ("Adjusted Baseline Power (kW)", "Actual Power (kW)")
+)
+
+
+@perf.tracked(st.cache_resource(show_spinner=False, max_entries=2))
+def load_cube(cube_version):
+    return RollupCube.load(CUBE_NPZ)
+
+
+cube = load_cube(versions["cube"])
+
+
+@perf.tracked(st.cache_resource(show_spinner=False, max_entries=2))
+def load_pyramid(pyramid_version):
+    return ChartPyramid.load(PYRAMID_NPZ)
+
+
+# Charts read bounded-size slices of the pre-aggregated pyramid
+pyramid = load_pyramid(versions["pyramid"])
 
 # ----------------------------------------------------
 # DATE RANGE FILTER (FIXED)
 # ----------------------------------------------------
-min_date = df_s.index.min().date()
-max_date = df_s.index.max().date()
+perf.mark("date_range")
+min_date, max_date = (t.date() for t in savings.bounds())
 
 date_range = st.date_input(
     "Select Reporting Period",
@@ -131,62 +186,34 @@ date_range = st.date_input(
 start_dt = pd.to_datetime(date_range[0])
 end_dt = pd.to_datetime(date_range[1]) + pd.Timedelta(days=1)
 
-df_s_f = df_s.loc[start_dt:end_dt]
-df_cmp_f = df_cmp.loc[start_dt:end_dt]
-df_co_f = df_co.loc[start_dt:end_dt]
-df_clean_f = df_clean.loc[start_dt:end_dt]
-
-df_md_f = df_md[
-    (df_md["Month"] >= start_dt) &
-    (df_md["Month"] <= end_dt)
-]
-
-if df_s_f.empty:
+if cube.range_total("interval_count", start_dt, end_dt) == 0:
     st.warning("No data available for selected period.")
     st.stop()
 
 # ----------------------------------------------------
-# KPI METRICS
+# KPI METRICS (O(1) prefix differences from the rollup cube)
 # ----------------------------------------------------
+perf.mark("kpis")
 st.markdown("### 🔹 Key Performance Indicators")
 
-total_energy_savings = (
-    df_s_f["Cumulative Savings Energy (kWh)"].iloc[-1]
-    - df_s_f["Cumulative Savings Energy (kWh)"].iloc[0]
-)
-
-total_cost_c1 = (
-    df_cmp_f["C1 Cumulative Cost Savings (RM)"].iloc[-1]
-    - df_cmp_f["C1 Cumulative Cost Savings (RM)"].iloc[0]
-)
-
-total_cost_tou = (
-    df_cmp_f["TOU Cumulative Cost Savings (RM)"].iloc[-1]
-    - df_cmp_f["TOU Cumulative Cost Savings (RM)"].iloc[0]
-)
-
-total_co2 = (
-    df_co_f["Cumulative CO2 Avoided (tonnes)"].iloc[-1]
-    - df_co_f["Cumulative CO2 Avoided (tonnes)"].iloc[0]
-)
-
-negative_pct = 100 * df_s_f["Negative Savings Flag"].mean()
+kpis = cube.range_kpis(start_dt, end_dt)
 
 c1, c2, c3, c4, c5 = st.columns(5)
-c1.metric("Energy Savings", f"{total_energy_savings:,.0f} kWh")
-c2.metric("Cost Savings (C1)", f"RM {total_cost_c1:,.0f}")
-c3.metric("Cost Savings (TOU)", f"RM {total_cost_tou:,.0f}")
-c4.metric("CO₂ Avoided", f"{total_co2:,.2f} tCO₂")
-c5.metric("Negative Savings", f"{negative_pct:.1f}%")
+c1.metric("Energy Savings", f"{kpis['energy_savings_kwh']:,.0f} kWh")
+c2.metric("Cost Savings (C1)", f"RM {kpis['cost_savings_c1_rm']:,.0f}")
+c3.metric("Cost Savings (TOU)", f"RM {kpis['cost_savings_tou_rm']:,.0f}")
+c4.metric("CO₂ Avoided", f"{kpis['co2_avoided_tonnes']:,.2f} tCO₂")
+c5.metric("Negative Savings", f"{kpis['negative_savings_pct']:.1f}%")
 
 # ----------------------------------------------------
 # DATA QUALITY INDICATORS (CORRECT SOURCE)
 # ----------------------------------------------------
+perf.mark("data_quality")
 st.markdown("### 🔹 Data Quality Indicators")
 
-interp_pct = 100 * df_clean_f["Interpolated Flag"].mean()
-outage_pct = 100 * df_clean_f["Outage Flag"].mean()
-valid_pct = 100 * df_clean_f["Valid Data Flag"].mean()
+interp_pct = kpis["interpolated_pct"]
+outage_pct = kpis["outage_pct"]
+valid_pct = kpis["valid_pct"]
 
 q1, q2, q3 = st.columns(3)
 q1.metric("Interpolated Intervals", f"{interp_pct:.1f}%")
@@ -201,49 +228,25 @@ st.caption(
 # ----------------------------------------------------
 # PRE-ECM BASELINE
 # ----------------------------------------------------
+perf.mark("pre_ecm_baseline")
 st.markdown("### 🔹 Pre-ECM Baseline Load Profile")
-st.line_chart(df_base["Load Consumption (kW)"])
+line_chart(pyramid.frame(["Baseline Load (kW)"], pyramid.start, ECM_DATE))
 
 # ----------------------------------------------------
 # FULL M&V TIMELINE (BASELINE → ADJUSTED BASELINE → ACTUAL)
 # ----------------------------------------------------
+perf.mark("full_timeline")
 st.markdown("### 🔹 Full M&V Timeline")
 
-ECM_DATE = pd.to_datetime("2024-05-01")
-
-# 1️⃣ Build a TRUE full timeline index (baseline + reporting)
-timeline_index = (
-    df_base.index
-    .union(df_s.index)
-    .sort_values()
-)
-
-timeline_df = pd.DataFrame(index=timeline_index)
-
-# 2️⃣ Assign series explicitly
-timeline_df["Baseline Load (kW)"] = df_base["Load Consumption (kW)"]
-timeline_df["Adjusted Baseline Power (kW)"] = df_s["Adjusted Baseline Power (kW)"]
-timeline_df["Actual Power (kW)"] = df_s["Actual Power (kW)"]
-
-# 3️⃣ Enforce IPMVP Option C logic
-# Baseline ONLY before ECM
-timeline_df.loc[timeline_df.index >= ECM_DATE, "Baseline Load (kW)"] = None
-
-# Adjusted + Actual ONLY after ECM
-timeline_df.loc[timeline_df.index < ECM_DATE, "Adjusted Baseline Power (kW)"] = None
-timeline_df.loc[timeline_df.index < ECM_DATE, "Actual Power (kW)"] = None
-
-# ----------------------------------------------------
-# 4️⃣ Plot (Streamlit-native, stable, fast)
-# ----------------------------------------------------
-st.line_chart(
-    timeline_df[
+# Plot (min/max envelope from the pyramid, peaks preserved)
+line_chart(
+    pyramid.frame(
         [
             "Baseline Load (kW)",
             "Adjusted Baseline Power (kW)",
             "Actual Power (kW)",
         ]
-    ]
+    )
 )
 
 st.caption(
@@ -254,23 +257,13 @@ st.caption(
 # ----------------------------------------------------
 # MONTHLY AGGREGATED M&V (REPORTING-LEVEL VIEW)
 # ----------------------------------------------------
+perf.mark("monthly_aggregate")
 st.markdown("### 🔹 Monthly Aggregated M&V Performance")
 
-# 1️⃣ Create a copy to avoid side effects
-monthly_df = timeline_df.copy()
-
-# 2️⃣ Convert index to monthly period
-monthly_df["Month"] = monthly_df.index.to_period("M").to_timestamp()
-
-# 3️⃣ Aggregate using MEAN (power-based, Option C appropriate)
-monthly_agg = (
-    monthly_df
-    .groupby("Month")
-    .mean(numeric_only=True)
-)
+baseline = shared_table("baseline", versions["baseline"], ("Load Consumption (kW)",))
+monthly_agg = monthly_aggregate(versions["baseline"], versions["savings"], baseline, savings).frame()
 
-# 4️⃣ Plot
-st.line_chart(
+line_chart(
     monthly_agg[
         [
             "Baseline Load (kW)",
@@ -290,100 +283,154 @@ st.caption(
 # ----------------------------------------------------
 # ADJUSTED BASELINE VS ACTUAL
 # ----------------------------------------------------
+perf.mark("adjusted_vs_actual")
 st.markdown("### 🔹 Adjusted Baseline vs Actual Load")
-st.line_chart(df_s_f[["Actual Power (kW)", "Adjusted Baseline Power (kW)"]])
+line_chart(
+    pyramid.frame(["Actual Power (kW)", "Adjusted Baseline Power (kW)"], start_dt, end_dt)
+)
 
 # ----------------------------------------------------
 # CUMULATIVE ENERGY SAVINGS
 # ----------------------------------------------------
+perf.mark("cumulative_savings")
 st.markdown("### 🔹 Cumulative Energy Savings")
-st.line_chart(df_s_f["Cumulative Savings Energy (kWh)"])
+line_chart(
+    pyramid.frame(["Cumulative Savings Energy (kWh)"], start_dt, end_dt, envelope=False)
+)
 
 # ----------------------------------------------------
 # COST SAVINGS
 # ----------------------------------------------------
+perf.mark("cost_savings")
 st.markdown("### 🔹 Cumulative Cost Savings")
-st.line_chart(
-    df_cmp_f[
-        ["C1 Cumulative Cost Savings (RM)", "TOU Cumulative Cost Savings (RM)"]
-    ]
+line_chart(
+    pyramid.frame(
+        ["C1 Cumulative Cost Savings (RM)", "TOU Cumulative Cost Savings (RM)"],
+        start_dt, end_dt, envelope=False
+    )
 )
 
 # ----------------------------------------------------
 # MD SAVINGS
 # ----------------------------------------------------
+perf.mark("md_savings")
 st.markdown("### 🔹 Monthly Maximum Demand (MD) Savings")
 
+md = shared_table("md", versions["md"], index_col="Month")
+df_md_f = md.frame(start=start_dt, end=end_dt, index_name="Month")
+
 if not df_md_f.empty:
     if "MD Savings (kW)" in df_md_f:
-        st.bar_chart(df_md_f.set_index("Month")["MD Savings (kW)"])
+        bar_chart(df_md_f["MD Savings (kW)"])
     if "MD Cost Savings (RM)" in df_md_f:
-        st.bar_chart(df_md_f.set_index("Month")["MD Cost Savings (RM)"])
+        bar_chart(df_md_f["MD Cost Savings (RM)"])
 
 # ----------------------------------------------------
 # CO₂ AVOIDANCE
 # ----------------------------------------------------
+perf.mark("co2")
 st.markdown("### 🔹 CO₂ Avoidance")
-st.line_chart(df_co_f["Cumulative CO2 Avoided (tonnes)"])
+line_chart(
+    pyramid.frame(["Cumulative CO2 Avoided (tonnes)"], start_dt, end_dt, envelope=False)
+)
 
 # ----------------------------------------------------
 # DOWNLOADABLE DATASETS
 # ----------------------------------------------------
+perf.mark("downloads")
 st.markdown("### 🔹 Download Analysis Datasets")
 
-d1, d2, d3 = st.columns(3)
-d4, d5, d6 = st.columns(3)
+# Nothing is serialized until a user asks for an export; files are built by
+# streaming the datasets in chunks and cached on disk per version / range.
+EXPORT_LABELS = {
+    "baseline": "Baseline Data",
+    "clean": "Clean Reporting Data (30-min)",
+    "savings": "Energy Savings (GRU)",
+    "compare": "Cost Savings (C1 vs TOU)",
+    "co2": "CO₂ Avoidance",
+    "md": "MD Savings",
+}
+FORMAT_LABELS = {
+    "csv.gz": "CSV (gzip)",
+    "parquet": "Parquet",
+    "xlsx": "Excel workbook (all datasets)",
+}
+
+e1, e2, e3 = st.columns([2, 2, 1])
+fmt = e2.selectbox(
+    "Format", [f for f in FORMAT_LABELS if f in EXPORT_FORMATS], format_func=FORMAT_LABELS.get
+)
+dataset = e1.selectbox(
+    "Dataset", list(EXPORT_LABELS), format_func=EXPORT_LABELS.get, disabled=fmt == "xlsx"
+)
+names = list(EXPORT_LABELS) if fmt == "xlsx" else [dataset]
+version = tuple(versions[name] for name in names)
+request = (tuple(names), fmt, version, start_dt, end_dt)
+
+e3.markdown("&nbsp;")
+if e3.button("Prepare export"):
+    with st.spinner("Preparing export..."):
+        st.session_state["export"] = (request, build_export(names, fmt, version, start_dt, end_dt))
+
+prepared = st.session_state.get("export")
+if prepared and prepared[0] == request and os.path.exists(prepared[1]):
+    stem = "Reporting_Datasets" if fmt == "xlsx" else DATASETS[dataset][0].rsplit(".", 1)[0]
+    with open(prepared[1], "rb") as fh:
+        st.download_button(
+            f"⬇ {FORMAT_LABELS[fmt]}: {'All datasets' if fmt == 'xlsx' else EXPORT_LABELS[dataset]}",
+            fh,
+            file_name=f"{stem}_{start_dt:%Y%m%d}_{end_dt - pd.Timedelta(days=1):%Y%m%d}.{fmt}",
+            mime=EXPORT_FORMATS[fmt],
+            on_click=lambda: st.session_state.pop("export", None),
+        )
+
+if "xlsx" not in EXPORT_FORMATS:
+    st.caption("Excel export needs `openpyxl` or `xlsxwriter` installed.")
 
-with d1:
-    st.download_button(
-        "⬇ Baseline Data",
-        df_base.to_csv().encode(),
-        file_name="Baseline_Data.csv",
-        mime="text/csv"
-    )
+# ----------------------------------------------------
+# FOOTER
+# ----------------------------------------------------
+st.markdown("---")
+st.caption( "Advanced M&V 2.0 Dashboard | GRU-Based Adjusted Baseline |""Developed by Ahmad Daniel bin Mohd Yusop (FYP II) | " "Supervised by Prof. Ir. Dr. Nofri Yenita Dahlan | UiTM" )
 
-with d2:
-    st.download_button(
-        "⬇ Clean Reporting Data (30-min)",
-        df_clean_f.to_csv().encode(),
-        file_name="Reporting_Clean_30min.csv",
-        mime="text/csv"
-    )
+# ----------------------------------------------------
+# PERFORMANCE DIAGNOSTICS (optional)
+# Every run is logged as one JSON line (cache/dashboard_perf.jsonl); the panel
+# shows this session's recent runs and exports them for release tracking.
+# ----------------------------------------------------
+show_perf = st.sidebar.checkbox("Show performance diagnostics", value=False)
 
-with d3:
-    st.download_button(
-        "⬇ Energy Savings (GRU)",
-        df_s_f.to_csv().encode(),
-        file_name="Reporting_Savings_GRU.csv",
-        mime="text/csv"
-    )
+run = perf.finish()
+history = st.session_state.setdefault("perf_runs", [])
+history.append(run)
+del history[:-perf.HISTORY]
+latencies = st.session_state.setdefault("rerun_latency_ms", [])
+latencies.append(run["total_ms"])
+del latencies[:-perf.HISTORY]
+logger.info(
+    "rerun latency %.1f ms (period %s → %s)",
+    run["total_ms"], start_dt.date(), (end_dt - pd.Timedelta(days=1)).date()
+)
 
-with d4:
-    st.download_button(
-        "⬇ Cost Savings (C1 vs TOU)",
-        df_cmp_f.to_csv().encode(),
-        file_name="Reporting_Cost_Savings.csv",
-        mime="text/csv"
-    )
+if show_perf:
+    st.markdown("### 🔹 Performance Diagnostics")
+    p1, p2, p3, p4 = st.columns(4)
+    p1.metric("Page run", f"{run['total_ms']:,.0f} ms")
+    p2.metric("Cache hits / misses", f"{run['cache_hits']} / {run['cache_misses']}")
+    p3.metric("Chart payload", f"{run['chart_bytes'] / 1e3:,.1f} kB")
+    p4.metric("Process RSS", f"{run['rss_mb']:,.0f} MB")
 
-with d5:
-    st.download_button(
-        "⬇ CO₂ Avoidance",
-        df_co_f.to_csv().encode(),
-        file_name="Reporting_CO2_Avoidance.csv",
-        mime="text/csv"
-    )
+    s1, s2 = st.columns(2)
+    s1.dataframe(pd.DataFrame(run["sections"]), hide_index=True)
+    s2.dataframe(pd.DataFrame(run["caches"]), hide_index=True)
+    st.dataframe(pd.DataFrame(run["charts"]), hide_index=True)
+
+    st.caption(f"Page run time over the last {len(history)} run(s) (ms)")
+    st.line_chart([r["total_ms"] for r in history])
 
-with d6:
     st.download_button(
-        "⬇ MD Savings",
-        df_md_f.to_csv().encode(),
-        file_name="Reporting_MD_Savings.csv",
-        mime="text/csv"
+        "⬇ Diagnostics (JSON)",
+        json.dumps({"runs": history}, indent=2),
+        file_name=f"finalize_app_perf_{pd.Timestamp.now():%Y%m%d_%H%M%S}.json",
+        mime="application/json",
     )
-
-# ----------------------------------------------------
-# FOOTER
-# ----------------------------------------------------
-st.markdown("---")
-st.caption( "Advanced M&V 2.0 Dashboard | GRU-Based Adjusted Baseline |""Developed by Ahmad Daniel bin Mohd Yusop (FYP II) | " "Supervised by Prof. Ir. Dr. Nofri Yenita Dahlan | UiTM" )
@@ -0,0 +1,133 @@
+# dashboard/live_refresh.py
+"""
+Live data refresh for the Streamlit dashboards.
+
+watch_sources() gives each browser session a DataWatcher over the files the
+page reads and returns their current versions, which the page passes into
+its cached loaders. When the pipeline rewrites a file, only caches keyed on
+that file miss; everything else is served as before.
+
+On Streamlit versions with fragments, a small fragment polls every
+POLL_SECONDS and reruns the page when a source has changed (a script rerun,
+not a browser reload: widget state is kept). Older versions (the pinned
+1.29 has no fragments) get the same from a timer thread per session that
+polls and asks the server to rerun that session's script. Outside a
+Streamlit server (bare mode, AppTest) sources are checked on every run.
+"""
+
+import inspect
+import threading
+
+import streamlit as st
+
+from data_access import DataWatcher
+
+POLL_SECONDS = 15
+
+
+def _fragment():
+    """st.fragment / st.experimental_fragment with run_every, if available."""
+    for name in ("fragment", "experimental_fragment"):
+        fragment = getattr(st, name, None)
+        if fragment and "run_every" in inspect.signature(fragment).parameters:
+            return fragment
+    return None
+
+
+def _app_session(session_id):
+    """The server's session object for `session_id`, None once it has closed."""
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return None
+    info = Runtime.instance()._session_mgr.get_active_session_info(session_id)
+    return info.session if info is not None else None
+
+
+class _RerunTimer(threading.Thread):
+    """Polls a session's DataWatcher every `every` seconds; reruns the session on a change."""
+
+    def __init__(self, watcher, session_id, every):
+        super().__init__(name=f"live-refresh-{session_id}", daemon=True)
+        self.watcher = watcher
+        self.session_id = session_id
+        self.every = every
+        self.lock = threading.Lock()  # the script run polls the same watcher
+        self.changed = []
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.every):
+            session = _app_session(self.session_id)
+            if session is None:
+                return
+            with self.lock:
+                changed = self.watcher.poll()
+                self.changed += changed
+            if changed:
+                # None: rerun with the session's current widget state
+                session.request_rerun(None)
+
+    def stop(self):
+        self._stopped.set()
+
+    def poll(self):
+        """Changes seen by the timer since the last run, plus any new ones."""
+        with self.lock:
+            changed, self.changed = self.changed + self.watcher.poll(), []
+        return changed
+
+
+def _timer_poll(watcher, every):
+    """
+    Fragment-less fallback: one _RerunTimer per session. Returns the
+    changed sources, or None outside a Streamlit server.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None or _app_session(ctx.session_id) is None:
+        return None
+
+    timer = st.session_state.get("_data_timer")
+    if timer is None or timer.watcher is not watcher or not timer.is_alive():
+        if timer is not None:
+            timer.stop()
+        timer = st.session_state["_data_timer"] = _RerunTimer(watcher, ctx.session_id, every)
+        timer.start()
+    return timer.poll()
+
+
+def watch_sources(names, every=POLL_SECONDS):
+    """Per-session {source: version} for `names`, kept fresh while the page is open."""
+    watcher = st.session_state.get("_data_watcher")
+    if watcher is None or watcher.names != list(names):
+        watcher = st.session_state["_data_watcher"] = DataWatcher(names)
+
+    changed = st.session_state.pop("_data_changed", None)
+    if changed:
+        st.toast(f"🔄 Data updated: {', '.join(changed)}")
+
+    fragment = _fragment()
+    if fragment is None:
+        changed = _timer_poll(watcher, every)
+        if changed is None:
+            watcher.poll()
+            st.sidebar.caption("🔄 Data is re-checked on every interaction.")
+        else:
+            if changed:
+                st.toast(f"🔄 Data updated: {', '.join(changed)}")
+            st.sidebar.caption(f"🔄 Live data: checked every {every}s")
+        return dict(watcher.current)
+
+    @fragment(run_every=every)
+    def poll():
+        changed = watcher.poll()
+        if changed:
+            st.session_state["_data_changed"] = changed
+            st.rerun()
+        st.caption(f"🔄 Live data: checked every {every}s")
+
+    with st.sidebar:
+        poll()
+    return dict(watcher.current)
@@ -0,0 +1,175 @@
+# dashboard/load_test.py
+"""
+Concurrent-user load test for the dashboards.
+
+Simulates N browser sessions in one server process (Streamlit AppTest, one
+thread per user). Every user opens the page, then picks a few random
+reporting periods. Reports:
+- resident memory after one session and after all N, and the increase per
+  additional concurrent session
+- p50 / p95 / max page latency across all runs
+
+RUN:
+    python dashboard/load_test.py
+    python dashboard/load_test.py --users 20 --interactions 3 --app finalize_app.py
+"""
+
+import argparse
+import contextlib
+import gc
+import os
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------------------
+# PATHS
+# ----------------------------------------------------
+DASHBOARD_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def rss_mb():
+    """Current resident set size of this process (MB)."""
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def share_server_state():
+    """
+    AppTest builds a fresh mock Runtime and script cache for every run and
+    patches the config around it, undoing all of it when the run ends, which
+    breaks runs happening at the same time. Keep one of each for the whole
+    test instead, like a real server: one runtime, one config and one
+    compiled script serving every session.
+    """
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test, local_script_runner
+    from streamlit.testing.v1.util import build_mock_config_get_option
+
+    class KeepFirst(type):
+        def __setattr__(cls, name, value):
+            if name != "_instance":
+                super().__setattr__(name, value)
+            elif value is not None and Runtime._instance is None:
+                Runtime._instance = value
+
+    class SharedRuntime(Runtime, metaclass=KeepFirst):
+        pass
+
+    app_test.Runtime = SharedRuntime
+    script_cache = app_test.ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+
+    config.get_option = build_mock_config_get_option({"global.appTest": True})
+    app_test.patch_config_options = lambda options: contextlib.nullcontext()
+
+
+def _timed_run(at, latencies):
+    start = time.perf_counter()
+    at.run()
+    latencies.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError([e.value for e in at.exception])
+
+
+def _random_period(at, rng):
+    widget = at.date_input[0]
+    lo, hi = pd.Timestamp(widget.min), pd.Timestamp(widget.max)
+    days = (hi - lo).days
+    a = rng.randint(0, days - 7)
+    b = rng.randint(a + 7, days)
+    widget.set_value(((lo + pd.Timedelta(days=a)).date(), (lo + pd.Timedelta(days=b)).date()))
+
+
+def user_session(app, interactions, seed, latencies, sessions, barrier):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(os.path.join(DASHBOARD_DIR, app), default_timeout=600)
+    barrier.wait()
+    _timed_run(at, latencies)
+    for _ in range(interactions):
+        _random_period(at, rng)
+        _timed_run(at, latencies)
+    sessions.append(at)  # keep the session (and its state) alive
+
+
+def run_load(app, users, interactions):
+    share_server_state()
+
+    # Warm the process-wide caches with one session first
+    one, latencies = [], []
+    user_session(app, 0, 0, latencies, one, threading.Barrier(1))
+    gc.collect()
+    rss_one = rss_mb()
+
+    sessions, latencies, errors = [], [], []
+    barrier = threading.Barrier(users)
+
+    def worker(i):
+        try:
+            user_session(app, interactions, i + 1, latencies, sessions, barrier)
+        except Exception as exc:  # report, don't hang the other users
+            errors.append(exc)
+            barrier.abort()
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+
+    gc.collect()
+    rss_all = rss_mb()
+    lat = np.array(latencies) * 1000
+    return {
+        "app": app,
+        "users": users,
+        "interactions": interactions,
+        "runs": len(lat),
+        "errors": [repr(e) for e in errors],
+        "wall_s": round(wall, 2),
+        "rss_one_session_mb": round(rss_one, 1),
+        "rss_all_sessions_mb": round(rss_all, 1),
+        "mb_per_extra_session": round((rss_all - rss_one) / max(users, 1), 2),
+        "latency_p50_ms": round(float(np.percentile(lat, 50)), 1) if len(lat) else None,
+        "latency_p95_ms": round(float(np.percentile(lat, 95)), 1) if len(lat) else None,
+        "latency_max_ms": round(float(lat.max()), 1) if len(lat) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-user dashboard load test")
+    parser.add_argument("--app", default="finalize_app.py")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--interactions", type=int, default=3, help="period changes per user")
+    args = parser.parse_args()
+
+    print(f"🔹 {args.users} concurrent users on {args.app}, {args.interactions} interaction(s) each...")
+    r = run_load(args.app, args.users, args.interactions)
+
+    for err in r["errors"]:
+        print(f"❌ {err}")
+    print(f"📊 {r['runs']} page runs in {r['wall_s']}s wall")
+    print(
+        f"   memory: {r['rss_one_session_mb']} MB (1 session) → {r['rss_all_sessions_mb']} MB "
+        f"(+{r['users']} sessions), {r['mb_per_extra_session']} MB per extra session"
+    )
+    print(
+        f"   latency: p50 {r['latency_p50_ms']} ms, p95 {r['latency_p95_ms']} ms, "
+        f"max {r['latency_max_ms']} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# dashboard/perf.py
+"""
+Per-run performance diagnostics for the dashboards.
+
+A RunRecorder collects, for one script run:
+- wall time per page section (perf.mark("name") closes the previous one)
+- cache calls: hit or miss, and time spent (misses include CSV loads and
+  derived-frame builds)
+- per-chart rows and Arrow payload bytes
+- process RSS at the end of the run
+
+finish() writes one JSON line to the "dashboard.perf" logger and returns
+the record; the dashboard keeps recent records in session state, shows
+them in an optional panel and offers them as a JSON download.
+
+The logger appends to cache/dashboard_perf.jsonl. MV_DASHBOARD_PERF_LOG
+names another file ("-" = stderr); set it empty to turn the log off.
+
+The active recorder is thread-local: Streamlit runs each session's script
+on its own thread, so concurrent sessions never mix records.
+"""
+
+import functools
+import json
+import logging
+import os
+import platform
+import sys
+import threading
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, "src"))
+
+from chart_pyramid import arrow_bytes
+
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+DEFAULT_LOG = os.path.join(CACHE_DIR, "dashboard_perf.jsonl")
+
+logger = logging.getLogger("dashboard.perf")
+_local = threading.local()
+
+HISTORY = 50  # runs kept per session
+
+
+def _configure_logger():
+    """One JSON record per line, to its own file (not the root logger)."""
+    target = os.environ.get("MV_DASHBOARD_PERF_LOG", DEFAULT_LOG)
+    logger.propagate = False
+    if logger.handlers:  # module re-imported (Streamlit reloads on edit)
+        return
+    if not target:
+        logger.disabled = True
+        return
+    if target == "-":
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        handler = logging.FileHandler(target, delay=True)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+_configure_logger()
+
+
+def rss_mb():
+    """Current resident set size of this process (MB)."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RunRecorder:
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self.sections = []
+        self.caches = []
+        self.charts = []
+        self._section = None
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self._close_section(now)
+        self._section = (name, now)
+
+    def _close_section(self, now):
+        if self._section is not None:
+            name, start = self._section
+            self.sections.append({"section": name, "ms": round((now - start) * 1000, 2)})
+            self._section = None
+
+    def cache(self, name, hit, ms):
+        self.caches.append({"cache": name, "hit": hit, "ms": round(ms, 2)})
+
+    def chart(self, name, rows, nbytes):
+        section = self._section[0] if self._section else None
+        self.charts.append({"section": section, "chart": name, "rows": rows, "bytes": nbytes})
+
+    def finish(self):
+        now = time.perf_counter()
+        self._close_section(now)
+        import streamlit
+
+        return {
+            "page": self.page,
+            "started": pd.Timestamp(self.started, unit="s").isoformat(),
+            "total_ms": round((now - self._t0) * 1000, 2),
+            "rss_mb": round(rss_mb(), 1),
+            "cache_hits": sum(c["hit"] for c in self.caches),
+            "cache_misses": sum(not c["hit"] for c in self.caches),
+            "chart_bytes": sum(c["bytes"] for c in self.charts),
+            "sections": self.sections,
+            "caches": self.caches,
+            "charts": self.charts,
+            "versions": {
+                "python": platform.python_version(),
+                "streamlit": streamlit.__version__,
+                "pandas": pd.__version__,
+            },
+        }
+
+
+# ----------------------------------------------------
+# MODULE API (no-ops when no run is being recorded)
+# ----------------------------------------------------
+def start_run(page):
+    _local.recorder = RunRecorder(page)
+    return _local.recorder
+
+
+def current():
+    return getattr(_local, "recorder", None)
+
+
+def mark(name):
+    rec = current()
+    if rec is not None:
+        rec.mark(name)
+
+
+def finish():
+    """Close the current run: log it as one JSON line and return the record."""
+    rec = current()
+    if rec is None:
+        return None
+    _local.recorder = None
+    record = rec.finish()
+    logger.info(json.dumps(record))
+    return record
+
+
+def record_chart(name, df):
+    rec = current()
+    if rec is not None:
+        rec.chart(name, len(df), arrow_bytes(df))
+
+
+def tracked(cache_decorator, name=None):
+    """
+    Apply a Streamlit cache decorator and record each call as a hit or miss:
+
+        @perf.tracked(st.cache_resource(max_entries=2))
+        def load_cube(version): ...
+    """
+    def wrap(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            _local.miss = True
+            return fn(*args, **kwargs)
+
+        cached = cache_decorator(body)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            _local.miss = False
+            start = time.perf_counter()
+            result = cached(*args, **kwargs)
+            rec = current()
+            if rec is not None:
+                key = f"{label}:{args[0]}" if args and isinstance(args[0], str) else label
+                rec.cache(key, not _local.miss, (time.perf_counter() - start) * 1000)
+            return result
+
+        call.clear = cached.clear
+        return call
+
+    return wrap
@@ -0,0 +1,81 @@
+# dashboard/shared_data.py
+"""
+Process-wide, read-only data layer for multi-user dashboard serving.
+
+A SharedTable is loaded once per server process (st.cache_resource) and
+holds a sorted DateTime index plus one numpy array per column, all
+marked read-only. Sessions query it by date range: the result is a
+DataFrame over views of the shared arrays, so no session copies the
+data, and none can change what the others see (a write raises, or under
+pandas copy-on-write lands in a private copy).
+
+Unlike st.cache_data, which unpickles a fresh copy for every caller,
+memory stays flat as sessions are added.
+"""
+
+import numpy as np
+import pandas as pd
+
+from data_access import DATASETS, read_dataset
+
+
+def _frozen(values):
+    values = np.asarray(values)
+    values.setflags(write=False)
+    return values
+
+
+class SharedTable:
+    def __init__(self, index, columns):
+        self.index = _frozen(np.asarray(index, dtype="datetime64[ns]"))
+        self.columns = {name: _frozen(values) for name, values in columns.items()}
+
+    @classmethod
+    def from_frame(cls, df):
+        """df: DatetimeIndex-ed frame. The index is sorted on the way in."""
+        df = df.sort_index()
+        return cls(df.index.to_numpy(dtype="datetime64[ns]"), {c: df[c].to_numpy() for c in df.columns})
+
+    @classmethod
+    def load(cls, name, columns=None, index_col=None):
+        """
+        Read dataset `name` into a shared table. Tables without a DateTime
+        column (e.g. the monthly MD table) are indexed on `index_col`.
+        """
+        df = read_dataset(name, columns if index_col is None else None)
+        if DATASETS[name][1] is None:
+            df = df.set_index(pd.to_datetime(df.pop(index_col)).rename(index_col))
+            if columns is not None:
+                df = df[[c for c in columns if c != index_col]]
+        return cls.from_frame(df)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def nbytes(self):
+        return self.index.nbytes + sum(v.nbytes for v in self.columns.values())
+
+    def bounds(self):
+        return pd.Timestamp(self.index[0]), pd.Timestamp(self.index[-1])
+
+    def _span(self, start=None, end=None):
+        """Positions [i, j) of rows with start <= t < end (as RollupCube.range_kpis)."""
+        i = 0 if start is None else int(np.searchsorted(self.index, np.datetime64(pd.Timestamp(start), "ns"), "left"))
+        j = len(self.index) if end is None else int(np.searchsorted(self.index, np.datetime64(pd.Timestamp(end), "ns"), "left"))
+        return i, j
+
+    def column(self, name, start=None, end=None):
+        """Read-only view of one column over [start, end)."""
+        i, j = self._span(start, end)
+        return self.columns[name][i:j]
+
+    def frame(self, columns=None, start=None, end=None, index_name="DateTime"):
+        """DataFrame over views of [start, end) (no copy)."""
+        i, j = self._span(start, end)
+        columns = list(self.columns) if columns is None else columns
+        return pd.DataFrame(
+            {c: self.columns[c][i:j] for c in columns},
+            index=pd.DatetimeIndex(self.index[i:j], name=index_name),
+            copy=False,
+        )
@@ -0,0 +1,408 @@
+# src/benchmark.py
+"""
+Benchmark suite for the M&V chain on synthetic data (see synthetic_data.py).
+
+Stages, each timed and memory-profiled in a fresh process per meter:
+- preprocess      reporting_preprocessing.main       (raw export -> clean)
+- features        reporting_gru_preprocessor.main    (clean -> GRU-ready)
+- windowing       scaling + create_sequence_windows   (as the predictor does)
+- inference       GRU predict over the windows        (skipped without TensorFlow)
+- savings         savings_engine.run --legacy         (derived, MD, cube, store, CSVs)
+- dashboard_load  data_access.read_many + rollup cube (every dashboard dataset)
+
+Per stage: wall seconds (best of --repeat, summed over meters), peak RSS
+(max over meters), intervals/s and the per-step breakdown from
+instrumentation.py. Results go to cache/benchmarks/<run>.json.
+
+--update-baseline stores the results as the baseline for this scale
+(cache/benchmarks/baseline.json; timings are machine-specific). Later runs
+at the same scale are compared with it and the suite exits 1 when a stage
+is slower, or needs more memory, than the baseline by more than
+--threshold.
+
+RUN:
+    python src/benchmark.py --years 1 --update-baseline
+    python src/benchmark.py --years 1                  # compare
+    python src/benchmark.py --years 10 --meters 3 --repeat 1
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# PATHS / SETTINGS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+DASHBOARD_DIR = os.path.join(BASE_DIR, "dashboard")
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+
+BENCH_DIR = os.path.join(CACHE_DIR, "benchmarks")
+BASELINE_JSON = os.path.join(BENCH_DIR, "baseline.json")
+DATA_ROOT = os.path.join(tempfile.gettempdir(), "mv_benchmark")
+
+STAGES = ["preprocess", "features", "windowing", "inference", "savings", "dashboard_load"]
+
+DEFAULT_THRESHOLD = 0.20
+DEFAULT_REPEAT = 3
+# differences below these are noise, whatever the ratio
+MIN_DELTA_SECONDS = 0.10
+MIN_DELTA_MB = 16.0
+
+
+class StageSkipped(Exception):
+    pass
+
+
+# -------------------------------------------------
+# STAGE BODIES (run inside the child process)
+# -------------------------------------------------
+def _rebase(module, data_dir):
+    """Point a stage script's data-file constants at data_dir."""
+    for name, value in list(vars(module).items()):
+        if name.isupper() and isinstance(value, str) and os.path.dirname(value) == module.DATA_DIR:
+            setattr(module, name, os.path.join(data_dir, os.path.basename(value)))
+    module.DATA_DIR = data_dir
+
+
+def _scaled_ready(data_dir):
+    """GRU-ready frame scaled with the saved scalers, as the predictor does."""
+    from instrumentation import step, rows
+    from data_preproc import DEFAULT_FEATURES, TARGET_COL, load_scalers, transform_features
+    import schema
+
+    step("read_csv")
+    df = schema.read_csv(os.path.join(data_dir, "Reporting_GRU_Ready.csv"), "gru_ready")
+    df = df.sort_values("DateTime").set_index("DateTime")
+    rows(len(df))
+
+    step("scale", rows=len(df))
+    Xs, ys = transform_features(df, *load_scalers())
+    df[DEFAULT_FEATURES] = Xs
+    df[TARGET_COL] = ys
+    return df
+
+
+def bench_preprocess(data_dir):
+    import reporting_preprocessing
+
+    _rebase(reporting_preprocessing, data_dir)
+    reporting_preprocessing.main()
+
+
+def bench_features(data_dir):
+    import reporting_gru_preprocessor
+
+    _rebase(reporting_gru_preprocessor, data_dir)
+    reporting_gru_preprocessor.main()
+
+
+def bench_windowing(data_dir):
+    from instrumentation import step, rows
+    from data_preproc import SEQ_LEN, create_sequence_windows
+
+    df = _scaled_ready(data_dir)
+    step("windows")
+    X_seq, _ = create_sequence_windows(df, seq_len=SEQ_LEN)
+    rows(len(X_seq))
+
+
+def bench_inference(data_dir):
+    try:
+        from tensorflow.keras.models import load_model
+    except ImportError:
+        raise StageSkipped("tensorflow not installed")
+    from instrumentation import step
+    from data_preproc import SEQ_LEN, DEFAULT_FEATURES, TARGET_COL, create_sequence_windows_from_array
+
+    step("load_model")
+    model = load_model(os.path.join(MODEL_DIR, "gru_best.h5"), compile=False)
+    df = _scaled_ready(data_dir)
+
+    step("windows")
+    arr = df[DEFAULT_FEATURES + [TARGET_COL]].to_numpy(dtype=np.float32)
+    X_seq, _ = create_sequence_windows_from_array(arr, SEQ_LEN)
+
+    step("inference", rows=len(X_seq))
+    model.predict(X_seq, batch_size=1024, verbose=0)
+
+
+def bench_savings(data_dir):
+    import savings_engine
+
+    _rebase(savings_engine, data_dir)
+    savings_engine.run(savings_engine.INPUT_CSV, legacy=True, csv=True)
+
+
+def bench_dashboard_load(data_dir):
+    sys.path.insert(0, DASHBOARD_DIR)
+    import data_access
+    from instrumentation import step, rows
+    from rollup_cube import RollupCube
+
+    data_access.DATA_DIR = data_dir
+    step("read_datasets")
+    frames = data_access.read_many({name: None for name in data_access.DATASETS})
+    rows(sum(len(df) for df in frames.values()))
+    step("load_cube")
+    RollupCube.load(data_access.source_path("cube"))
+
+
+BENCHES = {
+    "preprocess": bench_preprocess,
+    "features": bench_features,
+    "windowing": bench_windowing,
+    "inference": bench_inference,
+    "savings": bench_savings,
+    "dashboard_load": bench_dashboard_load,
+}
+
+
+def run_child(stage_name, data_dir):
+    """Run one stage on one meter in this process; print a JSON result line."""
+    import resource
+    import instrumentation
+
+    body = instrumentation.stage(stage_name)(BENCHES[stage_name])
+    result = {}
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet):
+            body(data_dir)
+    except StageSkipped as exc:
+        result["skipped"] = str(exc)
+    result["seconds"] = time.perf_counter() - start
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps(result))
+
+
+# -------------------------------------------------
+# ORCHESTRATION
+# -------------------------------------------------
+def scale_key(years, meters, baseline_years):
+    return f"{years:g}y_{meters}m_{baseline_years:g}by"
+
+
+def prepare_data(years, meters, baseline_years, seed, regenerate=False):
+    """Generate (or reuse) the synthetic meters for this scale."""
+    import synthetic_data
+
+    data_root = os.path.join(DATA_ROOT, f"{scale_key(years, meters, baseline_years)}_s{seed}")
+    meta_path = os.path.join(data_root, "meta.json")
+    if not regenerate and os.path.exists(meta_path):
+        with open(meta_path) as fh:
+            return json.load(fh)
+
+    print(f"🔹 Generating synthetic data: {meters} meter(s) x {years:g} year(s)...")
+    counts = synthetic_data.generate(data_root, years, meters, baseline_years, seed)
+    meta = {
+        "meter_dirs": synthetic_data.meter_dirs(data_root, meters),
+        "intervals": sum(c["reporting"] for c in counts),
+    }
+    with open(meta_path, "w") as fh:
+        json.dump(meta, fh)
+    return meta
+
+
+def _step_seconds(log_path):
+    if not os.path.exists(log_path):
+        return {}
+    import instrumentation
+
+    steps = {}
+    for e in instrumentation.read_events(log_path):
+        if e.get("event") == "span" and e["path"] != "stage":
+            key = e["path"].split("/", 1)[1]
+            steps[key] = steps.get(key, 0.0) + e["seconds"]
+    return steps
+
+
+def run_stage(stage_name, meter_dirs, log_dir, extra_env):
+    """One pass of a stage over every meter (a fresh process per meter)."""
+    total = {"seconds": 0.0, "peak_rss_mb": 0.0, "steps": {}, "heap_peak_mb": None}
+    for i, data_dir in enumerate(meter_dirs):
+        log_path = os.path.join(log_dir, f"{stage_name}_{i:03d}.jsonl")
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        env = dict(os.environ, MPLBACKEND="Agg", MV_INSTRUMENT_LOG=log_path, **extra_env)
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", stage_name, data_dir],
+            cwd=BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return {"status": "failed", "error": proc.stderr[-2000:]}
+
+        child = json.loads(proc.stdout.strip().splitlines()[-1])
+        if "skipped" in child:
+            return {"status": "skipped", "reason": child["skipped"]}
+        total["seconds"] += child["seconds"]
+        total["peak_rss_mb"] = max(total["peak_rss_mb"], child["peak_rss_mb"])
+        for key, seconds in _step_seconds(log_path).items():
+            total["steps"][key] = total["steps"].get(key, 0.0) + seconds
+        if extra_env.get("MV_TRACE_MEMORY"):
+            import instrumentation
+
+            heap = [e.get("peak_traced_mb", 0) for e in instrumentation.read_events(log_path) if e["path"] == "stage"]
+            total["heap_peak_mb"] = max([total["heap_peak_mb"] or 0] + heap)
+
+    total["status"] = "ok"
+    return total
+
+
+def run_suite(years=1.0, meters=1, baseline_years=1.0, seed=0, repeat=DEFAULT_REPEAT,
+              stages=STAGES, regenerate=False, trace_memory=False):
+    meta = prepare_data(years, meters, baseline_years, seed, regenerate)
+    log_dir = tempfile.mkdtemp(prefix="mv_benchmark_logs_")
+    extra_env = {"MV_TRACE_MEMORY": "1"} if trace_memory else {}
+
+    results = {}
+    for stage_name in stages:
+        print(f"🔹 {stage_name}...")
+        runs = [run_stage(stage_name, meta["meter_dirs"], log_dir, extra_env) for _ in range(repeat)]
+        if any(r["status"] != "ok" for r in runs):
+            results[stage_name] = next(r for r in runs if r["status"] != "ok")
+            continue
+        best = min(runs, key=lambda r: r["seconds"])
+        best["peak_rss_mb"] = min(r["peak_rss_mb"] for r in runs)
+        best["intervals_per_s"] = round(meta["intervals"] / best["seconds"]) if best["seconds"] else None
+        best["seconds"] = round(best["seconds"], 4)
+        best["peak_rss_mb"] = round(best["peak_rss_mb"], 1)
+        best["steps"] = {k: round(v, 4) for k, v in best["steps"].items()}
+        if best["heap_peak_mb"] is None:
+            del best["heap_peak_mb"]
+        results[stage_name] = best
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "key": scale_key(years, meters, baseline_years),
+        "scale": {"years": years, "meters": meters, "baseline_years": baseline_years,
+                  "seed": seed, "intervals": meta["intervals"]},
+        "repeat": repeat,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count(), "pandas": pd.__version__, "numpy": np.__version__},
+        "stages": results,
+    }
+
+
+# -------------------------------------------------
+# BASELINE
+# -------------------------------------------------
+def load_baselines(path=BASELINE_JSON):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def save_baseline(result, path=BASELINE_JSON):
+    baselines = load_baselines(path)
+    baselines[result["key"]] = result
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as fh:
+        json.dump(baselines, fh, indent=2)
+
+
+def regressions(result, baseline, threshold=DEFAULT_THRESHOLD):
+    """[(stage, metric, baseline value, new value)] beyond the threshold."""
+    found = []
+    for name, new in result["stages"].items():
+        old = baseline["stages"].get(name)
+        if new["status"] != "ok" or not old or old["status"] != "ok":
+            continue
+        for metric, min_delta in (("seconds", MIN_DELTA_SECONDS), ("peak_rss_mb", MIN_DELTA_MB)):
+            if new[metric] > old[metric] * (1 + threshold) and new[metric] - old[metric] > min_delta:
+                found.append((name, metric, old[metric], new[metric]))
+    return found
+
+
+def print_report(result, baseline):
+    print(f"\n📊 Benchmark {result['key']}: {result['scale']['intervals']:,} reporting intervals, "
+          f"best of {result['repeat']}")
+    print(f"{'Stage':<16}{'Seconds':>10}{'Base':>10}{'Peak MB':>10}{'Base':>10}{'Intervals/s':>14}")
+    for name, r in result["stages"].items():
+        if r["status"] != "ok":
+            detail = r.get("reason") or r.get("error", "").strip().splitlines()[-1:]
+            print(f"{name:<16}{r['status']:>10}  {detail}")
+            continue
+        old = (baseline or {}).get("stages", {}).get(name, {})
+        base_s = f"{old['seconds']:.3f}" if old.get("status") == "ok" else "-"
+        base_mb = f"{old['peak_rss_mb']:.0f}" if old.get("status") == "ok" else "-"
+        print(f"{name:<16}{r['seconds']:>10.3f}{base_s:>10}{r['peak_rss_mb']:>10.0f}{base_mb:>10}"
+              f"{r['intervals_per_s'] or 0:>14,}")
+        for step_name, seconds in sorted(r["steps"].items(), key=lambda kv: -kv[1])[:4]:
+            print(f"   {step_name:<28}{seconds:>10.3f}")
+        outside = r["seconds"] - sum(r["steps"].values())
+        print(f"   {'(imports / outside steps)':<28}{outside:>10.3f}")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3])
+        return
+
+    parser = argparse.ArgumentParser(description="M&V chain benchmark on synthetic data")
+    parser.add_argument("--years", type=float, default=1.0, help="reporting-period length per meter")
+    parser.add_argument("--meters", type=int, default=1)
+    parser.add_argument("--baseline-years", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per stage; the best counts")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown / memory growth vs the baseline (0.2 = 20%%)")
+    parser.add_argument("--trace-memory", action="store_true", help="also record Python heap peaks (slower)")
+    parser.add_argument("--regenerate", action="store_true", help="regenerate the synthetic data")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--baseline", default=BASELINE_JSON, help="baseline file")
+    args = parser.parse_args()
+
+    result = run_suite(
+        args.years, args.meters, args.baseline_years, args.seed, args.repeat,
+        args.stages, args.regenerate, args.trace_memory,
+    )
+    baseline = load_baselines(args.baseline).get(result["key"])
+    print_report(result, baseline)
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    out_path = os.path.join(BENCH_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_{result['key']}.json")
+    with open(out_path, "w") as fh:
+        json.dump(result, fh, indent=2)
+    print(f"✅ Results saved to: {out_path}")
+
+    failed = [n for n, r in result["stages"].items() if r["status"] == "failed"]
+    for name in failed:
+        print(f"❌ Stage {name} failed")
+
+    if args.update_baseline:
+        save_baseline(result, args.baseline)
+        print(f"✅ Baseline for {result['key']} saved to: {args.baseline}")
+    elif baseline is None:
+        print(f"🔹 No baseline for {result['key']} yet (store one with --update-baseline)")
+    else:
+        found = regressions(result, baseline, args.threshold)
+        for name, metric, old, new in found:
+            print(f"❌ {name}: {metric} {old} → {new} (+{(new / old - 1) * 100:.0f}%, "
+                  f"threshold {args.threshold * 100:.0f}%)")
+        if not found:
+            print(f"✅ No stage regressed beyond {args.threshold * 100:.0f}% of the baseline")
+        failed += [name for name, *_ in found]
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# src/chart_pyramid.py
+"""
+Multi-resolution downsampling pyramid for dashboard time-series charts.
+
+Every plotted series is laid on a regular 30-min grid (aligned to
+midnight) and pre-aggregated into min / max / mean buckets at several
+resolutions (FACTORS x 30 min). For a requested date range the dashboard
+takes the finest level that fits in `max_points`, so each chart sends a
+bounded number of points whatever the history length. Power series are
+drawn as a min/max envelope so peaks (e.g. the monthly MD interval) stay
+visible at coarse levels.
+
+Output: data/Reporting_Chart_Pyramid.npz
+RUN:
+    python src/chart_pyramid.py             # build
+    python src/chart_pyramid.py --measure   # payload size / time vs full frames
+"""
+
+import argparse
+import io
+import os
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import schema
+from instrumentation import stage, step, rows
+
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+BASELINE_CSV = os.path.join(DATA_DIR, "PenangBaselineData.csv")
+INPUT_CSV = os.path.join(DATA_DIR, "Reporting_AdjustedBaseline_GRU.csv")
+PYRAMID_NPZ = os.path.join(DATA_DIR, "Reporting_Chart_Pyramid.npz")
+
+STEP = pd.Timedelta(minutes=30)
+FACTORS = (1, 4, 16, 48, 336)  # 30 min, 2 h, 8 h, 1 day, 1 week
+MAX_POINTS = 1500
+ECM_DATE = pd.Timestamp("2024-05-01")
+
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def timeline_frame(baseline_csv=BASELINE_CSV, input_csv=INPUT_CSV):
+    """Every series the dashboards plot, on one DateTime index."""
+    # Imported here: the dashboards only need the query API below
+    from savings_engine import compute_derived
+
+    base = schema.read_csv(baseline_csv, "baseline", usecols=["DateTime", "Load Consumption (kW)"])
+    base = base.sort_values("DateTime").set_index("DateTime")
+
+    rep = schema.read_csv(input_csv, "adjusted")
+    rep = rep.sort_values("DateTime").set_index("DateTime")
+    derived = compute_derived(rep)
+
+    baseline = base["Load Consumption (kW)"]
+    reporting = pd.DataFrame({
+        "Adjusted Baseline Power (kW)": rep["Adjusted Baseline Power (kW)"],
+        "Actual Power (kW)": rep["Actual Power (kW)"],
+        "Cumulative Savings Energy (kWh)": derived["Cumulative Savings Energy (kWh)"],
+        "C1 Cumulative Cost Savings (RM)": derived["Cumulative Cost Savings (RM)"],
+        "TOU Cumulative Cost Savings (RM)": derived["Cumulative TOU Cost Savings (RM)"],
+        "Cumulative CO2 Avoided (tonnes)": derived["Cumulative CO2 Avoided (tonnes)"],
+    })
+
+    # IPMVP Option C: baseline only before the ECM, reporting series only after
+    frame = pd.concat([
+        baseline[baseline.index < ECM_DATE].rename("Baseline Load (kW)"),
+        reporting[reporting.index >= ECM_DATE],
+    ], axis=1)
+    return frame[~frame.index.duplicated()]
+
+
+def _blocks(values, factor):
+    pad = (-len(values)) % factor
+    return np.concatenate([values, np.full(pad, np.nan, dtype=values.dtype)]).reshape(-1, factor)
+
+
+def build_pyramid(frame):
+    """frame: DateTime-indexed series. Returns a dict of arrays for np.savez."""
+    t0 = frame.index.min().floor("D")
+    grid = pd.date_range(t0, frame.index.max(), freq=STEP)
+    frame = frame.reindex(grid)
+
+    pyramid = {
+        "t0_ns": np.array(t0.value, dtype=np.int64),
+        "step_ns": np.array(STEP.value, dtype=np.int64),
+        "n": np.array(len(grid), dtype=np.int64),
+        "factors": np.array(FACTORS, dtype=np.int64),
+        "series": np.array(frame.columns, dtype=str),
+    }
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # all-NaN buckets
+        for i, col in enumerate(frame.columns):
+            values = frame[col].to_numpy(dtype=np.float32)
+            pyramid[f"s{i}_raw"] = values
+            for factor in FACTORS[1:]:
+                blocks = _blocks(values, factor)
+                pyramid[f"s{i}_f{factor}_min"] = np.nanmin(blocks, axis=1)
+                pyramid[f"s{i}_f{factor}_max"] = np.nanmax(blocks, axis=1)
+                pyramid[f"s{i}_f{factor}_mean"] = np.nanmean(blocks, axis=1)
+    return pyramid
+
+
+def save_pyramid(pyramid, path=PYRAMID_NPZ):
+    np.savez_compressed(path, **pyramid)
+
+
+# -------------------------------------------------
+# QUERY API
+# -------------------------------------------------
+class ChartPyramid:
+    def __init__(self, arrays):
+        self._a = arrays
+        self.t0 = int(arrays["t0_ns"])
+        self.step = int(arrays["step_ns"])
+        self.n = int(arrays["n"])
+        self.factors = [int(f) for f in arrays["factors"]]
+        self.series = {str(name): i for i, name in enumerate(arrays["series"])}
+
+    @classmethod
+    def load(cls, path=PYRAMID_NPZ):
+        with np.load(path, allow_pickle=False) as npz:
+            return cls({k: npz[k] for k in npz.files})
+
+    @property
+    def start(self):
+        return pd.Timestamp(self.t0)
+
+    @property
+    def end(self):
+        return pd.Timestamp(self.t0 + self.n * self.step)
+
+    def _slot(self, ts):
+        offset = pd.Timestamp(ts).value - self.t0
+        return int(min(max(-(-offset // self.step), 0), self.n))
+
+    def level_for(self, start, end, max_points=MAX_POINTS, envelope=True):
+        """Finest factor whose bucket count for [start, end) fits max_points."""
+        i, j = self._slot(start), self._slot(end)
+        for factor in self.factors:
+            buckets = -(-j // factor) - i // factor
+            points = buckets * (2 if envelope and factor > 1 else 1)
+            if points <= max_points:
+                return factor
+        return self.factors[-1]
+
+    def frame(self, columns, start=None, end=None, max_points=MAX_POINTS, envelope=True):
+        """
+        Chart-ready frame for [start, end) with at most ~max_points rows.
+        envelope=True: each bucket contributes its min and max (peaks kept);
+        envelope=False: bucket mean (smooth series such as cumulative totals).
+        """
+        start = self.start if start is None else start
+        end = self.end if end is None else end
+        factor = self.level_for(start, end, max_points, envelope)
+        i, j = self._slot(start), self._slot(end)
+
+        if factor == 1:
+            index = pd.DatetimeIndex(self.t0 + np.arange(i, j, dtype=np.int64) * self.step)
+            data = {c: self._a[f"s{self.series[c]}_raw"][i:j] for c in columns}
+        else:
+            bi, bj = i // factor, -(-j // factor)
+            width = factor * self.step
+            starts = self.t0 + np.arange(bi, bj, dtype=np.int64) * width
+            if envelope:
+                index = pd.DatetimeIndex(np.column_stack([starts, starts + width // 2]).ravel())
+                data = {
+                    c: np.column_stack([
+                        self._a[f"s{self.series[c]}_f{factor}_min"][bi:bj],
+                        self._a[f"s{self.series[c]}_f{factor}_max"][bi:bj],
+                    ]).ravel()
+                    for c in columns
+                }
+            else:
+                index = pd.DatetimeIndex(starts)
+                data = {c: self._a[f"s{self.series[c]}_f{factor}_mean"][bi:bj] for c in columns}
+
+        return pd.DataFrame(data, index=index.rename("DateTime"))
+
+
+# -------------------------------------------------
+# MEASUREMENT
+# -------------------------------------------------
+def arrow_bytes(df):
+    """Size of the Arrow IPC stream Streamlit ships for a frame (index not included)."""
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.tell()
+
+
+def measure(pyramid):
+    full = timeline_frame()
+    power = ["Baseline Load (kW)", "Adjusted Baseline Power (kW)", "Actual Power (kW)"]
+    end = full.index.max() + STEP
+
+    print("📊 Chart payload: full 30-min frame vs pyramid level")
+    for label, days in (("full history", None), ("1 year", 365), ("1 month", 30), ("1 week", 7)):
+        start = full.index.min() if days is None else end - pd.Timedelta(days=days)
+
+        t = time.perf_counter()
+        raw = full.loc[start:end, power]
+        raw_bytes = arrow_bytes(raw.reset_index())
+        raw_time = time.perf_counter() - t
+
+        t = time.perf_counter()
+        small = pyramid.frame(power, start, end)
+        small_bytes = arrow_bytes(small.reset_index())
+        small_time = time.perf_counter() - t
+
+        print(
+            f"   {label:<13} raw {len(raw):>6,} rows {raw_bytes / 1e3:>8.1f} kB {raw_time * 1000:6.1f} ms"
+            f" | pyramid x{pyramid.level_for(start, end)} {len(small):>5,} rows"
+            f" {small_bytes / 1e3:>7.1f} kB {small_time * 1000:6.1f} ms"
+        )
+
+        # MD visibility: the envelope keeps the true peak
+        peak_raw = raw["Actual Power (kW)"].max()
+        peak_small = small["Actual Power (kW)"].max()
+        if np.isfinite(peak_raw) and not np.isclose(peak_raw, peak_small, rtol=1e-5):
+            print(f"   ❌ peak mismatch: {peak_raw} vs {peak_small}")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+@stage("chart_pyramid")
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard chart downsampling pyramid")
+    parser.add_argument("--measure", action="store_true", help="compare payloads with full frames")
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(ChartPyramid.load())
+        return
+
+    print("🔹 Loading baseline and reporting series...")
+    step("load_timeline")
+    frame = timeline_frame()
+    rows(len(frame))
+
+    print(f"🔹 Building pyramid for {frame.shape[1]} series, levels {FACTORS}...")
+    step("build", rows=len(frame))
+    pyramid = build_pyramid(frame)
+    step("write_npz")
+    save_pyramid(pyramid)
+    print(f"✅ Chart pyramid saved to: {PYRAMID_NPZ} ({os.path.getsize(PYRAMID_NPZ) / 1e6:.2f} MB)")
+
+
+if __name__ == "__main__":
+    main()
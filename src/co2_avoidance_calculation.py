@@ -13,7 +13,8 @@ Output:
 """
 
 import os
-import pandas as pd
+
+from instrumentation import stage, step, rows
 
 # -------------------------------------------------
 # PATH CONFIGURATION
@@ -32,32 +33,30 @@ GRID_EMISSION_FACTOR = 0.774  # kgCO2 per kWh (Malaysia)
 # -------------------------------------------------
 # MAIN PROCESS
 # -------------------------------------------------
+@stage("co2")
 def main():
+    # Imported here: savings_engine imports this module's constants
+    from savings_engine import LEGACY_CO2_CSV, legacy_frames, read_exact
+
     print("🔹 Loading savings data...")
-    df = pd.read_csv(INPUT_CSV, parse_dates=["DateTime"])
-    df = df.sort_values("DateTime").set_index("DateTime")
+    step("read_csv")
+    df = read_exact(INPUT_CSV)
+    rows(len(df))
 
+    # -------------------------------------------------
+    # CO2 avoidance (float64, as savings_engine --legacy):
+    # savings energy x emission factor, cumulative kg and tonnes
+    # -------------------------------------------------
     print("🔹 Calculating CO₂ avoidance...")
-
-    # Interval CO2 avoided (kg)
-    df["CO2 Avoided (kg)"] = (
-        df["Savings Energy (kWh)"] * GRID_EMISSION_FACTOR
-    )
-
-    # Cumulative CO2 avoided (kg)
-    df["Cumulative CO2 Avoided (kg)"] = (
-        df["CO2 Avoided (kg)"].cumsum()
-    )
-
-    # Optional: convert to tonnes
-    df["Cumulative CO2 Avoided (tonnes)"] = (
-        df["Cumulative CO2 Avoided (kg)"] / 1000
-    )
+    step("compute", rows=len(df))
+    df = legacy_frames(df)[LEGACY_CO2_CSV]
 
     # -------------------------------------------------
     # Save results
     # -------------------------------------------------
+    step("write_csv", rows=len(df))
     df.to_csv(OUTPUT_CSV)
+    step("report")
 
     print(f"✅ CO₂ avoidance file saved to: {OUTPUT_CSV}")
     print("\n🔍 Preview (head):")
@@ -12,7 +12,8 @@ Outputs:
 
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from instrumentation import stage, step, rows
 
 # -------------------------------------------------
 # PATH CONFIGURATION
@@ -36,14 +37,20 @@ def find_column(cols, keyword):
 # -------------------------------------------------
 # MAIN PROCESS
 # -------------------------------------------------
+@stage("compare")
 def main():
+    # Imported here: savings_engine imports the cost stages' constants
+    from savings_engine import read_exact
+
     print("🔹 Loading C1 and TOU savings data...")
+    step("read_csv")
 
-    df_c1 = pd.read_csv(C1_CSV, parse_dates=["DateTime"])
-    df_tou = pd.read_csv(TOU_CSV, parse_dates=["DateTime"])
+    # float64, as savings_engine --legacy writes the comparison
+    df_c1 = read_exact(C1_CSV)
+    df_tou = read_exact(TOU_CSV)
+    rows(len(df_c1) + len(df_tou))
 
-    df_c1 = df_c1.sort_values("DateTime").set_index("DateTime")
-    df_tou = df_tou.sort_values("DateTime").set_index("DateTime")
+    step("align")
 
     # Detect correct columns automatically
     c1_cum_col = find_column(df_c1.columns, "Cumulative Cost")
@@ -63,12 +70,16 @@ def main():
         "TOU Cumulative Cost Savings (RM)": df_tou[tou_cum_col].values
     }).set_index("DateTime")
 
+    step("write_csv", rows=len(df_compare))
     df_compare.to_csv(OUTPUT_CSV)
     print(f"✅ Comparison CSV saved to: {OUTPUT_CSV}")
 
     # -------------------------------------------------
     # PLOT
     # -------------------------------------------------
+    step("plot")
+    import matplotlib.pyplot as plt  # only the plot needs it
+
     plt.figure(figsize=(12, 5))
     plt.plot(
         df_compare.index,
@@ -5,6 +5,7 @@ Cost savings calculation based on TNB Commercial Tariff C1 (Flat Rate).
 Reference:
 - TNB Commercial Tariff C1
 - Energy charge: 36.50 sen/kWh = RM 0.365 / kWh
+  (config/tariffs.json, applied via tariff_engine)
 
 Input:
 - Reporting_Savings_GRU.csv
@@ -14,7 +15,8 @@ Output:
 """
 
 import os
-import pandas as pd
+
+from instrumentation import stage, step, rows
 
 # -------------------------------------------------
 # PATH CONFIGURATION
@@ -26,35 +28,37 @@ INPUT_CSV = os.path.join(DATA_DIR, "Reporting_Savings_GRU.csv")
 OUTPUT_CSV = os.path.join(DATA_DIR, "Reporting_CostSavings_C1.csv")
 
 # -------------------------------------------------
-# TNB TARIFF CONFIGURATION
+# TNB TARIFF CONFIGURATION (config/tariffs.json)
 # -------------------------------------------------
-TNB_C1_RATE_RM_PER_KWH = 0.365  # RM/kWh
+C1_TARIFF = "TNB_C1"
 
 # -------------------------------------------------
 # MAIN PROCESS
 # -------------------------------------------------
+@stage("cost_c1")
 def main():
-    print("🔹 Loading savings data...")
-    df = pd.read_csv(INPUT_CSV, parse_dates=["DateTime"])
-    df = df.sort_values("DateTime").set_index("DateTime")
+    # Imported here: savings_engine imports this module's constants
+    from savings_engine import LEGACY_C1_CSV, legacy_frames, read_exact
 
-    print("🔹 Applying TNB C1 tariff (RM 0.365 / kWh)...")
+    print("🔹 Loading savings data...")
+    step("read_csv")
+    df = read_exact(INPUT_CSV)
+    rows(len(df))
 
     # -------------------------------------------------
-    # Cost savings calculation
+    # Cost savings calculation (float64, as savings_engine --legacy):
+    # savings energy x C1 rate, cumulative cost savings, negative flag
     # -------------------------------------------------
-    df["Cost Savings (RM)"] = df["Savings Energy (kWh)"] * TNB_C1_RATE_RM_PER_KWH
-
-    # Cumulative cost savings
-    df["Cumulative Cost Savings (RM)"] = df["Cost Savings (RM)"].cumsum()
-
-    # Optional: flag negative cost savings
-    df["Negative Cost Savings Flag"] = (df["Cost Savings (RM)"] < 0).astype(int)
+    print("🔹 Applying TNB C1 tariff...")
+    step("compute", rows=len(df))
+    df = legacy_frames(df)[LEGACY_C1_CSV]
 
     # -------------------------------------------------
     # Save results
     # -------------------------------------------------
+    step("write_csv", rows=len(df))
     df.to_csv(OUTPUT_CSV)
+    step("report")
 
     print(f"✅ Cost savings file saved to: {OUTPUT_CSV}")
     print("\n🔍 Preview (head):")
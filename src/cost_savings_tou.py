@@ -3,6 +3,9 @@
 Time-of-Use (TOU) cost savings calculation
 based on TNB Commercial C1 MV ETOU (energy charge only).
 
+Periods and rates come from config/tariffs.json via tariff_engine
+(weekday schedule, weekends, public holidays, effective dates).
+
 Input:
 - Reporting_Savings_GRU.csv
 
@@ -11,7 +14,8 @@ Output:
 """
 
 import os
-import pandas as pd
+
+from instrumentation import stage, step, rows
 
 # -------------------------------------------------
 # PATH CONFIGURATION
@@ -23,61 +27,38 @@ INPUT_CSV = os.path.join(DATA_DIR, "Reporting_Savings_GRU.csv")
 OUTPUT_CSV = os.path.join(DATA_DIR, "Reporting_CostSavings_TOU.csv")
 
 # -------------------------------------------------
-# TNB TOU ENERGY RATES (RM/kWh)
-# -------------------------------------------------
-TOU_RATES = {
-    "peak": 0.584,
-    "mid": 0.357,
-    "offpeak": 0.281,
-}
-
-# -------------------------------------------------
-# TOU PERIOD CLASSIFICATION
+# TNB TOU TARIFF (config/tariffs.json)
 # -------------------------------------------------
-def classify_tou_period(timestamp):
-    hour = timestamp.hour
-
-    if 10 <= hour < 14:
-        return "peak"
-    elif 8 <= hour < 10 or 14 <= hour < 22:
-        return "mid"
-    else:
-        return "offpeak"
+TOU_TARIFF = "TNB_C1_MV_ETOU"
 
 # -------------------------------------------------
 # MAIN PROCESS
 # -------------------------------------------------
+@stage("cost_tou")
 def main():
-    print("🔹 Loading savings data...")
-    df = pd.read_csv(INPUT_CSV, parse_dates=["DateTime"])
-    df = df.sort_values("DateTime").set_index("DateTime")
-
-    print("🔹 Classifying TOU periods...")
-    df["TOU Period"] = df.index.map(classify_tou_period)
+    # Imported here: savings_engine imports this module's constants
+    from savings_engine import LEGACY_TOU_CSV, legacy_frames, read_exact
 
-    print("🔹 Applying TOU energy rates...")
-    df["TOU Rate (RM/kWh)"] = df["TOU Period"].map(TOU_RATES)
+    print("🔹 Loading savings data...")
+    step("read_csv")
+    df = read_exact(INPUT_CSV)
+    rows(len(df))
 
     # -------------------------------------------------
-    # TOU cost savings calculation
+    # TOU cost savings calculation (float64, as savings_engine --legacy):
+    # TOU period and rate per interval, savings energy x rate,
+    # cumulative TOU cost savings, negative flag
     # -------------------------------------------------
-    df["TOU Cost Savings (RM)"] = (
-        df["Savings Energy (kWh)"] * df["TOU Rate (RM/kWh)"]
-    )
-
-    df["Cumulative TOU Cost Savings (RM)"] = (
-        df["TOU Cost Savings (RM)"].cumsum()
-    )
-
-    # Optional: flag negative TOU savings
-    df["Negative TOU Savings Flag"] = (
-        df["TOU Cost Savings (RM)"] < 0
-    ).astype(int)
+    print("🔹 Classifying TOU periods and applying TOU energy rates...")
+    step("compute", rows=len(df))
+    df = legacy_frames(df)[LEGACY_TOU_CSV]
 
     # -------------------------------------------------
     # Save results
     # -------------------------------------------------
+    step("write_csv", rows=len(df))
     df.to_csv(OUTPUT_CSV)
+    step("report")
 
     print(f"✅ TOU cost savings file saved to: {OUTPUT_CSV}")
     print("\n🔍 Preview (head):")
@@ -2,8 +2,10 @@
 import os
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
-import joblib
+
+# sklearn and joblib are imported inside the scaler helpers: the windowing
+# helpers and constants here are also used on paths that never touch a
+# scaler, and those imports cost over a second at startup.
 
 # ---------------------------------------------------------
 # PATH SETUP (works for Run Button & Terminal)
@@ -11,8 +13,19 @@ import joblib
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 MODEL_DIR = os.path.join(BASE_DIR, "models")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+BASELINE_CSV = os.path.join(DATA_DIR, "PenangBaselineData.csv")
+X_SCALER_PATH = os.path.join(MODEL_DIR, "x_scaler.save")
+Y_SCALER_PATH = os.path.join(MODEL_DIR, "y_scaler.save")
+
+# Scaled feature matrix (DEFAULT_FEATURES + TARGET_COL), float32, row-major
+SCALED_MEMMAP = os.path.join(CACHE_DIR, "baseline_scaled.f32")
+SCALED_INDEX = os.path.join(CACHE_DIR, "baseline_scaled_index.npy")
+
+CHUNK_ROWS = 50_000
+
 DEFAULT_FEATURES = [
     "Day",
     "Hour",
@@ -25,10 +38,19 @@ DEFAULT_FEATURES = [
     "Week Lagged Load"
 ]
 TARGET_COL = "Load Consumption (kW)"
+SEQ_LEN = 48  # 1 day sequence window
+
+# ---------------------------------------------------------
+# TRAIN / VAL / TEST SPLIT DATES
+# ---------------------------------------------------------
+TRAIN_END = "2024-02-29 23:30:00"
+VAL_START = "2024-03-01 00:00:00"
+VAL_END = "2024-03-31 23:30:00"
+TEST_START = "2024-04-01 00:00:00"
+TEST_END = "2024-04-30 23:30:00"
 
 def load_and_prepare():
-    path = os.path.join(DATA_DIR, "PenangBaselineData.csv")
-    df = pd.read_csv(path)
+    df = pd.read_csv(BASELINE_CSV)
 
     df["DateTime"] = pd.to_datetime(df["DateTime"])
     df = df.sort_values("DateTime").reset_index(drop=True)
@@ -38,13 +60,29 @@ def load_and_prepare():
 
 
 def train_val_test_split_by_dates(df):
-    train = df[: "2024-02-29 23:30:00"].copy()
-    val = df["2024-03-01 00:00:00" : "2024-03-31 23:30:00"].copy()
-    test = df["2024-04-01 00:00:00" : "2024-04-30 23:30:00"].copy()
+    train = df[:TRAIN_END].copy()
+    val = df[VAL_START:VAL_END].copy()
+    test = df[TEST_START:TEST_END].copy()
     return train, val, test
 
 
+def split_slices(index):
+    """Row slices of a sorted DatetimeIndex for the train/val/test split."""
+    def _slice(start, end):
+        lo = 0 if start is None else index.searchsorted(pd.Timestamp(start), side="left")
+        hi = index.searchsorted(pd.Timestamp(end), side="right")
+        return slice(lo, hi)
+
+    return {
+        "train": _slice(None, TRAIN_END),
+        "val": _slice(VAL_START, VAL_END),
+        "test": _slice(TEST_START, TEST_END),
+    }
+
+
 def fit_scalers(train_df):
+    from sklearn.preprocessing import MinMaxScaler
+
     X_train = train_df[DEFAULT_FEATURES].values.astype(float)
     y_train = train_df[[TARGET_COL]].values.astype(float)
 
@@ -54,14 +92,123 @@ def fit_scalers(train_df):
     x_scaler.fit(X_train)
     y_scaler.fit(y_train)
 
-    joblib.dump(x_scaler, os.path.join(MODEL_DIR, "x_scaler.save"))
-    joblib.dump(y_scaler, os.path.join(MODEL_DIR, "y_scaler.save"))
+    save_scalers(x_scaler, y_scaler)
 
     return x_scaler, y_scaler
 
 
+def save_scalers(x_scaler, y_scaler):
+    import joblib
+
+    joblib.dump(x_scaler, X_SCALER_PATH)
+    joblib.dump(y_scaler, Y_SCALER_PATH)
+
+
+def load_scalers():
+    import joblib
+
+    return joblib.load(X_SCALER_PATH), joblib.load(Y_SCALER_PATH)
+
+
+# ---------------------------------------------------------
+# STREAMING (CHUNKED) SCALING
+# ---------------------------------------------------------
+def iter_baseline_chunks(path=BASELINE_CSV, chunksize=CHUNK_ROWS):
+    """Yield the baseline CSV in chunks with DateTime parsed."""
+    usecols = ["DateTime"] + DEFAULT_FEATURES + [TARGET_COL]
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        chunk["DateTime"] = pd.to_datetime(chunk["DateTime"])
+        yield chunk
+
+
+def fit_scalers_streaming(path=BASELINE_CSV, chunksize=CHUNK_ROWS):
+    """
+    Fit the x/y MinMaxScalers on the training period without loading
+    the whole baseline. partial_fit keeps running min/max, so the saved
+    scalers are identical to fit_scalers() on the materialised frame.
+    """
+    from sklearn.preprocessing import MinMaxScaler
+
+    x_scaler = MinMaxScaler()
+    y_scaler = MinMaxScaler()
+    train_end = pd.Timestamp(TRAIN_END)
+
+    for chunk in iter_baseline_chunks(path, chunksize):
+        chunk = chunk[chunk["DateTime"] <= train_end]
+        if chunk.empty:
+            continue
+        x_scaler.partial_fit(chunk[DEFAULT_FEATURES].to_numpy(dtype=np.float64))
+        y_scaler.partial_fit(chunk[[TARGET_COL]].to_numpy(dtype=np.float64))
+
+    save_scalers(x_scaler, y_scaler)
+
+    return x_scaler, y_scaler
+
+
+def write_scaled_memmap(x_scaler, y_scaler, path=BASELINE_CSV, chunksize=CHUNK_ROWS):
+    """
+    Scale the baseline chunk by chunk and write it once to a float32
+    memory-mapped file (columns: DEFAULT_FEATURES + [TARGET_COL]).
+    The DateTime index is stored alongside as int64 nanoseconds.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    n_cols = len(DEFAULT_FEATURES) + 1
+    stamps = []
+
+    with open(SCALED_MEMMAP, "wb") as fh:
+        for chunk in iter_baseline_chunks(path, chunksize):
+            Xs = x_scaler.transform(chunk[DEFAULT_FEATURES].to_numpy(dtype=np.float64))
+            ys = y_scaler.transform(chunk[[TARGET_COL]].to_numpy(dtype=np.float64))
+            np.hstack([Xs, ys]).astype(np.float32).tofile(fh)
+            stamps.append(chunk["DateTime"].to_numpy(dtype="datetime64[ns]").view("i8"))
+
+    stamps = np.concatenate(stamps) if stamps else np.empty(0, dtype="i8")
+
+    # Source is normally sorted already; otherwise reorder the mapped
+    # rows in chunks so nothing is materialised in full.
+    if np.any(np.diff(stamps) < 0):
+        order = np.argsort(stamps, kind="stable")
+        src = np.memmap(SCALED_MEMMAP, dtype=np.float32, mode="r", shape=(len(stamps), n_cols))
+        tmp_path = SCALED_MEMMAP + ".tmp"
+        dst = np.memmap(tmp_path, dtype=np.float32, mode="w+", shape=src.shape)
+        for start in range(0, len(order), chunksize):
+            dst[start : start + chunksize] = src[order[start : start + chunksize]]
+        dst.flush()
+        del src, dst
+        os.replace(tmp_path, SCALED_MEMMAP)
+        stamps = stamps[order]
+
+    np.save(SCALED_INDEX, stamps)
+
+
+def load_scaled_memmap():
+    """Return (read-only float32 memmap, DatetimeIndex) written by write_scaled_memmap."""
+    stamps = np.load(SCALED_INDEX)
+    n_cols = len(DEFAULT_FEATURES) + 1
+    scaled = np.memmap(SCALED_MEMMAP, dtype=np.float32, mode="r", shape=(len(stamps), n_cols))
+    return scaled, pd.DatetimeIndex(stamps.view("datetime64[ns]"), name="DateTime")
+
+
+def prepare_scaled_baseline(fit=True):
+    """
+    Stream the baseline into the scaled memmap.
+    fit=True refits and saves the scalers (training);
+    fit=False reuses the saved scalers (evaluation).
+    """
+    if fit:
+        x_scaler, y_scaler = fit_scalers_streaming()
+    else:
+        x_scaler, y_scaler = load_scalers()
+
+    write_scaled_memmap(x_scaler, y_scaler)
+    scaled, index = load_scaled_memmap()
+
+    return scaled, index, x_scaler, y_scaler
+
+
 def transform_features(df, x_scaler, y_scaler):
-    X = df[DEFAULT_FEATURES].values.astype(float)
+    # MinMaxScaler keeps float32 input as float32
+    X = df[DEFAULT_FEATURES].to_numpy(dtype=np.float32)
     y = df[[TARGET_COL]].values.astype(float)
 
     Xs = x_scaler.transform(X)
@@ -73,13 +220,29 @@ def transform_features(df, x_scaler, y_scaler):
 def create_sequence_windows(df, seq_len=48):
     feature_cols = DEFAULT_FEATURES + [TARGET_COL]
 
-    arr = df[feature_cols].values.astype(float)
-    targets = df[TARGET_COL].values.astype(float)
+    # float32 windows: the model runs in float32 and the window copy is
+    # seq_len times the frame, so float64 here doubles the stage's peak
+    arr = df[feature_cols].to_numpy(dtype=np.float32)
+    targets = df[TARGET_COL].to_numpy(dtype=float)
+
+    X, _ = create_sequence_windows_from_array(arr, seq_len)
+
+    return np.ascontiguousarray(X), targets[seq_len:].reshape(-1, 1)
+
 
-    X, y = [], []
+def create_sequence_windows_from_array(arr, seq_len=48):
+    """
+    Sliding windows over a 2-D array whose last column is the target.
+    Returns zero-copy views, so a memmap input stays on disk until read.
+    """
+    if len(arr) <= seq_len:
+        return (
+            np.empty((0, seq_len, arr.shape[1]), dtype=arr.dtype),
+            np.empty((0, 1), dtype=arr.dtype),
+        )
 
-    for i in range(seq_len, len(arr)):
-        X.append(arr[i - seq_len : i, :])
-        y.append(targets[i])
+    windows = np.lib.stride_tricks.sliding_window_view(arr, seq_len, axis=0)[:-1]
+    X = windows.transpose(0, 2, 1)
+    y = arr[seq_len:, -1:]
 
-    return np.array(X), np.array(y).reshape(-1, 1)
\ No newline at end of file
+    return X, y
\ No newline at end of file
@@ -1,18 +1,19 @@
 # src/evaluate.py
+"""
+RUN: python src/evaluate.py [--model ann|seq|all]
+
+TensorFlow and matplotlib are imported inside the evaluators, so importing
+this module (e.g. for segment_groups) stays cheap.
+"""
+import argparse
 import os
-import joblib
-import matplotlib.pyplot as plt
-from tensorflow.keras.models import load_model
-
-from data_preproc import (
-    load_and_prepare,
-    train_val_test_split_by_dates,
-    transform_features,
-    create_sequence_windows,
-    DEFAULT_FEATURES,
-    TARGET_COL
-)
-from utils import compute_metrics
+import numpy as np
+
+from data_preproc import SEQ_LEN, DEFAULT_FEATURES
+from snapshots import load_snapshot
+from utils import MetricsAccumulator, compute_metrics
+from cost_savings_tou import TOU_TARIFF
+from tariff_engine import get_tariff
 
 # ---------------------------------------------------------
 # PATH SETUP
@@ -23,21 +24,32 @@ MODEL_DIR = os.path.join(BASE_DIR, "models")
 # ---------------------------------------------------------
 
 
+def segment_groups(index, features):
+    """Month, semester vs break and TOU period labels for grouped metrics."""
+    semester_break = features[:, DEFAULT_FEATURES.index("Semester Break")] > 0.5
+    period, _ = get_tariff(TOU_TARIFF).assign(index)
+    return {
+        "month": index.to_period("M").astype(str),
+        "semester": np.where(semester_break, "break", "semester"),
+        "tou_period": np.asarray(period),
+    }
+
+
 def eval_ann():
+    import matplotlib.pyplot as plt
+    from tensorflow.keras.models import load_model
+
     print("\n==============================")
     print(" Evaluating ANN Model")
     print("==============================")
 
-    # Load dataframe
-    df = load_and_prepare()
-    train, val, test = train_val_test_split_by_dates(df)
+    # Prepared test arrays (scaled with the saved scalers)
+    snap = load_snapshot(fit=False)
+    y_scaler = snap["y_scaler"]
+    test_index = snap["test_index"]
 
-    # Load scalers
-    x_scaler = joblib.load(os.path.join(MODEL_DIR, "x_scaler.save"))
-    y_scaler = joblib.load(os.path.join(MODEL_DIR, "y_scaler.save"))
-
-    # Transform test set
-    X_test, y_test = transform_features(test, x_scaler, y_scaler)
+    # Test set
+    X_test, y_test = snap["test_X"], snap["test_y"]
 
     # Load model
     model = load_model(os.path.join(MODEL_DIR, "ann_best.h5"), compile=False)
@@ -52,39 +64,26 @@ def eval_ann():
 
     # Plot
     plt.figure(figsize=(12, 4))
-    plt.plot(test.index, y_test_inv, label="Actual")
-    plt.plot(test.index, y_pred_inv, label="ANN Prediction", alpha=0.7)
+    plt.plot(test_index, y_test_inv, label="Actual")
+    plt.plot(test_index, y_pred_inv, label="ANN Prediction", alpha=0.7)
     plt.title("ANN — Actual vs Predicted")
     plt.legend()
     plt.show()
 
 def eval_seq():
+    import matplotlib.pyplot as plt
+    from tensorflow.keras.models import load_model
+
     print("\n==========================================")
     print(" Evaluating LSTM and GRU Sequence Models")
     print("==========================================")
 
-    df = load_and_prepare()
-    train, val, test = train_val_test_split_by_dates(df)
-
-    # Load scalers
-    x_scaler = joblib.load(os.path.join(MODEL_DIR, "x_scaler.save"))
-    y_scaler = joblib.load(os.path.join(MODEL_DIR, "y_scaler.save"))
-
-    # Scale full DF
-    full_features = x_scaler.transform(df[DEFAULT_FEATURES])
-    scaled_target = y_scaler.transform(df[[TARGET_COL]])
+    # Prepared test windows (scaled with the saved scalers)
+    snap = load_snapshot(fit=False)
+    y_scaler = snap["y_scaler"]
+    test_index = snap["test_index"]
 
-    df_scaled = df.copy()
-    df_scaled[DEFAULT_FEATURES] = full_features
-    df_scaled[TARGET_COL] = scaled_target
-
-    SEQ_LEN = 48
-
-    # Create test windows
-    X_test_seq, y_test_seq = create_sequence_windows(
-        df_scaled.loc[test.index.min():test.index.max()],
-        seq_len=SEQ_LEN
-    )
+    X_test_seq, y_test_seq = snap["test_Xseq"], snap["test_yseq"]
 
     # Load models
     lstm = load_model(os.path.join(MODEL_DIR, "lstm_best.h5"), compile=False)
@@ -99,26 +98,42 @@ def eval_seq():
     y_lstm_inv = y_scaler.inverse_transform(y_lstm)
     y_gru_inv = y_scaler.inverse_transform(y_gru)
 
-    # Metrics
-    print("LSTM metrics:", compute_metrics(y_test_inv, y_lstm_inv))
-    print("GRU metrics:", compute_metrics(y_test_inv, y_gru_inv))
+    # Metrics (overall + per segment, one pass each)
+    groups = segment_groups(test_index[SEQ_LEN:], snap["test_X"][SEQ_LEN:])
+    for name, y_pred_inv in (("LSTM", y_lstm_inv), ("GRU", y_gru_inv)):
+        acc = MetricsAccumulator().update(y_test_inv, y_pred_inv, groups)
+        print(f"{name} metrics:", acc.result())
+        for dim in groups:
+            print(acc.grouped(dim).round(3).to_string())
 
     # Plot comparison
     plt.figure(figsize=(12, 4))
-    plt.plot(test.index[SEQ_LEN:], y_test_inv, label="Actual")
-    plt.plot(test.index[SEQ_LEN:], y_lstm_inv, label="LSTM", alpha=0.7)
-    plt.plot(test.index[SEQ_LEN:], y_gru_inv, label="GRU", alpha=0.7)
+    plt.plot(test_index[SEQ_LEN:], y_test_inv, label="Actual")
+    plt.plot(test_index[SEQ_LEN:], y_lstm_inv, label="LSTM", alpha=0.7)
+    plt.plot(test_index[SEQ_LEN:], y_gru_inv, label="GRU", alpha=0.7)
     plt.title("Sequence Models — LSTM vs GRU vs Actual")
     plt.legend()
     plt.show()
 
 
-if __name__ == "__main__":
-    print("Running eval_ann()...")
-    eval_ann()
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the trained baseline models")
+    parser.add_argument("--model", choices=["ann", "seq", "all"], default="all")
+    args = parser.parse_args()
+
+    if args.model in ("ann", "all"):
+        print("Running eval_ann()...")
+        eval_ann()
 
-    print("Closing ANN plots...")
-    plt.close('all')
+        import matplotlib.pyplot as plt
 
-    print("Running eval_seq()...")
-    eval_seq()
+        print("Closing ANN plots...")
+        plt.close('all')
+
+    if args.model in ("seq", "all"):
+        print("Running eval_seq()...")
+        eval_seq()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,681 @@
+# src/ingest_service.py
+"""
+Live ingestion: new 30-min meter readings -> published savings in seconds.
+
+Readings in the ReportingPeriodData.csv layout (time, import_energy,
+export_energy, self_consume) come from:
+- a drop directory (data/incoming/): each *.csv is read once, then moved to
+  incoming/done/ (or incoming/failed/). Write under another name and
+  rename to *.csv when the file is complete.
+- a local socket (--port / --unix): newline-delimited rows in the same
+  column order; header lines are skipped. `send` streams a CSV to it.
+
+Each batch runs the batch stages' own functions: clean_readings ->
+build_features -> adjusted baseline (predict_frame) -> compute_derived
+(running totals carried over) -> MaximumDemandTracker. New rows are
+appended to the raw, clean, GRU-ready and adjusted CSVs, and to the
+opt-in savings_engine CSVs (derived, legacy per-stage) that exist. The MD
+state (and the MD CSV, if there is one) is rewritten, and
+Reporting_Live.json holds the latest totals and latency.
+The rollup cube, results store and chart pyramid are rebuilt in the
+background, at most once every --artifact-seconds.
+
+An interval is final once a valid reading follows it: until then a short
+gap may still be interpolated or become an outage. Intervals after the
+last valid reading wait for the next one.
+
+Backpressure: readings wait in a bounded queue. When it is full, socket
+clients are no longer read (TCP flow control pushes back on the sender)
+and the drop directory is not scanned. Catch-up: everything queued (up to
+--batch-max) is processed as one batch. End-to-end latency, from a
+reading being received to its interval being published, is recorded for
+every reading.
+
+Without TensorFlow, --baseline-csv takes the adjusted baseline from a
+precomputed file instead of the GRU (replays / benchmarks, e.g. with the
+stand-in written by synthetic_data.py).
+
+RUN (after one batch run of the pipeline):
+    python src/ingest_service.py serve --port 8765
+    python src/ingest_service.py send readings.csv --port 8765 --rate 50
+"""
+
+import argparse
+import asyncio
+import collections
+import io
+import json
+import os
+import shutil
+import signal
+import sys
+import time
+import traceback
+
+import numpy as np
+import pandas as pd
+
+import schema
+from instrumentation import span
+from reporting_preprocessing import RAW_REPORTING_CSV, OUTPUT_CSV as CLEAN_CSV, clean_readings, valid_readings
+from reporting_gru_preprocessor import BASELINE_CSV, OUTPUT_CSV as READY_CSV, WEEK_LAG, build_features
+from reporting_baseline_predictor_gru import OUTPUT_CSV as ADJUSTED_CSV, SEQ_LEN, TARGET_COL
+from savings_engine import (
+    DERIVED_CSV, MD_CSV, LEGACY_CSVS, INPUT_COLS, compute_derived, compute_monthly_md, legacy_frames, read_exact,
+    running_totals,
+)
+from md_savings_calculation import (
+    STATE_JSON, TOTAL_MD_CHARGE, BILLING_CYCLE_START_DAY, MD_WINDOW, AppendedSource, read_new_rows,
+)
+from md_engine import MaximumDemandTracker
+from rollup_cube import CUBE_NPZ, build_cube, save_cube, load_clean
+from results_store import STORE_DIR, write_results
+from chart_pyramid import PYRAMID_NPZ, timeline_frame, build_pyramid, save_pyramid
+
+# -------------------------------------------------
+# PATHS / SETTINGS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+LIVE_JSON = os.path.join(DATA_DIR, "Reporting_Live.json")
+
+RAW_COLS = ["import_energy", "export_energy", "self_consume"]
+DATASET_BY_FILE = {os.path.basename(path): name for name, (path, _, _) in schema.DATASETS.items()}
+
+QUEUE_SIZE = 20_000  # readings
+BATCH_MAX = 5_000  # readings per catch-up batch
+POLL_SECONDS = 0.5  # drop directory scan interval
+ARTIFACT_SECONDS = 60.0  # minimum gap between cube / store / pyramid rebuilds
+REPORT_SECONDS = 30.0
+LATENCY_WINDOW = 10_000  # recent readings kept for the latency percentiles
+
+Reading = collections.namedtuple("Reading", ["time", "import_energy", "export_energy", "self_consume", "received"])
+
+
+def _in_dir(path, data_dir):
+    return os.path.join(data_dir, os.path.basename(path))
+
+
+def _append_csv(path, df, index=True):
+    """Append rows in the column order of the file's header. Returns the bytes written."""
+    with open(path) as fh:
+        header = fh.readline().rstrip("\r\n").split(",")
+    frame = df.reset_index() if index else df
+    data = frame[header].to_csv(header=False, index=False, date_format=schema.DATE_FORMAT).encode()
+    with open(path, "ab") as fh:
+        fh.write(data)
+    return data
+
+
+def _flags_current(path, dataset):
+    """True if every flag column of the CSV holds 0/1, as the appends write them."""
+    with open(path) as fh:
+        header = fh.readline().rstrip("\r\n").split(",")
+    flags = [col for col, dtype in schema.SCHEMAS[dataset].items() if dtype == schema.FLAG and col in header]
+    if not flags:
+        return True
+    text = pd.read_csv(path, usecols=flags, dtype=str, keep_default_na=False)
+    return all(set(text[col].unique()) <= {"0", "1", "0.0", "1.0", ""} for col in flags)
+
+
+def _rewrite_csv(path, frame, index=True):
+    tmp = path + ".tmp"
+    frame.to_csv(tmp, index=index, date_format=schema.DATE_FORMAT)
+    os.replace(tmp, path)
+
+
+def _read_prefix(path, size):
+    """The first `size` bytes of a file that is only ever appended to."""
+    with open(path, "rb") as fh:
+        return io.BytesIO(fh.read(size))
+
+
+# -------------------------------------------------
+# ADJUSTED BASELINE SOURCES
+# -------------------------------------------------
+class GruBaseline:
+    """The trained GRU, as reporting_baseline_predictor_gru runs it."""
+
+    def __init__(self):
+        # Imported here: pulls in TensorFlow
+        from reporting_baseline_predictor_gru import load_predictor, predict_frame
+
+        self._predict = predict_frame
+        self._model = load_predictor()
+
+    def predict(self, ready):
+        """Adjusted baseline for ready's rows after the first SEQ_LEN."""
+        return self._predict(ready, *self._model)
+
+
+class ReplayBaseline:
+    """Adjusted baseline looked up in a precomputed file; actual power from the features."""
+
+    def __init__(self, path):
+        adjusted = schema.read_csv(path, "adjusted").set_index("DateTime")
+        self._baseline = adjusted["Adjusted Baseline Power (kW)"]
+        self._baseline = self._baseline[~self._baseline.index.duplicated()]
+
+    def predict(self, ready):
+        index = ready.index[SEQ_LEN:]
+        out = pd.DataFrame(
+            {
+                "Actual Power (kW)": ready[TARGET_COL].iloc[SEQ_LEN:],
+                "Adjusted Baseline Power (kW)": self._baseline.reindex(index),
+            },
+            index=index,
+        )
+        out.index.name = "DateTime"
+        return schema.apply(out, "adjusted")
+
+
+# -------------------------------------------------
+# INCREMENTAL CHAIN
+# -------------------------------------------------
+class LiveChain:
+    """
+    Incremental state of the batch chain: the raw readings not yet final,
+    the feature / window history, running totals and the MD tracker.
+    Built from the batch outputs, which must be in step.
+    """
+
+    def __init__(self, baseline, data_dir=DATA_DIR, md_state=STATE_JSON):
+        self.baseline = baseline
+        self.data_dir = data_dir
+        self.md_state = md_state
+        self.paths = {
+            name: _in_dir(path, data_dir)
+            for name, path in {
+                "raw": RAW_REPORTING_CSV, "clean": CLEAN_CSV, "ready": READY_CSV,
+                "adjusted": ADJUSTED_CSV, "derived": DERIVED_CSV, "md": MD_CSV,
+                "baseline": BASELINE_CSV, "live": LIVE_JSON, "cube": CUBE_NPZ,
+                "store": STORE_DIR, "pyramid": PYRAMID_NPZ,
+            }.items()
+        }
+        self.intervals_published = 0
+        self.latest = None  # last published interval, for Reporting_Live.json
+        self._bootstrap()
+
+    # -------------------------------------------------
+    def _bootstrap(self):
+        p = self.paths
+        missing = [p[k] for k in ("raw", "clean", "ready", "adjusted") if not os.path.exists(p[k])]
+        if missing:
+            raise SystemExit(f"❌ Run the batch pipeline first; missing: {', '.join(missing)}")
+
+        ends = {k: schema.last_time(p[k]) for k in ("clean", "ready", "adjusted")}
+        if len(set(ends.values())) != 1:
+            raise SystemExit(f"❌ Batch outputs are not in step ({ends}); rerun the pipeline first")
+        self.published_until = ends["clean"]
+        self._conform({"clean": "clean", "ready": "gru_ready"})
+
+        raw = schema.read_csv(p["raw"], "raw").sort_values("time").set_index("time")
+        raw = raw[~raw.index.duplicated(keep="last")]
+        self.last_raw = raw.index.max()
+        valid = valid_readings(raw)
+        anchor = valid[valid & (raw.index <= self.published_until)].index.max()
+        self.raw = raw.loc[anchor:, ["import_energy", "self_consume"]]
+
+        ready = schema.read_csv(p["ready"], "gru_ready").set_index("DateTime")
+        self.ready = ready.tail(WEEK_LAG)
+
+        adjusted = schema.read_csv(p["adjusted"], "adjusted").set_index("DateTime")
+        derived = compute_derived(adjusted)
+        self.totals = running_totals(derived)
+        # opt-in CSV outputs (savings_engine --csv) are kept up only if present
+        self.derived_csv = os.path.exists(p["derived"])
+        self.md_csv = os.path.exists(p["md"])
+        if self.derived_csv and (
+            schema.last_time(p["derived"]) != self.published_until
+            or not _flags_current(p["derived"], "derived")
+        ):
+            _rewrite_csv(p["derived"], derived)
+
+        # legacy per-stage CSVs are appended to only while they are in step;
+        # they keep float64 values and totals of their own
+        self.legacy = [
+            path for path in (_in_dir(csv, self.data_dir) for csv in LEGACY_CSVS)
+            if os.path.exists(path) and schema.last_time(path) == self.published_until
+        ]
+        if self.legacy:
+            exact = read_exact(p["adjusted"])
+            self.legacy_totals = running_totals(compute_derived(exact, exact=True))
+            frames = {_in_dir(path, self.data_dir): frame for path, frame in legacy_frames(exact).items()}
+            for path in self.legacy:
+                if not _flags_current(path, DATASET_BY_FILE[os.path.basename(path)]):
+                    print(f"🔹 Rewriting {os.path.basename(path)} in the current format")
+                    _rewrite_csv(path, frames[path])
+
+        self.tracker = MaximumDemandTracker.load(self.md_state, TOTAL_MD_CHARGE, BILLING_CYCLE_START_DAY, MD_WINDOW)
+        self.tracker.update(read_new_rows(p["adjusted"], self.tracker))
+        self.adjusted_source = AppendedSource(p["adjusted"])
+        self._write_md()
+
+        self.published_sizes = self._sizes()
+
+        # readings already in the raw file but not yet cleaned
+        if self.last_raw > self.published_until:
+            self.process([])
+
+    def _conform(self, datasets):
+        """
+        Rewrite in-step outputs written before the current schema (True/False
+        flags) in its format: the 0/1 rows appended to them would leave
+        columns that no longer parse.
+        """
+        for name, dataset in datasets.items():
+            path = self.paths[name]
+            if not _flags_current(path, dataset):
+                print(f"🔹 Rewriting {os.path.basename(path)} in the current schema format")
+                _rewrite_csv(path, schema.read_csv(path, dataset), index=False)
+
+    def _append_legacy(self, adjusted):
+        # float64 as read back from the CSV text, as savings_engine --legacy does
+        exact = read_exact(io.StringIO(adjusted.to_csv(date_format=schema.DATE_FORMAT)))
+        frames = legacy_frames(exact, self.legacy_totals)
+        self.legacy_totals = running_totals(compute_derived(exact, self.legacy_totals, exact=True), self.legacy_totals)
+        for path, frame in frames.items():
+            if _in_dir(path, self.data_dir) in self.legacy:
+                _append_csv(_in_dir(path, self.data_dir), frame)
+
+    def _write_md(self):
+        self.tracker.source = self.adjusted_source.state()
+        self.tracker.save(self.md_state)
+        if self.md_csv:
+            schema.apply(self.tracker.to_frame(), "md").to_csv(self.paths["md"], index=False)
+
+    # -------------------------------------------------
+    def process(self, readings):
+        """
+        Fold readings into the chain and publish every interval that became
+        final. Returns (published_until, readings accepted).
+        """
+        with span("batch", readings=len(readings)) as batch:
+            new = pd.DataFrame(readings, columns=Reading._fields).drop(columns="received")
+            new = schema.apply(new, "raw")
+            new = new.sort_values("time").drop_duplicates("time", keep="last").set_index("time")
+            late = new.index <= self.last_raw
+            batch.count("late_or_duplicate", int(late.sum()))
+            new = new[~late]
+
+            if len(new):
+                _append_csv(self.paths["raw"], new[RAW_COLS])
+                self.last_raw = new.index.max()
+
+            with span("clean"):
+                raw = pd.concat([self.raw, new[["import_energy", "self_consume"]]])
+                valid = valid_readings(raw)
+                if not valid.any():
+                    self.raw = raw
+                    return self.published_until, len(new)
+                last_valid = valid[valid].index.max()
+                self.raw = raw.loc[last_valid:]
+                clean = clean_readings(raw.loc[:last_valid]).set_index("DateTime")
+                clean = clean[clean.index > self.published_until]
+            if clean.empty:
+                return self.published_until, len(new)
+            batch.rows = len(clean)
+
+            with span("features", rows=len(clean)):
+                ready = build_features(self.ready, clean)
+
+            with span("predict", rows=len(ready)):
+                adjusted = self.baseline.predict(pd.concat([self.ready.tail(SEQ_LEN), ready]))
+
+            with span("savings", rows=len(adjusted)):
+                derived = compute_derived(adjusted, self.totals)
+                self.totals = running_totals(derived, self.totals)
+
+            with span("md", rows=len(adjusted)):
+                self.tracker.update(adjusted)
+
+            with span("publish", rows=len(clean)):
+                _append_csv(self.paths["clean"], clean)
+                _append_csv(self.paths["ready"], ready)
+                self.adjusted_source.append(_append_csv(self.paths["adjusted"], adjusted))
+                if self.derived_csv:
+                    _append_csv(self.paths["derived"], derived)
+                if self.legacy:
+                    self._append_legacy(adjusted)
+                self._write_md()
+            self.published_sizes = self._sizes()
+
+            self.ready = pd.concat([self.ready, ready]).tail(WEEK_LAG)
+            self.published_until = clean.index.max()
+            self.intervals_published += len(clean)
+            self.latest = pd.concat([adjusted[INPUT_COLS], derived], axis=1).iloc[-1]
+            return self.published_until, len(new)
+
+    # -------------------------------------------------
+    def write_live(self, stats):
+        """Latest interval, running totals and service stats -> Reporting_Live.json."""
+        latest = self.latest
+        doc = {
+            "published_until": self.published_until.isoformat(),
+            "intervals_published": self.intervals_published,
+            "totals": self.totals,
+            "latest": None if latest is None else {
+                k: None if pd.isna(v) else getattr(v, "item", lambda: v)() for k, v in latest.items()
+            },
+            **stats,
+        }
+        tmp = self.paths["live"] + ".tmp"
+        with open(tmp, "w") as fh:
+            json.dump(doc, fh, indent=2, default=str)
+        os.replace(tmp, self.paths["live"])
+
+    def _sizes(self):
+        return {k: os.path.getsize(self.paths[k]) for k in ("adjusted", "clean")}
+
+    def snapshot(self):
+        """
+        Sizes of the append-only inputs of the artifacts as of the last
+        publish: whole rows, with clean and adjusted in step, even while
+        process() is appending on another thread.
+        """
+        return self.published_sizes
+
+    def refresh_artifacts(self, sizes):
+        """Rebuild cube, store and pyramid from the file prefixes in `sizes` (thread-safe vs appends)."""
+        p = self.paths
+        adjusted = schema.read_csv(_read_prefix(p["adjusted"], sizes["adjusted"]), "adjusted")
+        adjusted = adjusted.sort_values("DateTime").set_index("DateTime")
+        clean = load_clean(_read_prefix(p["clean"], sizes["clean"]))
+        derived = compute_derived(adjusted)
+
+        save_cube(build_cube(pd.concat([adjusted[INPUT_COLS], derived], axis=1), clean), p["cube"])
+        write_results(adjusted, derived, compute_monthly_md(adjusted), clean, p["store"])
+        frame = timeline_frame(p["baseline"], _read_prefix(p["adjusted"], sizes["adjusted"]))
+        save_pyramid(build_pyramid(frame), p["pyramid"])
+
+
+# -------------------------------------------------
+# SERVICE
+# -------------------------------------------------
+def read_drop_file(path):
+    """A complete raw CSV from the drop directory; ValueError if any row is unusable."""
+    df = schema.read_csv(path, "raw")
+    if not pd.api.types.is_datetime64_any_dtype(df["time"]) or df["time"].isna().any():
+        raise ValueError("unparseable time values")
+    return df[["time"] + RAW_COLS]
+
+
+def _parse_line(line, received):
+    fields = line.strip().split(",")
+    if len(fields) != 4 or not fields[0] or fields[0] == "time":
+        return None
+    return Reading(pd.Timestamp(fields[0]), *map(float, fields[1:]), received)
+
+
+class IngestService:
+    def __init__(self, chain, queue_size=QUEUE_SIZE, batch_max=BATCH_MAX, artifact_seconds=ARTIFACT_SECONDS):
+        self.chain = chain
+        self.queue = asyncio.Queue(queue_size)
+        self.batch_max = batch_max
+        self.artifact_seconds = artifact_seconds
+
+        self.waiting = []  # (interval, received) of readings not yet published
+        self.latency = collections.deque(maxlen=LATENCY_WINDOW)
+        self.batches = 0
+        self.readings = 0
+        self.bad_lines = 0
+        self.busy = False
+        self.error = None
+        self.stop = asyncio.Event()
+        self.last_activity = time.monotonic()
+        self.artifacts_dirty = False
+        self._artifact_task = None
+        self._last_artifacts = 0.0
+
+    # ---- sources ----
+    async def put(self, reading):
+        self.last_activity = time.monotonic()
+        await self.queue.put(reading)  # blocks while the queue is full
+
+    async def handle_client(self, reader, writer):
+        try:
+            async for line in reader:
+                try:
+                    reading = _parse_line(line.decode(), time.perf_counter())
+                except ValueError:
+                    self.bad_lines += 1
+                    continue
+                if reading is not None:
+                    await self.put(reading)
+        finally:
+            writer.close()
+
+    async def watch_dir(self, path, poll=POLL_SECONDS):
+        done, failed = os.path.join(path, "done"), os.path.join(path, "failed")
+        for d in (path, done, failed):
+            os.makedirs(d, exist_ok=True)
+        while True:
+            for name in sorted(f for f in os.listdir(path) if f.endswith(".csv")):
+                src = os.path.join(path, name)
+                received = time.perf_counter()
+                try:
+                    df = read_drop_file(src)
+                except (ValueError, KeyError, pd.errors.ParserError) as exc:
+                    print(f"❌ {name}: {exc}", file=sys.stderr)
+                    shutil.move(src, os.path.join(failed, name))
+                    continue
+                for row in df.itertuples(index=False):
+                    await self.put(Reading(*row, received))
+                shutil.move(src, os.path.join(done, name))
+            await asyncio.sleep(poll)
+
+    # ---- processing ----
+    async def process_loop(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_max and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            self.waiting.extend((r.time, r.received) for r in batch)
+            self.busy = True
+            try:
+                published_until, _ = await asyncio.to_thread(self.chain.process, batch)
+            except Exception as exc:
+                # the output files may now be out of step: stop rather than carry on
+                traceback.print_exc()
+                self.error = exc
+                self.stop.set()
+                return
+            finally:
+                self.busy = False
+            now = time.perf_counter()
+
+            still = []
+            for stamp, received in self.waiting:
+                if stamp <= published_until:
+                    self.latency.append(now - received)
+                else:
+                    still.append((stamp, received))
+            self.waiting = still
+            self.batches += 1
+            self.readings += len(batch)
+            self.last_activity = time.monotonic()
+            self.artifacts_dirty = True
+
+            self.chain.write_live(self.stats())
+            self._maybe_refresh_artifacts()
+
+    def _maybe_refresh_artifacts(self):
+        running = self._artifact_task is not None and not self._artifact_task.done()
+        due = time.monotonic() - self._last_artifacts >= self.artifact_seconds
+        if self.artifacts_dirty and not running and due:
+            self.artifacts_dirty = False
+            self._last_artifacts = time.monotonic()
+            self._artifact_task = asyncio.create_task(
+                asyncio.to_thread(self.chain.refresh_artifacts, self.chain.snapshot())
+            )
+            self._artifact_task.add_done_callback(self._artifacts_done)
+
+    def _artifacts_done(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Artifact rebuild failed: {task.exception()!r}", file=sys.stderr)
+            self.artifacts_dirty = True
+
+    async def artifact_loop(self):
+        # picks up the last batch of a burst once the minimum gap has passed
+        while True:
+            await asyncio.sleep(1.0)
+            self._maybe_refresh_artifacts()
+
+    # ---- reporting ----
+    def stats(self):
+        lat = np.array(self.latency) * 1000
+        return {
+            "readings": self.readings,
+            "batches": self.batches,
+            "queue_depth": self.queue.qsize(),
+            "waiting_readings": len(self.waiting),
+            "bad_lines": self.bad_lines,
+            "latency_ms": None if not len(lat) else {
+                "count": len(lat),
+                "p50": round(float(np.percentile(lat, 50)), 1),
+                "p95": round(float(np.percentile(lat, 95)), 1),
+                "max": round(float(lat.max()), 1),
+            },
+        }
+
+    def report(self):
+        s = self.stats()
+        lat = s["latency_ms"] or {"p50": float("nan"), "p95": float("nan"), "max": float("nan")}
+        print(
+            f"📊 {s['readings']:,} readings in {s['batches']:,} batches, published to "
+            f"{self.chain.published_until} | latency p50 {lat['p50']:.0f} ms, p95 {lat['p95']:.0f} ms, "
+            f"max {lat['max']:.0f} ms | queue {s['queue_depth']:,}"
+        )
+
+    async def report_loop(self, every=REPORT_SECONDS):
+        seen = 0
+        while True:
+            await asyncio.sleep(every)
+            if self.readings != seen:
+                seen = self.readings
+                self.report()
+
+    async def idle_watch(self, seconds):
+        while True:
+            await asyncio.sleep(min(seconds, 1.0))
+            idle = time.monotonic() - self.last_activity
+            if idle >= seconds and self.queue.empty():
+                self.stop.set()
+                return
+
+    async def finish(self):
+        """Wait for the artifact rebuild in flight, then rebuild once more if needed."""
+        if self._artifact_task is not None:
+            await asyncio.gather(self._artifact_task, return_exceptions=True)
+        if self.artifacts_dirty:
+            await asyncio.to_thread(self.chain.refresh_artifacts, self.chain.snapshot())
+
+
+async def serve(args):
+    print("🔹 Loading chain state from the batch outputs...")
+    if args.baseline_csv:
+        baseline = ReplayBaseline(args.baseline_csv)
+    else:
+        try:
+            baseline = GruBaseline()
+        except ImportError as exc:
+            raise SystemExit(f"❌ GRU baseline unavailable ({exc}); pass --baseline-csv to replay a precomputed one")
+    chain = await asyncio.to_thread(LiveChain, baseline, args.data_dir, args.md_state)
+    print(f"✅ Published up to {chain.published_until}")
+
+    service = IngestService(chain, args.queue_size, args.batch_max, args.artifact_seconds)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, service.stop.set)
+
+    tasks = [
+        asyncio.create_task(service.process_loop()),
+        asyncio.create_task(service.artifact_loop()),
+        asyncio.create_task(service.report_loop()),
+        asyncio.create_task(service.watch_dir(args.incoming)),
+    ]
+    servers = []
+    if args.port:
+        servers.append(await asyncio.start_server(service.handle_client, "127.0.0.1", args.port))
+        print(f"🔹 Listening on 127.0.0.1:{args.port}")
+    if args.unix:
+        servers.append(await asyncio.start_unix_server(service.handle_client, args.unix))
+        print(f"🔹 Listening on {args.unix}")
+    print(f"🔹 Watching {args.incoming}")
+    if args.idle_exit:
+        tasks.append(asyncio.create_task(service.idle_watch(args.idle_exit)))
+
+    await service.stop.wait()
+    for server in servers:
+        server.close()
+    # drain what is queued and let the batch in flight finish
+    while service.error is None and (not service.queue.empty() or service.busy):
+        await asyncio.sleep(0.05)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    service.report()
+    if service.error is not None:
+        raise SystemExit(f"❌ Stopped on error; results published up to {chain.published_until}")
+    await service.finish()
+    print(f"✅ Stopped; results published up to {chain.published_until}")
+
+
+async def send(args):
+    """Stream a raw CSV to a running service, optionally paced."""
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", args.port)
+    df = pd.read_csv(args.csv, dtype=str)[["time"] + RAW_COLS]
+    start = time.perf_counter()
+    for i, line in enumerate(df.itertuples(index=False)):
+        writer.write((",".join(line) + "\n").encode())
+        await writer.drain()  # waits while the service applies backpressure
+        if args.rate:
+            delay = start + (i + 1) / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+    writer.close()
+    await writer.wait_closed()
+    print(f"✅ Sent {len(df):,} readings in {time.perf_counter() - start:.1f}s")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Live meter-reading ingestion service")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    srv = sub.add_parser("serve", help="run the service")
+    srv.add_argument("--data-dir", default=DATA_DIR)
+    srv.add_argument("--incoming", help="drop directory (default: <data-dir>/incoming)")
+    srv.add_argument("--port", type=int, help="listen on 127.0.0.1:PORT")
+    srv.add_argument("--unix", help="listen on a Unix socket")
+    srv.add_argument("--baseline-csv", help="replay the adjusted baseline from this file instead of the GRU")
+    srv.add_argument("--md-state", default=STATE_JSON)
+    srv.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    srv.add_argument("--batch-max", type=int, default=BATCH_MAX)
+    srv.add_argument("--artifact-seconds", type=float, default=ARTIFACT_SECONDS)
+    srv.add_argument("--idle-exit", type=float, default=0, help="stop after this many idle seconds (0 = never)")
+
+    snd = sub.add_parser("send", help="stream a raw CSV to a running service")
+    snd.add_argument("csv")
+    snd.add_argument("--port", type=int)
+    snd.add_argument("--unix")
+    snd.add_argument("--rate", type=float, default=0, help="readings per second (0 = as fast as possible)")
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        args.incoming = args.incoming or os.path.join(args.data_dir, "incoming")
+        asyncio.run(serve(args))
+    else:
+        if not (args.port or args.unix):
+            parser.error("send needs --port or --unix")
+        asyncio.run(send(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# src/instrumentation.py
+"""
+Shared instrumentation for pipeline entry points.
+
+- stage(name): wraps a script's main(); one "stage" event per run
+- span(name):  times a named step (CSV read, reindex, inference, write...)
+               with CPU time, rows and rows/s; spans nest
+- step(name):  like perf.mark in the dashboards: closes the previous step
+               and opens the next, so a long main() is split into steps
+               without re-indenting it (steps are sequential; use span()
+               for work nested inside a step)
+- rows(n), count(name, n): row count / free-form counters on the open step
+
+Events are JSON lines. Configuration comes from the environment so the
+pipeline can switch it on for every stage subprocess:
+
+    MV_INSTRUMENT_LOG   JSONL file to append to ("-" = stderr); unset = off
+    MV_TRACE_MEMORY=1   per-span Python heap peak via tracemalloc (slower)
+    MV_PROFILE          "cprofile" (.prof per stage) or "sample"
+                        (collapsed stacks per stage, flamegraph/speedscope)
+    MV_PROFILE_DIR      where profiles go (default: cache/profiles)
+    MV_RUN_ID           groups the events of one pipeline run
+
+RSS and the process high-water mark are recorded on every event; they
+cost nothing and need no flag.
+
+RUN (summarise a log):
+    python src/instrumentation.py cache/instrumentation/<run>.jsonl
+"""
+
+import argparse
+import collections
+import contextlib
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+
+# -------------------------------------------------
+# PATHS / SETTINGS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+LOG_DIR = os.path.join(CACHE_DIR, "instrumentation")
+DEFAULT_PROFILE_DIR = os.path.join(CACHE_DIR, "profiles")
+
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples
+
+_state = threading.local()
+
+
+def _log_target():
+    return os.environ.get("MV_INSTRUMENT_LOG")
+
+
+def enabled():
+    return bool(_log_target())
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _max_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def emit(event):
+    """Append one JSON event to the configured log."""
+    target = _log_target()
+    if not target:
+        return
+    event = {
+        "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "run_id": os.environ.get("MV_RUN_ID"),
+        "pid": os.getpid(),
+        "stage": getattr(_state, "stage", None),
+        **event,
+        "rss_mb": _rss_mb(),
+        "max_rss_mb": _max_rss_mb(),
+    }
+    line = json.dumps(event, default=str) + "\n"
+    if target == "-":
+        sys.stderr.write(line)
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+    with open(target, "a") as fh:  # small O_APPEND writes: safe across stage processes
+        fh.write(line)
+
+
+# -------------------------------------------------
+# SPANS
+# -------------------------------------------------
+class Span:
+    def __init__(self, name, parent, rows=None, fields=None):
+        self.name = name
+        self.path = f"{parent.path}/{name}" if parent else name
+        self.parent = parent
+        self.rows = rows
+        self.fields = dict(fields or {})
+        self.counters = collections.Counter()
+        self.peak_bytes = 0
+        self.step_cm = None  # set when opened by step()
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+
+def _stack():
+    if not hasattr(_state, "stack"):
+        _state.stack = []
+    return _state.stack
+
+
+@contextlib.contextmanager
+def span(name, rows=None, **fields):
+    """
+    Time a named step. Set `.rows` inside the block when the row count is
+    only known afterwards; extra keyword fields are logged as-is.
+    """
+    stack = _stack()
+    parent = stack[-1] if stack else None
+    current = Span(name, parent, rows, fields)
+
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        if parent is not None:
+            parent.peak_bytes = max(parent.peak_bytes, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+
+    stack.append(current)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield current
+    finally:
+        _close_step(current)
+        seconds = time.perf_counter() - wall
+        cpu_seconds = time.process_time() - cpu
+        stack.pop()
+
+        event = {"event": "span", "name": name, "path": current.path,
+                 "seconds": round(seconds, 4), "cpu_seconds": round(cpu_seconds, 4)}
+        if current.rows is not None:
+            event["rows"] = int(current.rows)
+            event["rows_per_s"] = round(current.rows / seconds) if seconds > 0 else None
+        if tracing:
+            current.peak_bytes = max(current.peak_bytes, tracemalloc.get_traced_memory()[1])
+            event["peak_traced_mb"] = round(current.peak_bytes / 1e6, 2)
+            if parent is not None:
+                parent.peak_bytes = max(parent.peak_bytes, current.peak_bytes)
+            tracemalloc.reset_peak()
+        if current.counters:
+            event["counters"] = dict(current.counters)
+        event.update(current.fields)
+        emit(event)
+
+
+def _close_step(parent):
+    """Close the step left open inside `parent`, if any."""
+    stack = _stack()
+    if stack and stack[-1] is not parent and stack[-1].step_cm is not None:
+        stack[-1].step_cm.__exit__(None, None, None)
+
+
+def step(name, rows=None, **fields):
+    """
+    Close the current step (if any) and start the next one. A no-op outside
+    a stage or span, so library code called from elsewhere can use it too.
+    """
+    stack = _stack()
+    if not stack:
+        return
+    if stack[-1].step_cm is not None:
+        stack[-1].step_cm.__exit__(None, None, None)
+    cm = span(name, rows, **fields)
+    cm.__enter__().step_cm = cm
+
+
+def rows(n):
+    """Row count of the innermost open span (rows/s is derived from it)."""
+    stack = _stack()
+    if stack:
+        stack[-1].rows = n
+
+
+def count(name, n=1):
+    """Add to a counter on the innermost open span."""
+    stack = _stack()
+    if stack:
+        stack[-1].count(name, n)
+
+
+# -------------------------------------------------
+# PROFILERS
+# -------------------------------------------------
+class StackSampler:
+    """Samples the calling thread's stack every `interval` seconds."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, path):
+        self._stop.set()
+        self._thread.join()
+        with open(path, "w") as fh:
+            for stack, n in self.samples.most_common():
+                fh.write(f"{stack} {n}\n")
+
+
+@contextlib.contextmanager
+def _profiled(name):
+    mode = os.environ.get("MV_PROFILE")
+    if not mode:
+        yield None
+        return
+
+    out_dir = os.environ.get("MV_PROFILE_DIR", DEFAULT_PROFILE_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    run_id = os.environ.get("MV_RUN_ID") or time.strftime("%Y%m%d-%H%M%S")
+
+    if mode == "cprofile":
+        import cProfile
+
+        path = os.path.join(out_dir, f"{run_id}_{name}.prof")
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield path
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+    elif mode == "sample":
+        path = os.path.join(out_dir, f"{run_id}_{name}.folded")
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            yield path
+        finally:
+            sampler.stop(path)
+    else:
+        raise ValueError(f"MV_PROFILE must be 'cprofile' or 'sample', not {mode!r}")
+
+
+# -------------------------------------------------
+# STAGES
+# -------------------------------------------------
+def stage(name):
+    """
+    Decorator for a pipeline entry point (usually main()):
+    one top-level span, optional heap tracing and an optional profile.
+    Called inside another stage (e.g. from a benchmark harness) it is a
+    plain call, so its steps land in the enclosing stage.
+    """
+    def wrap(fn):
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            if _stack():
+                return fn(*args, **kwargs)
+            _state.stage = name
+            trace = os.environ.get("MV_TRACE_MEMORY") == "1" and not tracemalloc.is_tracing()
+            if trace:
+                tracemalloc.start()
+            try:
+                with _profiled(name) as profile_path, span("stage", profile=profile_path):
+                    return fn(*args, **kwargs)
+            finally:
+                if trace:
+                    tracemalloc.stop()
+        return run
+    return wrap
+
+
+# -------------------------------------------------
+# SUMMARY
+# -------------------------------------------------
+def read_events(path):
+    with open(path) as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def summarize(events, top=8):
+    """Per-stage table: wall time, peak RSS and the slowest steps."""
+    by_stage = collections.defaultdict(list)
+    for e in events:
+        if e.get("event") == "span":
+            by_stage[e.get("stage")].append(e)
+
+    lines = []
+    for stage_name, spans in by_stage.items():
+        total = next((s for s in spans if s["path"] == "stage"), None)
+        head = f"🔹 {stage_name}"
+        if total:
+            head += f": {total['seconds']:.2f}s wall, {total['cpu_seconds']:.2f}s CPU, peak RSS {total['max_rss_mb']} MB"
+            if "peak_traced_mb" in total:
+                head += f", heap peak {total['peak_traced_mb']} MB"
+        lines.append(head)
+        steps = sorted((s for s in spans if s["path"] != "stage"), key=lambda s: -s["seconds"])
+        for s in steps[:top]:
+            extra = ""
+            if "rows" in s:
+                extra += f"  {s['rows']:,} rows ({s['rows_per_s'] or 0:,}/s)"
+            if "peak_traced_mb" in s:
+                extra += f"  heap {s['peak_traced_mb']} MB"
+            lines.append(f"   {s['path']:<40} {s['seconds']:8.3f}s{extra}")
+        if total and total.get("profile"):
+            lines.append(f"   profile → {total['profile']}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise an instrumentation log")
+    parser.add_argument("log", help="JSONL file written via MV_INSTRUMENT_LOG")
+    parser.add_argument("--top", type=int, default=8, help="slowest steps shown per stage")
+    args = parser.parse_args()
+
+    print(f"📊 Instrumentation summary: {args.log}")
+    print(summarize(read_events(args.log), args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# src/md_engine.py
+"""
+Incremental monthly maximum-demand (MD) engine.
+
+Keeps running per-billing-cycle maxima of actual and adjusted-baseline
+power (with the timestamp of each peak) and updates them in O(new
+intervals) as data arrives. Billing cycles start on a configurable day of
+the month (1 = calendar months) and only intervals inside the MD window
+(default 08:00-22:00, inclusive) are considered.
+
+The state is persisted as JSON so Reporting_MD_Savings.csv can be produced
+without rescanning history.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# DEFAULTS
+# -------------------------------------------------
+DEFAULT_CYCLE_START_DAY = 1
+DEFAULT_MD_WINDOW = ("08:00", "22:00")
+
+ACTUAL_COL = "Actual Power (kW)"
+BASELINE_COL = "Adjusted Baseline Power (kW)"
+
+
+def _group_max(codes, values, stamps):
+    """Max value (and its first timestamp) per code, ignoring NaN. Vectorised."""
+    valid = ~np.isnan(values)
+    codes, values, stamps = codes[valid], values[valid], stamps[valid]
+    if len(codes) == 0:
+        return codes, values, stamps
+
+    position = np.arange(len(codes))
+    order = np.lexsort((-position, values, codes))
+    last = np.r_[codes[order][1:] != codes[order][:-1], True]
+    pick = order[last]
+    return codes[pick], values[pick], stamps[pick]
+
+
+class MaximumDemandTracker:
+    def __init__(self, md_charge, cycle_start_day=DEFAULT_CYCLE_START_DAY,
+                 md_window=DEFAULT_MD_WINDOW):
+        if not 1 <= cycle_start_day <= 28:
+            raise ValueError("cycle_start_day must be between 1 and 28")
+
+        self.md_charge = md_charge
+        self.cycle_start_day = cycle_start_day
+        self.md_window = tuple(md_window)
+
+        self.reset()
+
+    def reset(self):
+        # cycle start (YYYY-MM-DD) -> peaks
+        self.cycles = {}
+        self.last_timestamp = None
+        self.rows_seen = 0
+        # Caller-managed bookkeeping about the consumed source (e.g. file offset)
+        self.source = {}
+
+    # -------------------------------------------------
+    @property
+    def config(self):
+        # MD charge is applied at output time, so it does not invalidate state
+        return {
+            "cycle_start_day": self.cycle_start_day,
+            "md_window": list(self.md_window),
+        }
+
+    def cycle_starts(self, index):
+        """Billing-cycle start date for each timestamp."""
+        offset = pd.Timedelta(days=self.cycle_start_day - 1)
+        month_start = (index - offset).to_period("M").to_timestamp()
+        return month_start + offset
+
+    def update(self, df):
+        """
+        Fold new intervals into the running maxima.
+        Rows at or before the last processed timestamp are ignored.
+        Returns the number of new intervals consumed.
+        """
+        if self.last_timestamp is not None:
+            df = df[df.index > self.last_timestamp]
+        if df.empty:
+            return 0
+
+        in_window = np.zeros(len(df), dtype=bool)
+        in_window[df.index.indexer_between_time(*self.md_window)] = True
+        peak = df[in_window]
+
+        if len(peak):
+            starts = self.cycle_starts(peak.index)
+            labels, codes = np.unique(starts.to_numpy(dtype="datetime64[ns]"), return_inverse=True)
+            stamps = peak.index.to_numpy(dtype="datetime64[ns]")
+
+            for key, col in (("actual", ACTUAL_COL), ("baseline", BASELINE_COL)):
+                g, values, at = _group_max(codes, peak[col].to_numpy(dtype=float), stamps)
+                for code, value, stamp in zip(g, values, at):
+                    cycle = pd.Timestamp(labels[code]).strftime("%Y-%m-%d")
+                    entry = self.cycles.setdefault(cycle, {})
+                    if entry.get(f"{key}_kw") is None or value > entry[f"{key}_kw"]:
+                        entry[f"{key}_kw"] = float(value)
+                        entry[f"{key}_time"] = pd.Timestamp(stamp).isoformat()
+
+        self.last_timestamp = df.index.max()
+        self.rows_seen += len(df)
+        return len(df)
+
+    # -------------------------------------------------
+    def to_frame(self):
+        """Monthly MD savings in the Reporting_MD_Savings.csv layout (+ peak times)."""
+        rows = []
+        for cycle in sorted(self.cycles):
+            entry = self.cycles[cycle]
+            label = cycle[:7] if self.cycle_start_day == 1 else cycle
+            rows.append({
+                "Month": label,
+                "Actual_MD_kW": entry.get("actual_kw", np.nan),
+                "Baseline_MD_kW": entry.get("baseline_kw", np.nan),
+                "Actual_MD_Time": entry.get("actual_time"),
+                "Baseline_MD_Time": entry.get("baseline_time"),
+            })
+
+        out = pd.DataFrame(rows, columns=[
+            "Month", "Actual_MD_kW", "Baseline_MD_kW", "Actual_MD_Time", "Baseline_MD_Time"
+        ])
+        out["MD Savings (kW)"] = out["Baseline_MD_kW"] - out["Actual_MD_kW"]
+        out["MD Cost Savings (RM)"] = out["MD Savings (kW)"] * self.md_charge
+
+        return out[[
+            "Month",
+            "Actual_MD_kW",
+            "Baseline_MD_kW",
+            "MD Savings (kW)",
+            "MD Cost Savings (RM)",
+            "Actual_MD_Time",
+            "Baseline_MD_Time",
+        ]]
+
+    # -------------------------------------------------
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as fh:
+            json.dump({
+                "config": self.config,
+                "last_timestamp": None if self.last_timestamp is None else self.last_timestamp.isoformat(),
+                "rows_seen": self.rows_seen,
+                "source": self.source,
+                "cycles": self.cycles,
+            }, fh, indent=2)
+
+    @classmethod
+    def load(cls, path, md_charge, cycle_start_day=DEFAULT_CYCLE_START_DAY,
+             md_window=DEFAULT_MD_WINDOW):
+        """
+        Restore the tracker from `path`. A fresh tracker is returned when the
+        file is missing or was written with a different configuration.
+        """
+        tracker = cls(md_charge, cycle_start_day, md_window)
+        if not os.path.exists(path):
+            return tracker
+
+        with open(path) as fh:
+            state = json.load(fh)
+        if state.get("config") != tracker.config:
+            return tracker
+
+        tracker.cycles = state["cycles"]
+        tracker.rows_seen = state.get("rows_seen", 0)
+        tracker.source = state.get("source", {})
+        if state.get("last_timestamp"):
+            tracker.last_timestamp = pd.Timestamp(state["last_timestamp"])
+        return tracker
@@ -1,61 +1,158 @@
-import pandas as pd
+# src/md_savings_calculation.py
+"""
+Monthly maximum-demand (MD) savings.
+
+Running per-billing-cycle maxima are kept in cache/md_state.json by
+md_engine, so each run only folds in intervals newer than the last one
+processed. Reporting_MD_Savings.csv is rebuilt from that state.
+
+RUN:
+    python src/md_savings_calculation.py
+    python src/md_savings_calculation.py --cycle-start-day 15 --window 08:00 22:00
+    python src/md_savings_calculation.py --rebuild
+"""
+
+import argparse
+import hashlib
+import io
 import os
 
+from md_engine import MaximumDemandTracker
+import schema
+from instrumentation import stage, step, rows, count
+
 # -------------------------------------------------
 # PATH CONFIG
 # -------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
 
 INPUT_CSV = os.path.join(DATA_DIR, "Reporting_AdjustedBaseline_GRU.csv")
 OUTPUT_CSV = os.path.join(DATA_DIR, "Reporting_MD_Savings.csv")
+STATE_JSON = os.path.join(CACHE_DIR, "md_state.json")
 
 # TNB MV charges (RM/kW/month)
 MD_CAPACITY_CHARGE = 29.43
 MD_NETWORK_CHARGE = 59.84
 TOTAL_MD_CHARGE = MD_CAPACITY_CHARGE + MD_NETWORK_CHARGE  # 89.27 RM/kW
 
+# Billing cycle & MD window (peak hours, inclusive)
+BILLING_CYCLE_START_DAY = 1
+MD_WINDOW = ("08:00", "22:00")
+
+# bytes before the consumed offset that are checked on resume
+TAIL_BYTES = 4096
+
+
+def _fingerprint(header, tail):
+    return hashlib.sha256(header + tail[-TAIL_BYTES:]).hexdigest()
+
+
+def source_state(path, offset=None):
+    """
+    Where a reader stands in `path`: the byte offset it has consumed up to
+    (default: the whole file) and a cheap fingerprint of that prefix, the
+    header line plus its last TAIL_BYTES. Constant cost whatever the
+    history length.
+    """
+    with open(path, "rb") as fh:
+        offset = os.fstat(fh.fileno()).st_size if offset is None else offset
+        header = fh.readline()
+        fh.seek(max(offset - TAIL_BYTES, 0))
+        tail = fh.read(min(offset, TAIL_BYTES))
+    return {"offset": offset, "fingerprint": _fingerprint(header, tail)}
+
+
+class AppendedSource:
+    """
+    source_state of a file this process appends to, kept up from the bytes
+    each append writes instead of rereading the file.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            self.header = fh.readline()
+            self.offset = fh.seek(0, os.SEEK_END)
+            fh.seek(max(self.offset - TAIL_BYTES, 0))
+            self.tail = fh.read()
+
+    def append(self, data):
+        self.offset += len(data)
+        self.tail = (self.tail + data)[-TAIL_BYTES:]
+
+    def state(self):
+        return {"offset": self.offset, "fingerprint": _fingerprint(self.header, self.tail)}
+
+
+def read_new_rows(path, tracker):
+    """
+    Read and parse only the bytes appended since the tracker's last run.
+    If the already-consumed prefix of the file changed (history rewritten:
+    smaller file, other header or other rows before the offset), the
+    tracker is reset and the whole file is parsed once. --rebuild covers a
+    rewrite that keeps the size and the last TAIL_BYTES.
+    """
+    offset = tracker.source.get("offset", 0)
+    resume = bool(offset) and os.path.getsize(path) >= offset and source_state(path, offset) == tracker.source
+
+    with open(path, "rb") as fh:
+        header = fh.readline()
+        if resume:
+            fh.seek(offset)
+        else:
+            if offset:
+                print("🔹 Input history changed, rebuilding MD state...")
+            tracker.reset()
+        body = fh.read()
+        end = fh.tell()
+
+    tracker.source = source_state(path, end)
+
+    df = schema.read_csv(io.BytesIO(header + body), "adjusted")
+    return df.sort_values("DateTime").set_index("DateTime")
+
+
 # -------------------------------------------------
 # MAIN PROCESS
 # -------------------------------------------------
+@stage("md")
 def main():
-    print("🔹 Loading adjusted baseline data...")
-    df = pd.read_csv(INPUT_CSV, parse_dates=["DateTime"])
-    df = df.sort_values("DateTime").set_index("DateTime")
-
-    # -------------------------------------------------
-    # Peak-hour filter (08:00 – 22:00)
-    # -------------------------------------------------
-    df_peak = df.between_time("08:00", "22:00")
+    parser = argparse.ArgumentParser(description="Monthly MD savings (incremental)")
+    parser.add_argument("--cycle-start-day", type=int, default=BILLING_CYCLE_START_DAY)
+    parser.add_argument("--window", nargs=2, default=list(MD_WINDOW), metavar=("START", "END"))
+    parser.add_argument("--rebuild", action="store_true", help="discard saved MD state")
+    args = parser.parse_args()
 
-    # -------------------------------------------------
-    # Monthly MD calculation
-    # -------------------------------------------------
-    df_peak["Month"] = df_peak.index.to_period("M")
-
-    monthly_md = df_peak.groupby("Month").agg(
-        Actual_MD_kW=("Actual Power (kW)", "max"),
-        Baseline_MD_kW=("Adjusted Baseline Power (kW)", "max"),
+    step("load_state")
+    tracker = MaximumDemandTracker.load(
+        STATE_JSON, TOTAL_MD_CHARGE, args.cycle_start_day, args.window
     )
+    if args.rebuild:
+        tracker = MaximumDemandTracker(TOTAL_MD_CHARGE, args.cycle_start_day, args.window)
+
+    print("🔹 Loading new adjusted baseline intervals...")
+    step("read_new_rows")
+    df = read_new_rows(INPUT_CSV, tracker)
+    rows(len(df))
 
     # -------------------------------------------------
-    # MD Savings
+    # Update running per-cycle maxima (O(new intervals))
     # -------------------------------------------------
-    monthly_md["MD Savings (kW)"] = (
-        monthly_md["Baseline_MD_kW"] - monthly_md["Actual_MD_kW"]
-    )
-
-    monthly_md["MD Cost Savings (RM)"] = (
-        monthly_md["MD Savings (kW)"] * TOTAL_MD_CHARGE
-    )
-
-    monthly_md = monthly_md.reset_index()
-    monthly_md["Month"] = monthly_md["Month"].astype(str)
+    step("update", rows=len(df))
+    added = tracker.update(df)
+    count("intervals_added", added)
+    tracker.save(STATE_JSON)
+    print(f"🔹 {added} new intervals folded into MD state")
 
     # -------------------------------------------------
     # SAVE OUTPUT
     # -------------------------------------------------
+    step("write_csv")
+    monthly_md = schema.apply(tracker.to_frame(), "md")
+    rows(len(monthly_md))
     monthly_md.to_csv(OUTPUT_CSV, index=False)
+    step("report")
 
     print("✅ Monthly MD savings saved to:", OUTPUT_CSV)
     print(monthly_md.head())
@@ -0,0 +1,516 @@
+# src/meter_fetcher.py
+"""
+Backfill raw 30-min meter readings from the metering platform's HTTP API.
+
+API (config/meter_api.json; mock_meter_api.py serves the same one):
+    GET {base_url}{readings_path}?start=<ISO>&end=<ISO>
+    -> CSV in the ReportingPeriodData.csv layout, start inclusive, end exclusive
+    "token_env" names an environment variable holding a bearer token.
+
+Each meter's range is split into `page_days` pages that are fetched in
+parallel over a pool of keep-alive connections:
+- max_connections      open connections = requests in flight
+- requests_per_second  token bucket shared by all requests (0 = off); a 429's
+                       Retry-After pauses the bucket for everyone
+- retries              connection errors, timeouts, malformed responses, 429
+                       and 5xx are retried with jittered exponential backoff
+                       from backoff_seconds; other statuses fail the page at
+                       once
+
+Pages are queued meter by meter, so each meter's store is written while
+the next meters are still being fetched. Readings are deduplicated and
+time-sorted, then appended to the meter's raw CSV ("store" template), or
+merged into it when the range overlaps what is already there. If a page
+fails, only the pages before it are stored, so a rerun without --start
+resumes from the gap.
+
+Without --start a meter resumes after its store's last reading; --end
+defaults to the start of the current interval.
+
+The merge rewrites the store, so do not run this against a raw file that
+ingest_service.py is appending to at the same time.
+
+RUN:
+    python src/meter_fetcher.py fetch --meters meter_000 meter_001 --start 2024-05-01
+    python src/meter_fetcher.py fetch --meters main --store data/ReportingPeriodData.csv
+    python src/meter_fetcher.py bench --meters 12 --days 365 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from urllib.parse import quote, urlencode, urlsplit
+
+import pandas as pd
+
+import schema
+from instrumentation import emit, span
+
+# -------------------------------------------------
+# PATHS / SETTINGS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(BASE_DIR, "config")
+API_CONFIG = os.path.join(CONFIG_DIR, "meter_api.json")
+BENCH_DIR = os.path.join(BASE_DIR, "cache", "benchmarks")
+
+STEP = pd.Timedelta(minutes=30)
+RAW_COLUMNS = [b"time", b"import_energy", b"export_energy", b"self_consume"]
+HEADER = b",".join(RAW_COLUMNS) + b"\n"
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_BACKOFF = 30.0  # seconds
+
+
+class FetchError(Exception):
+    """A page could not be fetched (non-retryable status or retries exhausted)."""
+
+
+class BadResponse(Exception):
+    """Malformed HTTP response (status line, framing or gzip body); retried on a new connection."""
+
+
+def load_api_config(path=API_CONFIG):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+# -------------------------------------------------
+# HTTP
+# -------------------------------------------------
+class HttpPool:
+    """Keep-alive HTTP/1.1 connections to one server, at most `size` open at a time."""
+
+    def __init__(self, base_url, size, timeout):
+        url = urlsplit(base_url)
+        self.ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self.host = url.hostname
+        self.port = url.port or (443 if self.ssl else 80)
+        self.host_header = url.netloc
+        self.base_path = url.path.rstrip("/")
+        self.timeout = timeout
+        self.opened = 0
+        self._idle = []
+        self._slots = asyncio.Semaphore(size)
+
+    async def get(self, target, headers=()):
+        """(status, headers, body) of one GET; `target` is the path + query."""
+        async with self._slots:
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await self._connect()
+            try:
+                status, resp_headers, body, keep = await asyncio.wait_for(
+                    self._exchange(conn, target, headers), self.timeout
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn[1].close()
+                if not reused:
+                    raise
+                # the server closed the idle connection: once more on a fresh one
+                conn = await self._connect()
+                try:
+                    status, resp_headers, body, keep = await asyncio.wait_for(
+                        self._exchange(conn, target, headers), self.timeout
+                    )
+                except BaseException:
+                    conn[1].close()
+                    raise
+            except BaseException:
+                conn[1].close()
+                raise
+            if keep:
+                self._idle.append(conn)
+            else:
+                conn[1].close()
+            return status, resp_headers, body
+
+    async def _connect(self):
+        conn = await asyncio.wait_for(asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+        self.opened += 1
+        return conn
+
+    async def _exchange(self, conn, target, headers):
+        reader, writer = conn
+        request = [f"GET {self.base_path}{target} HTTP/1.1", f"Host: {self.host_header}",
+                   "Accept-Encoding: gzip", "Connection: keep-alive", *headers]
+        writer.write(("\r\n".join(request) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by the server")
+        try:
+            return await self._read_response(reader, status_line)
+        except (ValueError, zlib.error) as exc:
+            raise BadResponse(f"{type(exc).__name__}: {exc}") from exc
+
+    async def _read_response(self, reader, status_line):
+        version, status = status_line.decode("latin-1").split(" ", 2)[:2]
+        status = int(status)
+        resp_headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            resp_headers[name.strip().lower()] = value.strip()
+
+        keep = version == "HTTP/1.1" and resp_headers.get("connection", "").lower() != "close"
+        if "chunked" in resp_headers.get("transfer-encoding", ""):
+            chunks = []
+            while size := int((await reader.readline()).split(b";")[0], 16):
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            while await reader.readline() not in (b"\r\n", b"\n", b""):  # trailers
+                pass
+            body = b"".join(chunks)
+        elif "content-length" in resp_headers:
+            body = await reader.readexactly(int(resp_headers["content-length"]))
+        else:
+            body, keep = await reader.read(), False
+
+        if resp_headers.get("content-encoding") == "gzip":
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        return status, resp_headers, body, keep
+
+    def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+class RateLimiter:
+    """Token bucket: `rate` requests per second, bursts up to one second's worth."""
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.burst = max(1.0, rate)
+        self._tokens = self.burst
+        self._last = time.monotonic()
+        self._hold_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def hold(self, seconds):
+        """Pause every request, e.g. for a 429's Retry-After."""
+        self._hold_until = max(self._hold_until, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self._lock:
+            while (wait := self._hold_until - time.monotonic()) > 0:
+                await asyncio.sleep(wait)
+            if not self.rate:
+                return
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# -------------------------------------------------
+# RAW STORE
+# -------------------------------------------------
+def store_path(template, meter):
+    return os.path.join(BASE_DIR, template.format(meter=meter))
+
+
+def append_readings(path, df):
+    """
+    Add raw readings to a meter's CSV, deduplicated and time-sorted.
+    Readings after the last stored one are appended; an overlapping range
+    is merged (fetched values win) and the file rewritten.
+    Returns (new readings, merged?).
+    """
+    df = df.dropna(subset=["time"]).sort_values("time").drop_duplicates("time", keep="last")
+    if df.empty:
+        return 0, False
+    if os.path.exists(path) and (last := schema.last_time(path)) is not None:
+        if df["time"].iloc[0] > last:
+            df.to_csv(path, mode="a", header=False, index=False, date_format=schema.DATE_FORMAT)
+            return len(df), False
+
+        existing = schema.read_csv(path, "raw")
+        merged = pd.concat([existing, df]).drop_duplicates("time", keep="last").sort_values("time")
+        tmp = path + ".tmp"
+        merged.to_csv(tmp, index=False, date_format=schema.DATE_FORMAT)
+        os.replace(tmp, path)
+        return len(merged) - len(existing), True
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_csv(path, index=False, date_format=schema.DATE_FORMAT)
+    return len(df), False
+
+
+def store_pages(path, bodies, meter):
+    """Parse the fetched page bodies (CSV without header) and store them."""
+    with span("store", meter=meter) as current:
+        df = schema.read_csv(io.BytesIO(HEADER + b"".join(bodies)), "raw")
+        current.rows = len(df)
+        return append_readings(path, df)
+
+
+def pages(start, end, page_days):
+    """[start, end) in page_days-long [page_start, page_end) pieces."""
+    edges = list(pd.date_range(start, end, freq=pd.Timedelta(days=page_days)))
+    if edges[-1] < end:
+        edges.append(end)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+# -------------------------------------------------
+# FETCHER
+# -------------------------------------------------
+class MeterFetcher:
+    def __init__(self, config):
+        self.config = config
+        self.pool = HttpPool(config["base_url"], config["max_connections"], config["timeout_seconds"])
+        self.limiter = RateLimiter(config["requests_per_second"])
+        token = os.environ.get(config["token_env"]) if config.get("token_env") else None
+        self.headers = [f"Authorization: Bearer {token}"] if token else []
+        self.stats = {"pages": 0, "requests": 0, "retries": 0, "failed_pages": 0, "bytes": 0, "readings": 0}
+
+    async def fetch_page(self, meter, start, end):
+        """CSV rows (header stripped) of one page."""
+        query = urlencode({"start": start.isoformat(), "end": end.isoformat()})
+        target = self.config["readings_path"].format(meter=quote(meter, safe="")) + "?" + query
+        retries, backoff = self.config["retries"], self.config["backoff_seconds"]
+
+        for attempt in range(retries + 1):
+            await self.limiter.acquire()
+            self.stats["requests"] += 1
+            delay = None
+            try:
+                status, headers, body = await self.pool.get(target, self.headers)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, BadResponse) as exc:
+                error = f"{type(exc).__name__}: {exc}"
+            else:
+                if status == 200:
+                    header, _, rows = body.partition(b"\n")
+                    if header.strip().split(b",") != RAW_COLUMNS:
+                        raise FetchError(f"{meter} {start:%Y-%m-%d}: unexpected columns {header[:200]!r}")
+                    self.stats["bytes"] += len(body)
+                    return rows
+                error = f"HTTP {status} {body[:200].decode(errors='replace').strip()}"
+                if status not in RETRY_STATUS:
+                    raise FetchError(f"{meter} {start:%Y-%m-%d}: {error}")
+                if headers.get("retry-after", "").isdigit():
+                    delay = float(headers["retry-after"])
+                    self.limiter.hold(delay)
+
+            if attempt < retries:
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay or min(MAX_BACKOFF, backoff * 2 ** attempt) * random.uniform(0.5, 1.5))
+        raise FetchError(f"{meter} {start:%Y-%m-%d}: gave up after {retries + 1} attempts ({error})")
+
+    async def backfill(self, ranges, template):
+        """
+        Fetch and store every meter's [start, end). ranges: {meter: (start, end)}.
+        Returns {meter: {"readings", "merged", "error"}}.
+        """
+        jobs = asyncio.Queue()
+        bodies, remaining, errors, writes, results = {}, {}, {}, [], {}
+        for meter, (start, end) in ranges.items():
+            meter_pages = pages(start, end, self.config["page_days"])
+            bodies[meter] = [None] * len(meter_pages)
+            remaining[meter] = len(meter_pages)
+            for i, (s, e) in enumerate(meter_pages):
+                jobs.put_nowait((meter, i, s, e))
+        self.stats["pages"] += jobs.qsize()
+
+        async def store(meter):
+            # pages up to the first failed one
+            ok = bodies[meter][:errors[meter][0]] if meter in errors else bodies[meter]
+            readings, merged = await asyncio.to_thread(store_pages, store_path(template, meter), ok, meter)
+            self.stats["readings"] += readings
+            results[meter] = {"readings": readings, "merged": merged,
+                              "error": errors[meter][1] if meter in errors else None}
+            status = "❌" if meter in errors else "✅"
+            print(f"{status} {meter}: +{readings:,} readings{' (merged)' if merged else ''}"
+                  f"{' - ' + errors[meter][1] if meter in errors else ''}")
+
+        async def worker():
+            while not jobs.empty():
+                meter, i, start, end = jobs.get_nowait()
+                try:
+                    bodies[meter][i] = await self.fetch_page(meter, start, end)
+                except FetchError as exc:
+                    self.stats["failed_pages"] += 1
+                    if meter not in errors or i < errors[meter][0]:
+                        errors[meter] = (i, str(exc))
+                remaining[meter] -= 1
+                if not remaining[meter]:
+                    writes.append(asyncio.create_task(store(meter)))
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.config["max_connections"])))
+            await asyncio.gather(*writes)
+        finally:
+            self.pool.close()
+        return results
+
+
+def resolve_ranges(meters, template, start=None, end=None):
+    """{meter: (start, end)}; without `start` each meter resumes after its stored readings."""
+    end = pd.Timestamp(end) if end else pd.Timestamp.now().floor(STEP)
+    ranges = {}
+    for meter in meters:
+        if start:
+            first = pd.Timestamp(start)
+        else:
+            path = store_path(template, meter)
+            last = schema.last_time(path) if os.path.exists(path) else None
+            if last is None:
+                raise SystemExit(f"❌ {meter}: no stored readings to resume from; pass --start")
+            first = last + STEP
+        if first < end:
+            ranges[meter] = (first, end)
+        else:
+            print(f"🔹 {meter}: up to date")
+    return ranges
+
+
+async def fetch(config, ranges, template):
+    fetcher = MeterFetcher(config)
+    start = time.perf_counter()
+    results = await fetcher.backfill(ranges, template)
+    stats = {**fetcher.stats, "connections": fetcher.pool.opened, "seconds": round(time.perf_counter() - start, 3)}
+    return results, stats
+
+
+# -------------------------------------------------
+# BENCHMARK
+# -------------------------------------------------
+def _start_mock(args):
+    """Run mock_meter_api.py in its own process; returns (process, base_url)."""
+    cmd = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_meter_api.py"),
+           "--port", str(args.port), "--meters", str(args.meters), "--years", str(math.ceil(args.days / 365)),
+           "--latency-ms", str(args.latency_ms), "--error-rate", str(args.error_rate)]
+    server = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    for line in server.stdout:
+        if line.startswith("✅"):
+            return server, f"http://127.0.0.1:{args.port}"
+    raise SystemExit("❌ Mock meter API did not start")
+
+
+def _check_store(path):
+    df = schema.read_csv(path, "raw")
+    return len(df), bool(df["time"].is_monotonic_increasing and df["time"].is_unique)
+
+
+def bench(args):
+    print(f"🔹 Benchmark: {args.meters} meter(s) x {args.days} days, "
+          f"{args.latency_ms:g} ms server latency, {args.error_rate:.0%} errors")
+    server, base_url = _start_mock(args)
+    start = pd.Timestamp("2024-05-01")
+    meters = [f"meter_{i:03d}" for i in range(args.meters)]
+    runs = []
+    try:
+        for concurrency in args.concurrency:
+            out_dir = tempfile.mkdtemp(prefix="mv_fetch_")
+            config = {**load_api_config(args.config), "base_url": base_url, "max_connections": concurrency,
+                      "requests_per_second": 0, "page_days": args.page_days}
+            template = os.path.join(out_dir, "{meter}", "ReportingPeriodData.csv")
+            ranges = {m: (start, start + pd.Timedelta(days=args.days)) for m in meters}
+            with contextlib.redirect_stdout(io.StringIO()):  # no per-meter lines
+                results, stats = asyncio.run(fetch(config, ranges, template))
+            checks = [_check_store(store_path(template, m)) for m in meters]
+            shutil.rmtree(out_dir)
+
+            stats.update(
+                concurrency=concurrency,
+                failed_meters=sum(r["error"] is not None for r in results.values()),
+                stored=sum(n for n, _ in checks),
+                sorted_unique=all(ok for _, ok in checks),
+                readings_per_s=round(stats["readings"] / stats["seconds"]),
+                mb_per_s=round(stats["bytes"] / 1e6 / stats["seconds"], 2),
+            )
+            runs.append(stats)
+            print(f"📊 {concurrency:>3} connections: {stats['seconds']:7.2f}s  {stats['requests']:>5,} requests "
+                  f"({stats['retries']} retries)  {stats['readings_per_s']:>9,} readings/s  "
+                  f"{stats['mb_per_s']:6.2f} MB/s  sorted+unique={stats['sorted_unique']}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    base = runs[0]["seconds"]
+    for run in runs:
+        run["speedup"] = round(base / run["seconds"], 2)
+    print("✅ Speed-up vs " + f"{runs[0]['concurrency']} connection(s): "
+          + ", ".join(f"{r['concurrency']} -> {r['speedup']}x" for r in runs[1:]))
+
+    result = {"meters": args.meters, "days": args.days, "page_days": args.page_days,
+              "latency_ms": args.latency_ms, "error_rate": args.error_rate, "runs": runs}
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    out_path = os.path.join(BENCH_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}_fetcher.json")
+    with open(out_path, "w") as fh:
+        json.dump(result, fh, indent=2)
+    print(f"✅ Results saved to: {out_path}")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Fetch raw meter readings from the metering API")
+    parser.add_argument("--config", default=API_CONFIG)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    fet = sub.add_parser("fetch", help="backfill / update raw meter stores")
+    fet.add_argument("--meters", nargs="+", help="meter ids (default: the config's)")
+    fet.add_argument("--start", help="first interval (default: after each store's last reading)")
+    fet.add_argument("--end", help="end, exclusive (default: start of the current interval)")
+    fet.add_argument("--store", help="raw CSV path template with {meter}, relative to the repo")
+    fet.add_argument("--base-url")
+    fet.add_argument("--concurrency", type=int, help="max connections / requests in flight")
+    fet.add_argument("--rate", type=float, help="requests per second (0 = unlimited)")
+    fet.add_argument("--page-days", type=float)
+    fet.add_argument("--retries", type=int)
+
+    ben = sub.add_parser("bench", help="throughput against a local mock API")
+    ben.add_argument("--meters", type=int, default=12)
+    ben.add_argument("--days", type=int, default=365)
+    ben.add_argument("--page-days", type=float, default=7)
+    ben.add_argument("--latency-ms", type=float, default=50.0)
+    ben.add_argument("--error-rate", type=float, default=0.01)
+    ben.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    ben.add_argument("--port", type=int, default=8781)
+
+    args = parser.parse_args()
+    if args.command == "bench":
+        bench(args)
+        return
+
+    config = load_api_config(args.config)
+    overrides = {"base_url": args.base_url, "max_connections": args.concurrency, "requests_per_second": args.rate,
+                 "page_days": args.page_days, "retries": args.retries}
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    template = args.store or config["store"]
+
+    ranges = resolve_ranges(args.meters or config["meters"], template, args.start, args.end)
+    if not ranges:
+        return
+    print(f"🔹 Fetching {len(ranges)} meter(s) from {config['base_url']} "
+          f"({config['max_connections']} connections, {config['page_days']:g}-day pages)...")
+    results, stats = asyncio.run(fetch(config, ranges, template))
+    emit({"event": "fetch", **stats})
+    print(f"📊 {stats['readings']:,} readings, {stats['pages']:,} pages, {stats['requests']:,} requests "
+          f"({stats['retries']} retries) in {stats['seconds']:.1f}s")
+    if any(r["error"] for r in results.values()):
+        raise SystemExit(f"❌ {sum(bool(r['error']) for r in results.values())} meter(s) incomplete; "
+                         f"rerun without --start to resume")
+
+
+if __name__ == "__main__":
+    main()
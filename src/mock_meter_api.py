@@ -0,0 +1,199 @@
+# src/mock_meter_api.py
+"""
+Local stand-in for the metering platform's HTTP API (see meter_fetcher.py),
+for offline tests and throughput benchmarks.
+
+    GET /meters                                   one meter id per line
+    GET /meters/{meter}/readings?start=..&end=..  CSV, start inclusive, end exclusive
+
+Readings are in the ReportingPeriodData.csv layout (time, import_energy,
+export_energy, self_consume in Wh). Each meter is a synthetic_data.py site,
+with its gaps, outages and out-of-range readings, generated once at startup
+and served from pre-rendered CSV lines.
+
+Behaviour of a real platform that the fetcher has to cope with can be
+switched on:
+--latency-ms    server-side delay per request (uniform 0.5x-1.5x)
+--error-rate    share of requests answered 503
+--max-rps       requests per second before answering 429 with Retry-After
+--max-rows      largest range served; larger ones get 400
+--token         required as "Authorization: Bearer <token>"
+
+RUN:
+    python src/mock_meter_api.py --meters 24 --years 2 --latency-ms 50
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import zlib
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+import schema
+import synthetic_data
+
+# -------------------------------------------------
+# DEFAULTS
+# -------------------------------------------------
+PORT = 8780
+MAX_ROWS = 20_000  # > 1 year of 30-min readings
+HEADER = b"time,import_energy,export_energy,self_consume\n"
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           429: "Too Many Requests", 503: "Service Unavailable"}
+
+
+# -------------------------------------------------
+# DATA
+# -------------------------------------------------
+class MeterData:
+    """One synthetic meter's raw readings as sorted times + pre-rendered CSV lines."""
+
+    def __init__(self, meter, years, seed=0):
+        rng = np.random.default_rng(seed + zlib.crc32(meter.encode()))
+        index = pd.date_range(synthetic_data.REPORTING_START, periods=round(365 * years) * synthetic_data.PER_DAY,
+                              freq=synthetic_data.STEP)
+        scale = rng.lognormal(0.0, 0.5)
+        actual = pd.Series(synthetic_data.campus_load(index, rng, scale), index=index) * (1 - synthetic_data.ECM_SAVINGS)
+        solar = synthetic_data.solar_output(index, rng, synthetic_data.SOLAR_SHARE * synthetic_data.PEAK_KW * scale)
+        raw, _ = synthetic_data.raw_reporting_frame(
+            actual, solar, rng, synthetic_data.GAP_RATE, synthetic_data.OUTAGES_PER_YEAR, synthetic_data.SPIKE_RATE
+        )
+        self.times = raw["time"].to_numpy(dtype="datetime64[ns]")
+        self.lines = raw.to_csv(header=False, index=False, date_format=schema.DATE_FORMAT).encode().splitlines(keepends=True)
+
+    def slice(self, start, end):
+        i, j = np.searchsorted(self.times, [start.to_datetime64(), end.to_datetime64()])
+        return self.lines[i:j]
+
+
+# -------------------------------------------------
+# SERVER
+# -------------------------------------------------
+class MockMeterApi:
+    def __init__(self, meters, latency_ms=0.0, error_rate=0.0, max_rps=0.0, max_rows=MAX_ROWS, token=None):
+        self.meters = meters
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        self.max_rows = max_rows
+        self.token = token
+        self.requests = 0
+        self.status_counts = {}
+        self._window = (0, 0)  # (second, requests in it)
+
+    def _rate_limited(self):
+        if not self.max_rps:
+            return False
+        second = int(time.monotonic())
+        start, n = self._window
+        n = n + 1 if start == second else 1
+        self._window = (second, n)
+        return n > self.max_rps
+
+    def route(self, target, headers):
+        """(status, extra headers, body) for one GET."""
+        if self.token and headers.get("authorization") != f"Bearer {self.token}":
+            return 401, {}, b"missing or wrong token\n"
+        if self._rate_limited():
+            return 429, {"Retry-After": "1"}, b"rate limit exceeded\n"
+        if random.random() < self.error_rate:
+            return 503, {}, b"try again\n"
+
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        if parts == ["meters"]:
+            return 200, {"Content-Type": "text/plain"}, "".join(f"{m}\n" for m in self.meters).encode()
+        if len(parts) != 3 or parts[0] != "meters" or parts[2] != "readings":
+            return 404, {}, b"not found\n"
+        if parts[1] not in self.meters:
+            return 404, {}, b"unknown meter\n"
+
+        query = parse_qs(url.query)
+        try:
+            start, end = pd.Timestamp(query["start"][0]), pd.Timestamp(query["end"][0])
+        except (KeyError, ValueError):
+            return 400, {}, b"start and end are required ISO timestamps\n"
+        lines = self.meters[parts[1]].slice(start, end)
+        if len(lines) > self.max_rows:
+            return 400, {}, f"range too large (max {self.max_rows} rows)\n".encode()
+        return 200, {"Content-Type": "text/csv"}, HEADER + b"".join(lines)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                method, target, _ = request.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if self.latency:
+                    await asyncio.sleep(self.latency * random.uniform(0.5, 1.5))
+                if method != "GET":
+                    status, extra, body = 400, {}, b"GET only\n"
+                else:
+                    status, extra, body = self.route(target, headers)
+                self.requests += 1
+                self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+                close = headers.get("connection", "").lower() == "close"
+                head = [f"HTTP/1.1 {status} {REASONS[status]}", f"Content-Length: {len(body)}",
+                        f"Connection: {'close' if close else 'keep-alive'}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args):
+    print(f"🔹 Generating {args.meters} synthetic meter(s), {args.years} year(s) each...")
+    ids = [f"meter_{i:03d}" for i in range(args.meters)]
+    meters = {m: MeterData(m, args.years, args.seed) for m in ids}
+    api = MockMeterApi(meters, args.latency_ms, args.error_rate, args.max_rps, args.max_rows, args.token)
+    server = await asyncio.start_server(api.handle, args.host, args.port, backlog=1024)
+    rows = sum(len(m.lines) for m in meters.values())
+    print(f"✅ Mock meter API on http://{args.host}:{args.port} ({rows:,} readings)", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        print(f"📊 {api.requests:,} requests served, status counts {api.status_counts}")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Mock metering-platform API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--meters", type=int, default=1)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--max-rps", type=float, default=0.0, help="0 = unlimited")
+    parser.add_argument("--max-rows", type=int, default=MAX_ROWS)
+    parser.add_argument("--token")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+# src/monthly_report.py
+"""
+Monthly M&V report generator (IPMVP Option C).
+
+Renders one self-contained HTML report (charts inlined as SVG) per month
+and facility, optionally with a PDF alongside. Reports are built from
+pre-aggregated data only:
+- Reporting_Rollup_Cube.npz  (energy / cost / CO2 / data-quality KPIs,
+                              daily and TOU-period aggregates)
+- store/md                   (monthly maximum demand, results store)
+
+The parent process slices a small payload per report; rendering runs
+concurrently in a process pool.
+
+RUN:
+    python src/monthly_report.py
+    python src/monthly_report.py --months 2024-07 2024-08 --pdf --jobs 4
+    python src/monthly_report.py --facility "Block B" data/b/cube.npz data/b/store
+"""
+
+import argparse
+import html
+import io
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from rollup_cube import RollupCube, CUBE_NPZ
+from results_store import STORE_DIR, dataset_dir, read_dataset
+
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+REPORT_DIR = os.path.join(BASE_DIR, "reports")
+
+DEFAULT_FACILITY = "UiTM Facility"
+
+
+# -------------------------------------------------
+# PAYLOADS (pre-aggregated, small, picklable)
+# -------------------------------------------------
+def month_payloads(facility, cube_path=CUBE_NPZ, store_dir=STORE_DIR, months=None):
+    cube = RollupCube.load(cube_path)
+    md = pd.DataFrame()
+    if os.path.isdir(dataset_dir("md", store_dir)):
+        # MD is billed per cycle, labelled YYYY-MM, or by its start date
+        # (YYYY-MM-DD) when cycles do not start on the 1st: a month's report
+        # shows the cycle that starts in that month
+        md = read_dataset("md", root=store_dir).astype({"Month": str})
+        md = md.set_index(md["Month"].str[:7].rename("Report Month"))
+        if md.index.duplicated().any():
+            raise ValueError(f"{store_dir}: more than one MD billing cycle starts in a month")
+
+    daily = cube.aggregates("daily")
+    daily_totals = daily.groupby("start")[["energy_kwh", "tou_cost_rm", "interval_count"]].sum()
+    monthly = cube.aggregates("monthly")
+
+    available = pd.period_range(cube.start, cube.end, freq="M")
+    selected = [p for p in available if months is None or str(p) in months]
+
+    payloads = []
+    for period in selected:
+        start, end = period.start_time, (period + 1).start_time
+        kpis = cube.range_kpis(start, end)
+        kpis["actual_kwh"] = cube.range_total("actual_kwh", start, end)
+        kpis["baseline_kwh"] = cube.range_total("baseline_kwh", start, end)
+
+        by_period = (
+            monthly[monthly["start"] == start]
+            .groupby("tou_period")[["energy_kwh", "tou_cost_rm", "interval_count"]]
+            .sum()
+        )
+        md_row = md.loc[str(period)].to_dict() if str(period) in md.index else {}
+
+        payloads.append({
+            "facility": facility,
+            "month": str(period),
+            "kpis": kpis,
+            "daily": daily_totals.loc[start:end - pd.Timedelta(days=1)],
+            "by_tou_period": by_period,
+            "md": md_row,
+        })
+    return payloads
+
+
+# -------------------------------------------------
+# RENDERING
+# -------------------------------------------------
+def _daily_figure(daily, month):
+    fig, ax = plt.subplots(figsize=(9, 3))
+    colors = ["tab:green" if v >= 0 else "tab:red" for v in daily["energy_kwh"]]
+    ax.bar(daily.index, daily["energy_kwh"], color=colors)
+    ax.axhline(0, color="black", linewidth=0.8)
+    ax.set_title(f"Daily Energy Savings (kWh) — {month}")
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    return fig
+
+
+def _svg(fig):
+    buf = io.StringIO()
+    fig.savefig(buf, format="svg")
+    text = buf.getvalue()
+    return text[text.index("<svg"):]
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")
+
+
+def _kpi_rows(payload):
+    k, md = payload["kpis"], payload["md"]
+    rows = [
+        ("Actual energy", f"{k['actual_kwh']:,.0f} kWh"),
+        ("Adjusted baseline energy", f"{k['baseline_kwh']:,.0f} kWh"),
+        ("Energy savings", f"{k['energy_savings_kwh']:,.0f} kWh"),
+        ("Cost savings (C1)", f"RM {k['cost_savings_c1_rm']:,.0f}"),
+        ("Cost savings (TOU)", f"RM {k['cost_savings_tou_rm']:,.0f}"),
+        ("CO₂ avoided", f"{k['co2_avoided_tonnes']:,.2f} tCO₂"),
+        ("Negative-savings intervals", f"{k['negative_savings_pct']:.1f}%"),
+    ]
+    if md:
+        if md["Month"] != payload["month"]:
+            rows.append(("MD billing cycle", f"from {md['Month']}"))
+        rows += [
+            ("Actual MD", f"{md['Actual_MD_kW']:,.1f} kW"),
+            ("Baseline MD", f"{md['Baseline_MD_kW']:,.1f} kW"),
+            ("MD savings", f"{md['MD Savings (kW)']:,.1f} kW / RM {md['MD Cost Savings (RM)']:,.0f}"),
+        ]
+    rows += [
+        ("Interpolated intervals", f"{k['interpolated_pct']:.1f}%"),
+        ("Outage intervals", f"{k['outage_pct']:.1f}%"),
+        ("Valid intervals", f"{k['valid_pct']:.1f}%"),
+    ]
+    return rows
+
+
+def render_html(payload, svg):
+    title = f"M&V Report — {payload['facility']} — {payload['month']}"
+    kpi_html = "\n".join(
+        f"<tr><th>{html.escape(name)}</th><td>{html.escape(value)}</td></tr>"
+        for name, value in _kpi_rows(payload)
+    )
+    tou = payload["by_tou_period"].rename(columns={
+        "energy_kwh": "Energy Savings (kWh)",
+        "tou_cost_rm": "TOU Cost Savings (RM)",
+        "interval_count": "Intervals",
+    }).rename_axis("TOU Period").astype({"Intervals": int})
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 2em; color: #222; }}
+table {{ border-collapse: collapse; margin: 1em 0; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 10px; text-align: left; }}
+th {{ background: #f3f3f3; }}
+</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p>IPMVP Option C (whole facility) | GRU-adjusted baseline | 30-minute intervals</p>
+<h2>Key Performance Indicators</h2>
+<table>
+{kpi_html}
+</table>
+<h2>Daily Energy Savings</h2>
+{svg}
+<h2>Savings by TOU Period</h2>
+{tou.to_html(float_format=lambda v: f"{v:,.1f}")}
+<p><small>Generated {pd.Timestamp.now():%Y-%m-%d %H:%M} from pre-aggregated rollup data.</small></p>
+</body>
+</html>
+"""
+
+
+def render_pdf(payload, fig, path):
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    with PdfPages(path) as pdf:
+        page = plt.figure(figsize=(8.27, 11.69))
+        page.text(0.08, 0.95, f"M&V Report — {payload['facility']} — {payload['month']}",
+                  fontsize=14, weight="bold")
+        y = 0.90
+        for name, value in _kpi_rows(payload):
+            page.text(0.08, y, name, fontsize=10)
+            page.text(0.55, y, value, fontsize=10)
+            y -= 0.025
+        pdf.savefig(page)
+        plt.close(page)
+        pdf.savefig(fig)
+
+
+def render_report(payload, out_dir, pdf=False):
+    """Render one report (runs in a worker). Returns paths and timing."""
+    start = time.perf_counter()
+    folder = os.path.join(out_dir, _slug(payload["facility"]))
+    os.makedirs(folder, exist_ok=True)
+
+    fig = _daily_figure(payload["daily"], payload["month"])
+    paths = [os.path.join(folder, f"{payload['month']}.html")]
+    with open(paths[0], "w", encoding="utf-8") as fh:
+        fh.write(render_html(payload, _svg(fig)))
+
+    if pdf:
+        paths.append(os.path.join(folder, f"{payload['month']}.pdf"))
+        render_pdf(payload, fig, paths[-1])
+    plt.close(fig)
+
+    return {
+        "facility": payload["facility"],
+        "month": payload["month"],
+        "paths": paths,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Monthly M&V report generator")
+    parser.add_argument("--months", nargs="+", help="YYYY-MM (default: all months in the cube)")
+    parser.add_argument(
+        "--facility", nargs=3, action="append", metavar=("NAME", "CUBE_NPZ", "STORE_DIR"),
+        help="facility and its pre-aggregated outputs (repeatable)",
+    )
+    parser.add_argument("--out-dir", default=REPORT_DIR)
+    parser.add_argument("--pdf", action="store_true", help="also write a PDF per report")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    facilities = args.facility or [(DEFAULT_FACILITY, CUBE_NPZ, STORE_DIR)]
+
+    start = time.perf_counter()
+    print("🔹 Slicing pre-aggregated data per month...")
+    payloads = []
+    for name, cube_path, store_dir in facilities:
+        payloads += month_payloads(name, cube_path, store_dir, args.months)
+
+    print(f"🔹 Rendering {len(payloads)} report(s) with {args.jobs} worker(s)...")
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(render_report, p, args.out_dir, args.pdf) for p in payloads]
+        results = [f.result() for f in futures]
+
+    for r in results:
+        print(f"✅ {r['facility']} {r['month']}: {r['seconds']:.2f}s → {', '.join(r['paths'])}")
+
+    total = time.perf_counter() - start
+    render_sum = sum(r["seconds"] for r in results)
+    print(f"📊 {len(results)} report(s) in {total:.2f}s wall ({render_sum:.2f}s summed render time)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# src/mv.py
+"""
+Single command-line entry point for the M&V chain.
+
+    python src/mv.py <command> [stage args...]
+
+Each command imports only the stage it runs, so `mv savings` or
+`mv preprocess` never load TensorFlow, sklearn or matplotlib. Arguments
+after the command go to that stage's own parser, e.g.
+
+    python src/mv.py savings --legacy
+    python src/mv.py train --model ann
+    python src/mv.py report --months 2024-06 --pdf
+    python src/mv.py ingest serve --port 8765
+
+Startup time (from this script starting to the stage's first line, with
+the stage's own import time broken out) is reported on stderr.
+"""
+
+import argparse
+import importlib
+import sys
+import time
+
+_STARTED = time.perf_counter()
+
+# command -> (module, function, help); modules are imported on demand
+COMMANDS = {
+    "preprocess": ("reporting_preprocessing", "main", "clean the raw reporting-period export"),
+    "features": ("reporting_gru_preprocessor", "main", "build GRU-ready reporting features"),
+    "predict": ("reporting_baseline_predictor_gru", "main", "predict the adjusted baseline (TensorFlow)"),
+    "savings": ("savings_engine", "main", "savings, cost, CO2, MD, cube and store in one pass"),
+    "evaluate": ("evaluate", "main", "evaluate the trained models (TensorFlow)"),
+    "train": (None, None, "train the ANN or the LSTM/GRU models (TensorFlow)"),
+    "report": ("monthly_report", "main", "monthly HTML / PDF reports"),
+    "pipeline": ("pipeline", "main", "run every stale stage in dependency order"),
+    "ingest": ("ingest_service", "main", "live ingestion service (serve / send)"),
+    "fetch": ("meter_fetcher", "main", "backfill raw readings from the metering API (fetch / bench)"),
+}
+
+TRAINERS = {"ann": ("train_ann", "train"), "seq": ("train_seq", "train_models")}
+
+
+def _train_target(argv):
+    parser = argparse.ArgumentParser(prog="mv train", description=COMMANDS["train"][2])
+    parser.add_argument("--model", choices=sorted(TRAINERS), default="seq",
+                        help="ann: dense ANN, seq: LSTM + GRU (default)")
+    args = parser.parse_args(argv)
+    return TRAINERS[args.model]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="mv",
+        description="M&V pipeline commands",
+        epilog="commands:\n" + "\n".join(f"  {name:<11} {spec[2]}" for name, spec in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=COMMANDS, metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="passed to the stage")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        module_name, func_name = _train_target(args.args)
+        stage_args = []
+    else:
+        module_name, func_name, _ = COMMANDS[args.command]
+        stage_args = args.args
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    ready = time.perf_counter()
+    print(
+        f"🔹 mv {args.command}: startup {ready - _STARTED:.2f}s "
+        f"(import {module_name} {ready - start:.2f}s)",
+        file=sys.stderr,
+    )
+
+    # the stage parses its own arguments
+    sys.argv = [f"mv {args.command}"] + stage_args
+    getattr(module, func_name)()
+    print(f"✅ mv {args.command}: finished in {time.perf_counter() - _STARTED:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+# src/pipeline.py
+"""
+Dependency-aware runner for the reporting-period M&V pipeline.
+
+Each src/ stage is declared with its input files, output files, parameters
+and non-Python code (config); the src/ modules its script imports, directly
+or through other src/ modules, are added to its code files. Stages form a
+DAG (a stage depends on whichever stage produces one of its inputs). A
+stage is skipped when the content hashes of its code, inputs and
+parameters match the last successful run and its outputs are still
+intact. Independent stages (C1, TOU, CO2, MD) run in parallel.
+
+RUN:
+    python src/pipeline.py                 # refresh whatever is stale
+    python src/pipeline.py --dry-run       # show what would run
+    python src/pipeline.py --force         # rerun everything
+    python src/pipeline.py --fused         # savings via savings_engine.py
+    python src/pipeline.py --instrument --profile sample --trace-memory
+                                           # per-step timings / memory / profiles
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+
+import instrumentation
+
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BASE_DIR, "src")
+DATA_DIR = os.path.join(BASE_DIR, "data")
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
+
+STATE_JSON = os.path.join(CACHE_DIR, "pipeline_state.json")
+REPORT_JSON = os.path.join(CACHE_DIR, "pipeline_report.json")
+
+DEFAULT_JOBS = 4
+
+
+def _src(name):
+    return os.path.join(SRC_DIR, name)
+
+
+def _data(name):
+    return os.path.join(DATA_DIR, name)
+
+
+def _model(name):
+    return os.path.join(MODEL_DIR, name)
+
+
+TARIFF_CODE = [os.path.join(BASE_DIR, "config", "tariffs.json")]
+
+
+# -------------------------------------------------
+# STAGE DECLARATIONS
+# -------------------------------------------------
+@dataclass
+class Stage:
+    name: str
+    script: str
+    inputs: list
+    outputs: list
+    code: list = field(default_factory=list)
+    params: dict = field(default_factory=dict)
+    args: list = field(default_factory=list)
+
+    @property
+    def code_files(self):
+        return [self.script] + sorted(local_imports(self.script) - {self.script}) + self.code
+
+
+def local_imports(path, found=None):
+    """src/ modules that `path` imports, directly or through other src/ modules."""
+    found = set() if found is None else found
+    with open(path) as fh:
+        tree = ast.parse(fh.read(), path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            module = _src(name.split(".")[0] + ".py")
+            if module not in found and os.path.exists(module):
+                found.add(module)
+                local_imports(module, found)
+    return found
+
+
+def build_stages(fused=False):
+    stages = [
+        Stage(
+            "preprocess",
+            _src("reporting_preprocessing.py"),
+            inputs=[_data("ReportingPeriodData.csv")],
+            outputs=[_data("Reporting_Clean_30min.csv")],
+        ),
+        Stage(
+            "gru_features",
+            _src("reporting_gru_preprocessor.py"),
+            inputs=[_data("PenangBaselineData.csv"), _data("Reporting_Clean_30min.csv")],
+            outputs=[_data("Reporting_GRU_Ready.csv")],
+        ),
+        Stage(
+            "predict",
+            _src("reporting_baseline_predictor_gru.py"),
+            inputs=[
+                _data("Reporting_GRU_Ready.csv"),
+                _model("gru_best.h5"),
+                _model("x_scaler.save"),
+                _model("y_scaler.save"),
+            ],
+            outputs=[_data("Reporting_AdjustedBaseline_GRU.csv")],
+        ),
+        Stage(
+            "chart_pyramid",
+            _src("chart_pyramid.py"),
+            inputs=[_data("PenangBaselineData.csv"), _data("Reporting_AdjustedBaseline_GRU.csv")],
+            outputs=[_data("Reporting_Chart_Pyramid.npz")],
+            code=TARIFF_CODE,
+        ),
+    ]
+
+    if fused:
+        stages.append(
+            Stage(
+                "savings_engine",
+                _src("savings_engine.py"),
+                inputs=[_data("Reporting_AdjustedBaseline_GRU.csv"), _data("Reporting_Clean_30min.csv")],
+                outputs=[
+                    _data("Reporting_Rollup_Cube.npz"),
+                    _data(os.path.join("store", "manifest.json")),
+                ],
+                code=TARIFF_CODE,
+            )
+        )
+        return stages
+
+    stages += [
+        Stage(
+            "savings",
+            _src("savings_calculation.py"),
+            inputs=[_data("Reporting_AdjustedBaseline_GRU.csv")],
+            outputs=[_data("Reporting_Savings_GRU.csv")],
+        ),
+        Stage(
+            "cost_c1",
+            _src("cost_savings_calculation.py"),
+            inputs=[_data("Reporting_Savings_GRU.csv")],
+            outputs=[_data("Reporting_CostSavings_C1.csv")],
+            code=TARIFF_CODE,
+        ),
+        Stage(
+            "cost_tou",
+            _src("cost_savings_tou.py"),
+            inputs=[_data("Reporting_Savings_GRU.csv")],
+            outputs=[_data("Reporting_CostSavings_TOU.csv")],
+            code=TARIFF_CODE,
+        ),
+        Stage(
+            "co2",
+            _src("co2_avoidance_calculation.py"),
+            inputs=[_data("Reporting_Savings_GRU.csv")],
+            outputs=[_data("Reporting_CO2_Avoidance_GRU.csv")],
+        ),
+        Stage(
+            "md",
+            _src("md_savings_calculation.py"),
+            inputs=[_data("Reporting_AdjustedBaseline_GRU.csv")],
+            outputs=[_data("Reporting_MD_Savings.csv")],
+        ),
+        Stage(
+            "compare",
+            _src("compare_c1_vs_tou.py"),
+            inputs=[_data("Reporting_CostSavings_C1.csv"), _data("Reporting_CostSavings_TOU.csv")],
+            outputs=[_data("Reporting_Cost_C1_vs_TOU.csv")],
+        ),
+        Stage(
+            "rollup",
+            _src("rollup_cube.py"),
+            inputs=[_data("Reporting_AdjustedBaseline_GRU.csv"), _data("Reporting_Clean_30min.csv")],
+            outputs=[_data("Reporting_Rollup_Cube.npz")],
+            code=TARIFF_CODE,
+        ),
+        Stage(
+            "store",
+            _src("results_store.py"),
+            inputs=[_data("Reporting_AdjustedBaseline_GRU.csv"), _data("Reporting_Clean_30min.csv")],
+            outputs=[_data(os.path.join("store", "manifest.json"))],
+            code=TARIFF_CODE,
+            args=["build"],
+        ),
+    ]
+    return stages
+
+
+def build_dependencies(stages):
+    producers = {out: s.name for s in stages for out in s.outputs}
+    return {
+        s.name: sorted({producers[i] for i in s.inputs if i in producers} - {s.name})
+        for s in stages
+    }
+
+
+# -------------------------------------------------
+# FINGERPRINTS
+# -------------------------------------------------
+def file_digest(path):
+    if not os.path.exists(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def stage_fingerprint(stage):
+    payload = {
+        "code": {os.path.relpath(p, BASE_DIR): file_digest(p) for p in stage.code_files},
+        "inputs": {os.path.relpath(p, BASE_DIR): file_digest(p) for p in stage.inputs},
+        "params": stage.params,
+    }
+    blob = json.dumps(payload, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+
+def outputs_intact(stage, record):
+    recorded = record.get("outputs", {})
+    return all(
+        recorded.get(os.path.relpath(p, BASE_DIR)) == file_digest(p)
+        for p in stage.outputs
+    )
+
+
+def load_state():
+    if not os.path.exists(STATE_JSON):
+        return {}
+    with open(STATE_JSON) as fh:
+        return json.load(fh)
+
+
+def save_state(state):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(STATE_JSON, "w") as fh:
+        json.dump(state, fh, indent=2, sort_keys=True)
+
+
+# -------------------------------------------------
+# EXECUTION
+# -------------------------------------------------
+def instrument_env(profile=None, trace_memory=False):
+    """Environment that switches instrumentation on in every stage process."""
+    run_id = time.strftime("%Y%m%d-%H%M%S")
+    env = {
+        "MV_RUN_ID": run_id,
+        "MV_INSTRUMENT_LOG": os.path.join(instrumentation.LOG_DIR, f"{run_id}.jsonl"),
+    }
+    if profile:
+        env["MV_PROFILE"] = profile
+    if trace_memory:
+        env["MV_TRACE_MEMORY"] = "1"
+    return env
+
+
+def run_stage(stage, extra_env=None):
+    env = dict(os.environ, MPLBACKEND="Agg", **(extra_env or {}))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, stage.script] + stage.args,
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    return proc, time.perf_counter() - start
+
+
+def run_pipeline(fused=False, jobs=DEFAULT_JOBS, force=False, dry_run=False, extra_env=None):
+    stages = build_stages(fused)
+    by_name = {s.name: s for s in stages}
+    deps = build_dependencies(stages)
+    state = load_state()
+
+    report = {}
+    done = set()
+    pending = [s.name for s in stages]
+    running = {}
+
+    def ready(name):
+        return all(d in done for d in deps[name])
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            newly_ready = [n for n in pending if ready(n)]
+            if not newly_ready and not running:
+                raise RuntimeError(f"Unresolvable stage dependencies: {pending}")
+
+            for name in newly_ready:
+                pending.remove(name)
+                stage = by_name[name]
+
+                if any(report[d]["status"] in ("failed", "blocked") for d in deps[name]):
+                    report[name] = {"status": "blocked", "seconds": 0.0}
+                    done.add(name)
+                    continue
+
+                fingerprint = stage_fingerprint(stage)
+                record = state.get(name, {})
+                upstream_reran = any(report[d]["status"] in ("miss", "would run") for d in deps[name])
+                fresh = (
+                    not force
+                    and record.get("fingerprint") == fingerprint
+                    and outputs_intact(stage, record)
+                )
+
+                if fresh and not (dry_run and upstream_reran):
+                    report[name] = {"status": "hit", "seconds": 0.0}
+                    done.add(name)
+                elif dry_run:
+                    report[name] = {"status": "would run", "seconds": 0.0}
+                    done.add(name)
+                else:
+                    print(f"🔹 Running {name} ({os.path.basename(stage.script)})...")
+                    running[pool.submit(run_stage, stage, extra_env)] = name
+
+            if not running:
+                continue
+
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                stage = by_name[name]
+                proc, seconds = future.result()
+
+                if proc.returncode == 0:
+                    state[name] = {
+                        "fingerprint": stage_fingerprint(stage),
+                        "outputs": {
+                            os.path.relpath(p, BASE_DIR): file_digest(p)
+                            for p in stage.outputs
+                        },
+                    }
+                    save_state(state)
+                    report[name] = {"status": "miss", "seconds": round(seconds, 3)}
+                else:
+                    report[name] = {"status": "failed", "seconds": round(seconds, 3)}
+                    print(f"❌ Stage {name} failed:\n{proc.stderr[-2000:]}")
+                done.add(name)
+
+    return {s.name: report[s.name] for s in stages}
+
+
+def print_report(report, total_seconds):
+    print("\n📊 Pipeline run report")
+    print(f"{'Stage':<16}{'Status':<12}{'Seconds':>10}")
+    for name, row in report.items():
+        print(f"{name:<16}{row['status']:<12}{row['seconds']:>10.2f}")
+
+    hits = sum(r["status"] == "hit" for r in report.values())
+    print(f"Cache hits: {hits}/{len(report)} | Total wall time: {total_seconds:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the M&V pipeline, skipping fresh stages")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_JOBS, help="max parallel stages")
+    parser.add_argument("--force", action="store_true", help="ignore the cache and rerun every stage")
+    parser.add_argument("--dry-run", action="store_true", help="report hit/miss without running")
+    parser.add_argument("--fused", action="store_true", help="use savings_engine.py for all savings stages")
+    parser.add_argument("--instrument", action="store_true", help="log per-step timings, rows and memory as JSON")
+    parser.add_argument("--profile", choices=["cprofile", "sample"], help="profile each stage (implies --instrument)")
+    parser.add_argument("--trace-memory", action="store_true", help="per-step Python heap peaks (implies --instrument)")
+    args = parser.parse_args()
+
+    extra_env = None
+    if args.instrument or args.profile or args.trace_memory:
+        extra_env = instrument_env(args.profile, args.trace_memory)
+
+    start = time.perf_counter()
+    report = run_pipeline(
+        fused=args.fused, jobs=args.jobs, force=args.force, dry_run=args.dry_run,
+        extra_env=extra_env,
+    )
+    total = time.perf_counter() - start
+    print_report(report, total)
+
+    log = (extra_env or {}).get("MV_INSTRUMENT_LOG")
+    if log and os.path.exists(log):
+        print(f"\n📊 Stage instrumentation ({os.path.relpath(log, BASE_DIR)})")
+        print(instrumentation.summarize(instrumentation.read_events(log)))
+
+    if not args.dry_run:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(REPORT_JSON, "w") as fh:
+            json.dump({"total_seconds": round(total, 3), "stages": report}, fh, indent=2)
+
+    if any(r["status"] in ("failed", "blocked") for r in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,206 @@
 # src/postprocess_baseline.py
-import pandas as pd
+"""
+Post-processing for baseline simulation results (Actual vs GRU Baseline).
+
+For each results CSV (DateTime, Actual, Baseline in kW, 30-min intervals):
+- interval savings (kW, kWh) and cumulative savings
+- daily and monthly energy totals (kWh)
+- headless figures (Agg backend, PNG and/or SVG), decimated to a fixed
+  number of points with a min/max envelope so peaks survive
+
+Outputs (in --out-dir, default: cache/postprocess_baseline/):
+- <name>_with_savings.csv
+- <name>_daily.csv, <name>_monthly.csv
+- <name>_actual_vs_baseline.<fmt>, <name>_cumulative_savings.<fmt>
+
+RUN:
+    python src/postprocess_baseline.py
+    python src/postprocess_baseline.py runs/*.csv --out-dir reports --format png svg --jobs 4
+"""
+
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-in_path = os.path.join(os.getcwd(), "baseline_simulation_results.csv")
-out_path = os.path.join(os.getcwd(), "baseline_simulation_results_with_savings.csv")
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 
-df = pd.read_csv(in_path, parse_dates=["DateTime"]).set_index("DateTime")
+from savings_calculation import INTERVAL_HOURS
 
-# Instantaneous savings (kW)
-df["Savings_kW"] = df["Baseline"] - df["Actual"]
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INPUT = os.path.join(BASE_DIR, "baseline_simulation_results.csv")
+DEFAULT_OUT_DIR = os.path.join(BASE_DIR, "cache", "postprocess_baseline")
 
-# Convert to energy for 30-min interval: kWh = kW * 0.5
-df["Savings_kWh"] = df["Savings_kW"] * 0.5
+MAX_PLOT_POINTS = 2000
 
-# Cumulative savings
-df["Cumulative_Savings_kWh"] = df["Savings_kWh"].cumsum()
 
-# Save
-df.to_csv(out_path)
-print("Saved:", out_path)
-print(df.tail(10))
+# -------------------------------------------------
+# CALCULATIONS
+# -------------------------------------------------
+def compute_savings(df):
+    """Interval and cumulative savings for a DateTime-indexed Actual/Baseline frame."""
+    out = df.copy()
+    out["Savings_kW"] = out["Baseline"] - out["Actual"]
+    out["Savings_kWh"] = out["Savings_kW"] * INTERVAL_HOURS
+    out["Cumulative_Savings_kWh"] = out["Savings_kWh"].cumsum()
+    return out
 
-#Aggregate daily & monthly savings (and print)
-# daily aggregation
-daily = df.resample("D").agg({
-    "Actual": "sum",        # sums of kW readings over day (but if you want kWh use converting)
-    "Baseline": "sum",
-    "Savings_kWh": "sum"
-})
-print("Daily savings (last 7 days):")
-print(daily.tail(7))
 
-# monthly aggregation
-monthly = df.resample("M").agg({"Savings_kWh": "sum"})
-print("Monthly savings:")
-print(monthly)
+def aggregate(df):
+    """Daily and monthly energy totals (kWh, not summed kW readings)."""
+    energy = pd.DataFrame({
+        "Actual_kWh": df["Actual"] * INTERVAL_HOURS,
+        "Baseline_kWh": df["Baseline"] * INTERVAL_HOURS,
+        "Savings_kWh": df["Savings_kWh"],
+    })
+    daily = energy.resample("D").sum(min_count=1)
+    monthly = energy.resample("MS").sum(min_count=1)
+    monthly.index = monthly.index.to_period("M")
+    return daily, monthly
 
-import matplotlib.pyplot as plt
 
-# Actual vs Baseline (sample period)
-plt.figure(figsize=(12,5))
-plt.plot(df.index, df["Actual"], label="Actual")
-plt.plot(df.index, df["Baseline"], label="Baseline (GRU)", alpha=0.8)
-plt.legend()
-plt.title("Actual vs Baseline (GRU)")
-plt.tight_layout()
-plt.show()
-
-# Cumulative savings
-plt.figure(figsize=(10,4))
-plt.plot(df.index, df["Cumulative_Savings_kWh"], label="Cumulative Savings (kWh)")
-plt.title("Cumulative Energy Savings (kWh)")
-plt.tight_layout()
-plt.show()
+# -------------------------------------------------
+# FIGURES
+# -------------------------------------------------
+def decimate(index, values, max_points=MAX_PLOT_POINTS):
+    """
+    Reduce a series to ~max_points with a per-bucket min/max envelope.
+    Returns (index, values) in time order.
+    """
+    n = len(values)
+    if n <= max_points:
+        return index, values
+
+    bucket = int(np.ceil(n / (max_points // 2)))
+    n_full = n // bucket * bucket
+    blocks = np.asarray(values[:n_full], dtype=float).reshape(-1, bucket)
+    filled = np.where(np.isnan(blocks), np.inf, blocks)
+    lo = np.argmin(filled, axis=1)
+    hi = np.argmax(np.where(np.isnan(blocks), -np.inf, blocks), axis=1)
+
+    offsets = np.arange(0, n_full, bucket)
+    picks = np.sort(np.concatenate([offsets + lo, offsets + hi]))
+    if n_full < n:
+        picks = np.append(picks, np.arange(n_full, n))
+    picks = np.unique(picks)
+    return index[picks], np.asarray(values)[picks]
+
+
+def render_figures(df, out_dir, name, formats=("png",), max_points=MAX_PLOT_POINTS):
+    paths = []
+
+    fig, ax = plt.subplots(figsize=(12, 5))
+    ax.plot(*decimate(df.index, df["Actual"].to_numpy(), max_points), label="Actual")
+    ax.plot(*decimate(df.index, df["Baseline"].to_numpy(), max_points), label="Baseline (GRU)", alpha=0.8)
+    ax.legend()
+    ax.set_title("Actual vs Baseline (GRU)")
+    fig.tight_layout()
+    for fmt in formats:
+        paths.append(os.path.join(out_dir, f"{name}_actual_vs_baseline.{fmt}"))
+        fig.savefig(paths[-1])
+    plt.close(fig)
+
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(*decimate(df.index, df["Cumulative_Savings_kWh"].to_numpy(), max_points),
+            label="Cumulative Savings (kWh)")
+    ax.set_title("Cumulative Energy Savings (kWh)")
+    fig.tight_layout()
+    for fmt in formats:
+        paths.append(os.path.join(out_dir, f"{name}_cumulative_savings.{fmt}"))
+        fig.savefig(paths[-1])
+    plt.close(fig)
+
+    return paths
+
+
+# -------------------------------------------------
+# PROCESS ONE FILE
+# -------------------------------------------------
+def postprocess(in_path, out_dir=DEFAULT_OUT_DIR, formats=("png",), plots=True):
+    """Process one simulation results CSV. Returns output paths and timings."""
+    timings = {}
+    start = time.perf_counter()
+
+    os.makedirs(out_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(in_path))[0]
+
+    df = pd.read_csv(in_path, parse_dates=["DateTime"]).set_index("DateTime").sort_index()
+    timings["load"] = time.perf_counter() - start
+
+    t = time.perf_counter()
+    df = compute_savings(df)
+    daily, monthly = aggregate(df)
+    timings["compute"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    outputs = [
+        os.path.join(out_dir, f"{name}_with_savings.csv"),
+        os.path.join(out_dir, f"{name}_daily.csv"),
+        os.path.join(out_dir, f"{name}_monthly.csv"),
+    ]
+    df.to_csv(outputs[0])
+    daily.to_csv(outputs[1])
+    monthly.to_csv(outputs[2])
+    timings["write"] = time.perf_counter() - t
+
+    if plots:
+        t = time.perf_counter()
+        outputs += render_figures(df, out_dir, name, formats)
+        timings["plots"] = time.perf_counter() - t
+
+    timings["total"] = time.perf_counter() - start
+    return {
+        "input": in_path,
+        "rows": len(df),
+        "total_savings_kwh": float(df["Savings_kWh"].sum()),
+        "outputs": outputs,
+        "timings": timings,
+    }
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Post-process baseline simulation results")
+    parser.add_argument("inputs", nargs="*", default=[DEFAULT_INPUT], help="results CSV file(s)")
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument("--format", nargs="+", default=["png"], choices=["png", "svg"])
+    parser.add_argument("--no-plots", action="store_true")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="parallel worker processes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    jobs = max(1, min(args.jobs, len(args.inputs)))
+    call = dict(out_dir=args.out_dir, formats=tuple(args.format), plots=not args.no_plots)
+
+    if jobs == 1:
+        results = [postprocess(path, **call) for path in args.inputs]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(postprocess, path, **call) for path in args.inputs]
+            results = [f.result() for f in futures]
+
+    for r in results:
+        t = r["timings"]
+        print(
+            f"✅ {os.path.basename(r['input'])}: {r['rows']:,} rows, "
+            f"{r['total_savings_kwh']:,.1f} kWh saved "
+            f"(load {t['load']:.2f}s, compute {t['compute']:.2f}s, "
+            f"write {t['write']:.2f}s, plots {t.get('plots', 0):.2f}s)"
+        )
+        for path in r["outputs"]:
+            print(f"   → {path}")
+
+    print(f"📊 Processed {len(results)} file(s) with {jobs} worker(s) in {time.perf_counter() - start:.2f}s")
+
 
+if __name__ == "__main__":
+    main()
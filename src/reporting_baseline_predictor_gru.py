@@ -9,11 +9,11 @@ GRU Adjusted Baseline Predictor (Reporting Period)
 """
 
 import os
-import joblib
 import numpy as np
 import pandas as pd
-from tensorflow.keras.models import load_model
 from data_preproc import create_sequence_windows
+import schema
+from instrumentation import stage, step, rows
 
 # -------------------------------------------------
 # PATHS
@@ -49,22 +49,27 @@ FEATURE_COLS = [
 TARGET_COL = "Load Consumption (kW)"
 
 # -------------------------------------------------
-# MAIN PROCESS
+# PREDICTION
 # -------------------------------------------------
-def main():
-    print("🔹 Loading GRU model and scalers...")
+def load_predictor():
+    """(GRU model, x_scaler, y_scaler). Imports TensorFlow."""
+    # Imported here: TensorFlow alone takes seconds to import
+    import joblib
+    from tensorflow.keras.models import load_model
+
     gru = load_model(GRU_MODEL_PATH, compile=False)
-    x_scaler = joblib.load(X_SCALER_PATH)
-    y_scaler = joblib.load(Y_SCALER_PATH)
+    return gru, joblib.load(X_SCALER_PATH), joblib.load(Y_SCALER_PATH)
 
-    print("🔹 Loading GRU-ready reporting dataset...")
-    df = pd.read_csv(INPUT_CSV, parse_dates=["DateTime"])
-    df = df.sort_values("DateTime").set_index("DateTime")
 
+def predict_frame(df, gru, x_scaler, y_scaler, verbose=0):
+    """
+    Adjusted baseline for df's rows after the first SEQ_LEN (which are
+    only window context). df: GRU-ready frame, DateTime index.
+    """
     # -------------------------------------------------
     # Scale features & target (same as training)
     # -------------------------------------------------
-    X_raw = df[FEATURE_COLS].values.astype(float)
+    X_raw = df[FEATURE_COLS].to_numpy(dtype=np.float32)
     y_raw = df[[TARGET_COL]].values.astype(float)
 
     X_scaled = x_scaler.transform(X_raw)
@@ -77,23 +82,17 @@ def main():
     # -------------------------------------------------
     # Create GRU windows
     # -------------------------------------------------
-    print("🔹 Creating GRU sequence windows...")
     X_seq, y_seq = create_sequence_windows(df_scaled, seq_len=SEQ_LEN)
-
     timestamps = df.index[SEQ_LEN:]
 
     # -------------------------------------------------
     # Predict adjusted baseline
     # -------------------------------------------------
-    print("🔹 Predicting adjusted baseline (GRU)...")
-    y_pred_scaled = gru.predict(X_seq, verbose=1)
+    y_pred_scaled = gru.predict(X_seq, verbose=verbose)
     y_pred = y_scaler.inverse_transform(y_pred_scaled)
 
     y_actual = y_scaler.inverse_transform(y_seq.reshape(-1, 1))
 
-    # -------------------------------------------------
-    # Save results
-    # -------------------------------------------------
     results = pd.DataFrame(
         {
             "Actual Power (kW)": y_actual.flatten(),
@@ -103,7 +102,34 @@ def main():
     )
 
     results.index.name = "DateTime"
+    return schema.apply(results, "adjusted")
+
+
+# -------------------------------------------------
+# MAIN PROCESS
+# -------------------------------------------------
+@stage("predict")
+def main():
+    print("🔹 Loading GRU model and scalers...")
+    step("load_model")
+    gru, x_scaler, y_scaler = load_predictor()
+
+    print("🔹 Loading GRU-ready reporting dataset...")
+    step("read_csv")
+    df = schema.read_csv(INPUT_CSV, "gru_ready")
+    rows(len(df))
+    df = df.sort_values("DateTime").set_index("DateTime")
+
+    print("🔹 Predicting adjusted baseline (GRU)...")
+    step("inference", rows=max(len(df) - SEQ_LEN, 0))
+    results = predict_frame(df, gru, x_scaler, y_scaler, verbose=1)
+
+    # -------------------------------------------------
+    # Save results
+    # -------------------------------------------------
+    step("write_csv", rows=len(results))
     results.to_csv(OUTPUT_CSV)
+    step("report")
 
     print("✅ Adjusted baseline saved to:", OUTPUT_CSV)
     print(results.head())
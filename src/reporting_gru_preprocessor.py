@@ -6,6 +6,9 @@ import pandas as pd
 import numpy as np
 import os
 
+import schema
+from instrumentation import stage, step, rows
+
 # -------------------------------------------------
 # PATHS
 # -------------------------------------------------
@@ -54,21 +57,13 @@ def add_lag_features(df):
     return df
 
 
-# -------------------------------------------------
-# MAIN
-# -------------------------------------------------
-def main():
-    print("🔹 Loading baseline data...")
-    baseline = pd.read_csv(BASELINE_CSV, parse_dates=["DateTime"])
-    baseline = baseline.sort_values("DateTime").set_index("DateTime")
-
-    # Keep last 7 days only (for lag continuity)
-    baseline_tail = baseline.tail(WEEK_LAG)
-
-    print("🔹 Loading clean reporting-period data...")
-    rpt = pd.read_csv(REPORTING_CLEAN_CSV, parse_dates=["DateTime"])
-    rpt = rpt.sort_values("DateTime").set_index("DateTime")
-
+def build_features(history, rpt):
+    """
+    history: rows just before rpt with "Load Consumption (kW)" (at least
+             WEEK_LAG of them, for the lags)
+    rpt:     clean reporting-period frame (DateTime index)
+    Returns the GRU-ready rows for rpt's timestamps.
+    """
     # Rename for model consistency
     rpt = rpt.rename(columns={"Power (kW)": "Load Consumption (kW)"})
     
@@ -86,7 +81,7 @@ def main():
     # -------------------------------------------------
     # COMBINE (NO DROPPING)
     # -------------------------------------------------
-    combined = pd.concat([baseline_tail, rpt], axis=0)
+    combined = pd.concat([history, rpt], axis=0)
     combined = combined.sort_index()
 
     # -------------------------------------------------
@@ -102,12 +97,38 @@ def main():
     # -------------------------------------------------
 
     # Keep only reporting-period timestamps
-    reporting_ready = combined.loc[rpt.index.min():]
+    return schema.apply(combined.loc[rpt.index.min():], "gru_ready")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+@stage("gru_features")
+def main():
+    print("🔹 Loading baseline data...")
+    step("read_baseline")
+    baseline = schema.read_csv(BASELINE_CSV, "baseline")
+    rows(len(baseline))
+    baseline = baseline.sort_values("DateTime").set_index("DateTime")
+
+    # Keep last 7 days only (for lag continuity)
+    baseline_tail = baseline.tail(WEEK_LAG)
+
+    print("🔹 Loading clean reporting-period data...")
+    step("read_reporting")
+    rpt = schema.read_csv(REPORTING_CLEAN_CSV, "clean")
+    rows(len(rpt))
+    rpt = rpt.sort_values("DateTime").set_index("DateTime")
+
+    step("features", rows=len(rpt))
+    reporting_ready = build_features(baseline_tail, rpt)
 
     # -------------------------------------------------
     # Save
     # -------------------------------------------------
+    step("write_csv", rows=len(reporting_ready))
     reporting_ready.to_csv(OUTPUT_CSV)
+    step("report")
 
     print("✅ GRU-ready reporting dataset saved:")
     print(OUTPUT_CSV)
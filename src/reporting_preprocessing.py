@@ -9,6 +9,9 @@ import pandas as pd
 import numpy as np
 import os
 
+import schema
+from instrumentation import stage, step, rows
+
 # -------------------------------------------------
 # PATHS
 # -------------------------------------------------
@@ -30,15 +33,19 @@ MAX_INTERPOLATE_INTERVALS = 4     # ≤ 2 hours
 OUTAGE_THRESHOLD = 48             # ≥ 24 hours
 
 # -------------------------------------------------
-# MAIN
+# CLEANING
 # -------------------------------------------------
-def main():
-    print("🔹 Loading raw reporting-period data...")
-    df = pd.read_csv(RAW_REPORTING_CSV)
+def valid_readings(raw):
+    """True where a raw reading passes the physical checks (STEP 5)."""
+    energy = (raw["import_energy"] + raw["self_consume"]) / 1000.0
+    return energy.between(0, MAX_KWH_30MIN)
 
-    df["time"] = pd.to_datetime(df["time"])
-    df = df.sort_values("time").set_index("time")
 
+def clean_readings(df):
+    """
+    Steps 1-11 on raw readings (time-indexed, sorted).
+    Returns the Reporting_Clean_30min layout.
+    """
     # -------------------------------------------------
     # STEP 1: Keep relevant columns
     # -------------------------------------------------
@@ -145,8 +152,28 @@ def main():
         "Outage Flag",
         "Valid Data Flag"
     ]].reset_index().rename(columns={"index": "DateTime"})
+    return schema.apply(df_final, "clean")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+@stage("preprocess")
+def main():
+    print("🔹 Loading raw reporting-period data...")
+    step("read_csv")
+    df = schema.read_csv(RAW_REPORTING_CSV, "raw")
+    rows(len(df))
+
+    df = df.sort_values("time").set_index("time")
+
+    step("clean", rows=len(df))
+    df_final = clean_readings(df)
+    rows(len(df_final))
 
+    step("write_csv", rows=len(df_final))
     df_final.to_csv(OUTPUT_CSV, index=False)
+    step("report")
 
     print("✅ Clean reporting dataset saved:")
     print(OUTPUT_CSV)
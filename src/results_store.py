@@ -0,0 +1,385 @@
+# src/results_store.py
+"""
+Consolidated columnar results store.
+
+Pipeline results are written once to data/store/<dataset>/v-<hash>/ as
+zstd-compressed Parquet, partitioned by month (month=YYYY-MM/part-0.parquet).
+Each quantity is stored once per dataset:
+
+- clean    Reporting_Clean_30min columns (data quality flags as uint8)
+- savings  actual / adjusted baseline power + every derived savings column
+- md       monthly maximum-demand savings (single partition)
+
+Columns that are a fixed scaling of another stored column (clean
+"Power (kW)", "Cumulative CO2 Avoided (tonnes)") are not written; they are
+rebuilt on read from VIRTUAL_COLUMNS.
+
+Floats are stored as float32 when the round-trip error stays within
+FLOAT32_ABS_TOL (cumulative totals usually stay float64), 0/1 flags as
+uint8 and repeated labels (TOU Period) as dictionary-encoded categoricals.
+
+Every write goes to new version directories (named by a hash of their
+files); manifest.json, replaced atomically last, says which version of each
+dataset is current, and readers resolve datasets through it. A reader
+never sees a dataset half-written or deleted under it: the previous
+version is kept until the next write, older ones are removed.
+
+Readers load only the columns and time range they need; months outside
+the range are never opened. CSV export is an on-demand view.
+
+Written by savings_engine.py (or `python src/results_store.py build`).
+
+RUN:
+    python src/results_store.py measure
+    python src/results_store.py export savings --start 2024-07-01 --end 2024-08-01 \
+        --columns "Savings Energy (kWh)" --out savings_jul.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import schema
+from instrumentation import stage, step, rows
+
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+STORE_DIR = os.path.join(DATA_DIR, "store")
+
+TIME_COL = "DateTime"
+COMPRESSION = "zstd"
+FLOAT32_ABS_TOL = 1e-3  # 1 Wh / 0.001 RM / 1 g CO2
+
+# dataset -> {virtual column: (stored column, scale)}
+VIRTUAL_COLUMNS = {
+    "clean": {"Power (kW)": ("Energy (kWh)", 2.0)},
+    "savings": {"Cumulative CO2 Avoided (tonnes)": ("Cumulative CO2 Avoided (kg)", 1e-3)},
+}
+
+
+# -------------------------------------------------
+# COMPACTION
+# -------------------------------------------------
+def compact_frame(df):
+    """Downcast columns where no information is lost (within tolerance)."""
+    out = {}
+    for col in df.columns:
+        s = df[col]
+        if s.dtype == bool:
+            out[col] = s.astype(np.uint8)
+        elif pd.api.types.is_float_dtype(s):
+            values = s.to_numpy(dtype=np.float64)
+            as32 = values.astype(np.float32)
+            finite = np.isfinite(values)
+            is_flag = finite.any() and np.isin(values[finite], (0.0, 1.0)).all() and not np.isnan(values).any()
+            if is_flag:
+                out[col] = s.astype(np.uint8)
+            elif np.nanmax(np.abs(as32.astype(np.float64) - values), initial=0.0) <= FLOAT32_ABS_TOL:
+                out[col] = pd.Series(as32, index=s.index)
+            else:
+                out[col] = s
+        elif pd.api.types.is_integer_dtype(s):
+            lo, hi = (s.min(), s.max()) if len(s) else (0, 0)
+            out[col] = s.astype(np.uint8) if lo >= 0 and hi <= 255 else s
+        elif s.dtype == object or isinstance(s.dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(s):
+            out[col] = s.astype("category")
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+# -------------------------------------------------
+# WRITE
+# -------------------------------------------------
+def read_manifest(root=STORE_DIR):
+    """The manifest in force ({} before the first write)."""
+    try:
+        with open(os.path.join(root, "manifest.json")) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def dataset_dir(name, root=STORE_DIR, manifest=None):
+    """Directory of the current version of dataset `name`."""
+    manifest = read_manifest(root) if manifest is None else manifest
+    # stores written before versioning: <root>/<name>/ itself
+    return os.path.join(root, manifest.get(name, {}).get("path", name))
+
+
+def _files_digest(path):
+    digest = hashlib.sha256()
+    for d, dirs, files in sorted(os.walk(path)):
+        dirs.sort()
+        for f in sorted(files):
+            digest.update(os.path.relpath(os.path.join(d, f), path).encode())
+            with open(os.path.join(d, f), "rb") as fh:
+                digest.update(fh.read())
+    return digest.hexdigest()[:16]
+
+
+def write_dataset(name, df, partition_by_month=True, root=STORE_DIR):
+    """
+    Write `df` as a new version of dataset `name` and return its path
+    relative to `root`; readers see it once the manifest points at it
+    (write_results). df must have a DatetimeIndex when partition_by_month
+    is True.
+    """
+    tmp = os.path.join(root, name, f".tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    virtual = VIRTUAL_COLUMNS.get(name, {})
+    frame = compact_frame(df.drop(columns=[c for c in virtual if c in df.columns]))
+
+    if partition_by_month:
+        frame = frame.sort_index()
+        months = frame.index.to_period("M")
+        for month in months.unique():
+            part = frame[months == month].reset_index()
+            part_dir = os.path.join(tmp, f"month={month}")
+            os.makedirs(part_dir)
+            pq.write_table(
+                pa.Table.from_pandas(part, preserve_index=False),
+                os.path.join(part_dir, "part-0.parquet"),
+                compression=COMPRESSION,
+            )
+    else:
+        pq.write_table(
+            pa.Table.from_pandas(frame, preserve_index=False),
+            os.path.join(tmp, "part-0.parquet"),
+            compression=COMPRESSION,
+        )
+
+    # same content -> same version: an unchanged dataset is not rewritten
+    version = f"v-{_files_digest(tmp)}"
+    target = os.path.join(root, name, version)
+    if os.path.isdir(target):
+        shutil.rmtree(tmp)
+    else:
+        os.replace(tmp, target)
+    return f"{name}/{version}"
+
+
+def _remove_old_versions(name, keep, root=STORE_DIR):
+    """Delete the versions of `name` (and pre-versioning partitions) not in `keep`."""
+    base = os.path.join(root, name)
+    for entry in os.listdir(base):
+        path = os.path.join(base, entry)
+        if entry.startswith(".tmp-") or f"{name}/{entry}" in keep:
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+
+def write_results(df, derived, monthly_md, clean=None, root=STORE_DIR):
+    """
+    Write one pipeline run to the store.
+    df: DateTime-indexed inputs (Actual / Adjusted Baseline Power (kW)).
+    derived: savings_engine.compute_derived(df).
+    """
+    frames = {
+        "savings": pd.concat([df[["Actual Power (kW)", "Adjusted Baseline Power (kW)"]], derived], axis=1),
+        "md": monthly_md,
+    }
+    if clean is not None:
+        frames["clean"] = clean
+
+    previous = read_manifest(root)
+    manifest = {}
+    for name, frame in frames.items():
+        partitioned = name != "md"
+        path = write_dataset(name, frame, partition_by_month=partitioned, root=root)
+        manifest[name] = {
+            "path": path,
+            "rows": len(frame),
+            "columns": list(frame.columns),
+            "partitioned_by_month": partitioned,
+            "bytes": _dir_size(os.path.join(root, path)),
+        }
+
+    # The switch: deterministic summary, also used as the pipeline stage output
+    tmp = os.path.join(root, f"manifest.json.tmp-{os.getpid()}")
+    with open(tmp, "w") as fh:
+        json.dump(manifest, fh, indent=2)
+    os.replace(tmp, os.path.join(root, "manifest.json"))
+
+    # readers that resolved the previous manifest may still be reading it
+    for name, entry in manifest.items():
+        keep = {entry["path"], previous.get(name, {}).get("path")}
+        _remove_old_versions(name, keep, root)
+    return manifest
+
+
+# -------------------------------------------------
+# READ
+# -------------------------------------------------
+def _partitions(name, start=None, end=None, root=STORE_DIR):
+    base = dataset_dir(name, root)
+    if not os.path.isdir(base):
+        raise FileNotFoundError(f"Dataset '{name}' not found in {root}")
+
+    entries = sorted(os.listdir(base))
+    if not any(e.startswith("month=") for e in entries):
+        return [os.path.join(base, e) for e in entries if e.endswith(".parquet")]
+
+    lo = pd.Timestamp(start).to_period("M") if start is not None else None
+    hi = pd.Timestamp(end).to_period("M") if end is not None else None
+    paths = []
+    for entry in entries:
+        month = pd.Period(entry.split("=", 1)[1], freq="M")
+        if (lo is None or month >= lo) and (hi is None or month <= hi):
+            paths.append(os.path.join(base, entry, "part-0.parquet"))
+    return paths
+
+
+def read_dataset(name, columns=None, start=None, end=None, root=STORE_DIR):
+    """
+    Load `columns` of dataset `name` for [start, end).
+    Only month partitions overlapping the range are opened.
+    """
+    paths = _partitions(name, start, end, root)
+    file_schema = pq.read_schema(paths[0]) if paths else None
+    timed = file_schema is not None and TIME_COL in file_schema.names
+    virtual = VIRTUAL_COLUMNS.get(name, {})
+
+    cols = None
+    if columns is not None:
+        cols = [TIME_COL] if timed else []
+        for col in columns:
+            source = virtual[col][0] if col in virtual else col
+            if source != TIME_COL and source not in cols:
+                cols.append(source)
+
+    filters = []
+    if timed and start is not None:
+        filters.append((TIME_COL, ">=", pd.Timestamp(start)))
+    if timed and end is not None:
+        filters.append((TIME_COL, "<", pd.Timestamp(end)))
+
+    tables = [pq.read_table(p, columns=cols, filters=filters or None) for p in paths]
+    if not tables:
+        return pd.DataFrame(columns=columns or [])
+
+    df = pa.concat_tables(tables, promote_options="default").to_pandas()
+    for col, (source, scale) in virtual.items():
+        if source in df.columns and (columns is None or col in columns):
+            df[col] = df[source] * scale
+
+    if columns is not None:
+        df = df[([TIME_COL] if timed else []) + [c for c in columns if c != TIME_COL]]
+    return df.set_index(TIME_COL) if timed else df
+
+
+def export_csv(name, path, columns=None, start=None, end=None, root=STORE_DIR):
+    """On-demand CSV view of (part of) a dataset."""
+    df = read_dataset(name, columns, start, end, root)
+    df.to_csv(path, index=TIME_COL in (df.index.name or ""))
+    return path
+
+
+# -------------------------------------------------
+# MEASUREMENT
+# -------------------------------------------------
+def _dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(d, f))
+        for d, _, files in os.walk(path)
+        for f in files
+    )
+
+
+def build():
+    """Rebuild the store from the adjusted baseline (non-fused pipeline)."""
+    # Imported here: savings_engine writes the store itself after each run
+    from savings_engine import INPUT_CSV, compute_derived, compute_monthly_md
+    from rollup_cube import load_clean, CLEAN_CSV
+
+    print("🔹 Loading adjusted baseline results...")
+    step("read_csv")
+    df = schema.read_csv(INPUT_CSV, "adjusted")
+    df = df.sort_values("DateTime").set_index("DateTime")
+    rows(len(df))
+    step("read_clean")
+    clean = load_clean() if os.path.exists(CLEAN_CSV) else None
+
+    step("derive", rows=len(df))
+    derived, monthly_md = compute_derived(df), compute_monthly_md(df)
+
+    print("🔹 Writing results store...")
+    step("write_store", rows=len(derived))
+    write_results(df, derived, monthly_md, clean)
+    print(f"✅ Results store saved to: {STORE_DIR}")
+
+
+def measure():
+    """Disk footprint and load time: Reporting_*.csv vs the store."""
+    csvs = sorted(
+        os.path.join(DATA_DIR, f) for f in os.listdir(DATA_DIR)
+        if f.startswith("Reporting_") and f.endswith(".csv")
+    )
+    csv_bytes = sum(os.path.getsize(p) for p in csvs)
+    manifest = read_manifest()
+    store_bytes = sum(_dir_size(dataset_dir(name, manifest=manifest)) for name in manifest)
+
+    start = time.perf_counter()
+    for path in csvs:
+        pd.read_csv(path)
+    csv_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for name in sorted(manifest):
+        read_dataset(name)
+    store_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    read_dataset("savings", ["Savings Energy (kWh)"], "2024-07-01", "2024-08-01")
+    slice_load = time.perf_counter() - start
+
+    print("📊 Results store vs CSV outputs")
+    print(f"   CSV files   : {len(csvs)} files, {csv_bytes / 1e6:.2f} MB, full load {csv_load:.3f}s")
+    print(f"   Store       : {store_bytes / 1e6:.2f} MB, full load {store_load:.3f}s")
+    print(f"   1 column x 1 month from store: {slice_load * 1000:.1f} ms")
+    print(f"   Footprint ratio: {csv_bytes / max(store_bytes, 1):.1f}x smaller")
+
+
+@stage("store")
+def main():
+    parser = argparse.ArgumentParser(description="Columnar results store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("build", help="rebuild the store from the adjusted baseline")
+    sub.add_parser("measure", help="compare disk footprint and load time with the CSVs")
+
+    exp = sub.add_parser("export", help="write a CSV view of a dataset")
+    exp.add_argument("dataset")
+    exp.add_argument("--out", required=True)
+    exp.add_argument("--columns", nargs="+")
+    exp.add_argument("--start")
+    exp.add_argument("--end")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build()
+    elif args.command == "measure":
+        measure()
+    else:
+        export_csv(args.dataset, args.out, args.columns, args.start, args.end)
+        print(f"✅ CSV export saved to: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
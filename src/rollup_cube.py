@@ -0,0 +1,243 @@
+# src/rollup_cube.py
+"""
+Pre-aggregated rollup cube for reporting-period KPIs.
+
+Holds, on a regular 30-min grid:
+- cumulative prefix arrays (energy savings, C1/TOU cost savings, CO2,
+  negative-savings count, data-quality counts, actual/baseline energy)
+- daily / weekly / monthly aggregates by TOU period and day type
+
+Any date-range KPI is answered in O(1): the grid is regular, so a timestamp
+maps to a slot by arithmetic and a range total is prefix[j] - prefix[i].
+
+Written by savings_engine.py to data/Reporting_Rollup_Cube.npz.
+RUN (standalone rebuild): python src/rollup_cube.py
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from cost_savings_tou import TOU_TARIFF
+from tariff_engine import get_tariff
+import schema
+from instrumentation import stage, step, rows
+
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+CUBE_NPZ = os.path.join(DATA_DIR, "Reporting_Rollup_Cube.npz")
+CLEAN_CSV = os.path.join(DATA_DIR, "Reporting_Clean_30min.csv")
+
+STEP = pd.Timedelta(minutes=30)
+INTERVAL_HOURS = 0.5
+
+# Prefix measures -> source column in the derived / clean frames
+SAVINGS_MEASURES = {
+    "energy_kwh": "Savings Energy (kWh)",
+    "c1_cost_rm": "Cost Savings (RM)",
+    "tou_cost_rm": "TOU Cost Savings (RM)",
+    "co2_kg": "CO2 Avoided (kg)",
+    "negative_count": "Negative Savings Flag",
+}
+QUALITY_MEASURES = {
+    "interpolated_count": "Interpolated Flag",
+    "outage_count": "Outage Flag",
+    "valid_count": "Valid Data Flag",
+}
+AGG_MEASURES = ["energy_kwh", "c1_cost_rm", "tou_cost_rm", "co2_kg", "negative_count", "interval_count"]
+AGG_FREQS = {"daily": "D", "weekly": "W", "monthly": "M"}
+DAY_TYPES = np.array(["weekday", "saturday", "sunday", "holiday"])
+
+
+# -------------------------------------------------
+# BUILD
+# -------------------------------------------------
+def _day_types(index, holidays):
+    dow = index.dayofweek.to_numpy()
+    code = np.where(dow == 5, 1, np.where(dow == 6, 2, 0))
+    if len(holidays):
+        days = index.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+        code = np.where(np.isin(days, holidays), 3, code)
+    return code
+
+
+def build_cube(derived, clean=None):
+    """
+    derived: savings_engine.compute_derived() output (DateTime index)
+             plus "Actual Power (kW)" / "Adjusted Baseline Power (kW)".
+    clean:   Reporting_Clean_30min frame (DateTime index) for data quality.
+    Returns a dict of arrays ready for np.savez.
+    """
+    starts = [derived.index.min()] + ([clean.index.min()] if clean is not None else [])
+    ends = [derived.index.max()] + ([clean.index.max()] if clean is not None else [])
+    grid = pd.date_range(min(starts), max(ends), freq=STEP, name="DateTime")
+    n = len(grid)
+
+    def on_grid(series):
+        return series[~series.index.duplicated()].reindex(grid)
+
+    present = on_grid(pd.Series(1.0, index=derived.index)).notna().to_numpy()
+    values = {"interval_count": present.astype(float)}
+    for key, col in SAVINGS_MEASURES.items():
+        values[key] = np.nan_to_num(on_grid(derived[col].astype(float)).to_numpy())
+    values["actual_kwh"] = np.nan_to_num(on_grid(derived["Actual Power (kW)"]).to_numpy()) * INTERVAL_HOURS
+    values["baseline_kwh"] = np.nan_to_num(
+        on_grid(derived["Adjusted Baseline Power (kW)"]).to_numpy()
+    ) * INTERVAL_HOURS
+
+    if clean is not None:
+        values["clean_count"] = on_grid(pd.Series(1.0, index=clean.index)).notna().to_numpy().astype(float)
+        for key, col in QUALITY_MEASURES.items():
+            values[key] = np.nan_to_num(on_grid(clean[col].astype(float)).to_numpy())
+
+    cube = {
+        "t0_ns": np.array(grid[0].value, dtype=np.int64),
+        "step_ns": np.array(STEP.value, dtype=np.int64),
+        "n": np.array(n, dtype=np.int64),
+    }
+    for key, arr in values.items():
+        prefix = np.zeros(n + 1)
+        np.cumsum(arr, out=prefix[1:])
+        cube[f"prefix_{key}"] = prefix
+
+    # ---- aggregates by TOU period and day type ----
+    tariff = get_tariff(TOU_TARIFF)
+    _, period_code = tariff.codes(grid)
+    day_code = _day_types(grid, tariff.holidays)
+    cube["tou_periods"] = np.array(tariff.periods)
+    cube["day_types"] = DAY_TYPES
+
+    frame = pd.DataFrame({k: values[k] for k in AGG_MEASURES}, index=grid)
+    frame["tou_period"] = period_code
+    frame["day_type"] = day_code
+
+    for name, freq in AGG_FREQS.items():
+        bucket = grid.to_period(freq).start_time
+        agg = frame.groupby([bucket, "tou_period", "day_type"]).sum()
+        agg = agg[agg["interval_count"] > 0]
+        cube[f"agg_{name}_start"] = (
+            agg.index.get_level_values(0).to_numpy(dtype="datetime64[ns]").view("i8")
+        )
+        cube[f"agg_{name}_tou_period"] = agg.index.get_level_values(1).to_numpy()
+        cube[f"agg_{name}_day_type"] = agg.index.get_level_values(2).to_numpy()
+        for key in AGG_MEASURES:
+            cube[f"agg_{name}_{key}"] = agg[key].to_numpy()
+
+    return cube
+
+
+def save_cube(cube, path=CUBE_NPZ):
+    np.savez_compressed(path, **cube)
+
+
+# -------------------------------------------------
+# QUERY API
+# -------------------------------------------------
+class RollupCube:
+    def __init__(self, arrays):
+        self._a = arrays
+        self.t0 = int(arrays["t0_ns"])
+        self.step = int(arrays["step_ns"])
+        self.n = int(arrays["n"])
+        self.measures = [k[len("prefix_"):] for k in arrays if k.startswith("prefix_")]
+
+    @classmethod
+    def load(cls, path=CUBE_NPZ):
+        with np.load(path, allow_pickle=False) as npz:
+            return cls({k: npz[k] for k in npz.files})
+
+    @property
+    def start(self):
+        return pd.Timestamp(self.t0)
+
+    @property
+    def end(self):
+        return pd.Timestamp(self.t0 + (self.n - 1) * self.step)
+
+    def _slot(self, ts, ceil):
+        offset = pd.Timestamp(ts).value - self.t0
+        slot = -(-offset // self.step) if ceil else offset // self.step
+        return int(min(max(slot, 0), self.n))
+
+    def range_total(self, measure, start, end):
+        """Sum of `measure` over [start, end). O(1)."""
+        i, j = self._slot(start, ceil=True), self._slot(end, ceil=True)
+        prefix = self._a[f"prefix_{measure}"]
+        return float(prefix[j] - prefix[i]) if j > i else 0.0
+
+    def range_kpis(self, start, end):
+        """Dashboard KPIs over [start, end) from prefix differences."""
+        t = {m: self.range_total(m, start, end) for m in self.measures}
+        intervals = t.get("interval_count", 0.0)
+        clean = t.get("clean_count", 0.0)
+
+        def pct(num, den):
+            return 100 * num / den if den else float("nan")
+
+        return {
+            "energy_savings_kwh": t["energy_kwh"],
+            "cost_savings_c1_rm": t["c1_cost_rm"],
+            "cost_savings_tou_rm": t["tou_cost_rm"],
+            "co2_avoided_tonnes": t["co2_kg"] / 1000,
+            "negative_savings_pct": pct(t["negative_count"], intervals),
+            "interpolated_pct": pct(t.get("interpolated_count", 0.0), clean),
+            "outage_pct": pct(t.get("outage_count", 0.0), clean),
+            "valid_pct": pct(t.get("valid_count", 0.0), clean),
+            "intervals": intervals,
+        }
+
+    def aggregates(self, freq="monthly"):
+        """Pre-computed aggregates by TOU period and day type."""
+        prefix = f"agg_{freq}_"
+        out = pd.DataFrame({
+            key[len(prefix):]: self._a[key] for key in self._a if key.startswith(prefix)
+        })
+        out["start"] = pd.to_datetime(out["start"].to_numpy().view("datetime64[ns]"))
+        out["tou_period"] = self._a["tou_periods"][out["tou_period"].to_numpy()]
+        out["day_type"] = self._a["day_types"][out["day_type"].to_numpy()]
+        return out
+
+
+def load_clean(path=CLEAN_CSV):
+    clean = schema.read_csv(path, "clean")
+    return clean.sort_values("DateTime").set_index("DateTime")
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+@stage("rollup")
+def main():
+    # Imported here: savings_engine itself writes the cube after each run
+    from savings_engine import INPUT_CSV, compute_derived
+
+    print("🔹 Loading adjusted baseline and clean reporting data...")
+    step("read_csv")
+    df = schema.read_csv(INPUT_CSV, "adjusted")
+    df = df.sort_values("DateTime").set_index("DateTime")
+    rows(len(df))
+    step("derive", rows=len(df))
+    derived = pd.concat([df, compute_derived(df)], axis=1)
+
+    print("🔹 Building rollup cube...")
+    step("read_clean")
+    clean = load_clean()
+    rows(len(clean))
+    step("build", rows=len(derived))
+    cube = build_cube(derived, clean)
+    step("write_npz")
+    save_cube(cube)
+    step("report")
+    cube = RollupCube.load()
+
+    print(f"✅ Rollup cube saved to: {CUBE_NPZ}")
+    print(cube.range_kpis(cube.start, cube.end + STEP))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 # src/savings_calculation.py
 
 import os
-import pandas as pd
-import numpy as np
+
+from instrumentation import stage, step, rows
 
 # -------------------------------------------------
 # PATH CONFIGURATION
@@ -18,36 +18,31 @@ INTERVAL_HOURS = 0.5  # 30-minute data
 # -------------------------------------------------
 # MAIN PROCESS
 # -------------------------------------------------
+@stage("savings")
 def main():
+    # Imported here: savings_engine imports this module's constants
+    from savings_engine import LEGACY_SAVINGS_CSV, legacy_frames, read_exact
+
     print("🔹 Loading adjusted baseline results...")
-    df = pd.read_csv(INPUT_CSV, parse_dates=["DateTime"])
-    df = df.sort_values("DateTime").set_index("DateTime")
+    step("read_csv")
+    df = read_exact(INPUT_CSV)
+    rows(len(df))
 
     # -------------------------------------------------
-    # Savings calculations
+    # Savings calculations (float64, as savings_engine --legacy):
+    # power and interval energy savings, cumulative energy savings,
+    # negative savings flag
     # -------------------------------------------------
     print("🔹 Calculating savings...")
-
-    # Instantaneous power savings (kW)
-    df["Savings Power (kW)"] = (
-        df["Adjusted Baseline Power (kW)"] - df["Actual Power (kW)"]
-    )
-
-    # Interval energy savings (kWh)
-    df["Savings Energy (kWh)"] = df["Savings Power (kW)"] * INTERVAL_HOURS
-
-    # Cumulative energy savings
-    df["Cumulative Savings Energy (kWh)"] = df["Savings Energy (kWh)"].cumsum()
-
-    # -------------------------------------------------
-    # Optional: Flag negative savings
-    # -------------------------------------------------
-    df["Negative Savings Flag"] = (df["Savings Energy (kWh)"] < 0).astype(int)
+    step("compute", rows=len(df))
+    df = legacy_frames(df)[LEGACY_SAVINGS_CSV]
 
     # -------------------------------------------------
     # Save output
     # -------------------------------------------------
+    step("write_csv", rows=len(df))
     df.to_csv(OUTPUT_CSV)
+    step("report")
 
     print(f"✅ Savings file saved to: {OUTPUT_CSV}")
     print(df.head())
@@ -0,0 +1,282 @@
+# src/savings_engine.py
+"""
+Fused single-pass savings engine.
+
+Replaces the chain
+    savings_calculation -> cost_savings_calculation / cost_savings_tou
+    -> co2_avoidance_calculation -> compare_c1_vs_tou
+    + md_savings_calculation
+with one load of Reporting_AdjustedBaseline_GRU.csv and one vectorised pass.
+
+Outputs:
+- Reporting_Rollup_Cube.npz      (prefix sums + aggregates, see rollup_cube.py)
+- store/                         (columnar results store, see results_store.py;
+                                  what the dashboards and reports read)
+
+CSV outputs are opt-in:
+--csv     Reporting_Savings_Derived.csv (interval-level derived columns only)
+          and Reporting_MD_Savings.csv (monthly MD, unchanged layout)
+--legacy  the per-stage CSVs in their original layouts, for backward
+          compatibility
+
+RUN: python src/savings_engine.py [--csv] [--legacy]
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+import schema
+from savings_calculation import INTERVAL_HOURS
+from cost_savings_calculation import C1_TARIFF
+from cost_savings_tou import TOU_TARIFF
+from tariff_engine import get_tariff
+from co2_avoidance_calculation import GRID_EMISSION_FACTOR
+from md_savings_calculation import TOTAL_MD_CHARGE, BILLING_CYCLE_START_DAY, MD_WINDOW
+from md_engine import MaximumDemandTracker
+from rollup_cube import build_cube, save_cube, load_clean, CUBE_NPZ, CLEAN_CSV
+from results_store import write_results, STORE_DIR
+from instrumentation import stage, step, rows
+
+# -------------------------------------------------
+# PATH CONFIGURATION
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+INPUT_CSV = os.path.join(DATA_DIR, "Reporting_AdjustedBaseline_GRU.csv")
+DERIVED_CSV = os.path.join(DATA_DIR, "Reporting_Savings_Derived.csv")
+MD_CSV = os.path.join(DATA_DIR, "Reporting_MD_Savings.csv")
+
+# Opt-in CSV outputs: DERIVED_CSV / MD_CSV with --csv, the legacy
+# per-stage outputs with --legacy
+LEGACY_SAVINGS_CSV = os.path.join(DATA_DIR, "Reporting_Savings_GRU.csv")
+LEGACY_C1_CSV = os.path.join(DATA_DIR, "Reporting_CostSavings_C1.csv")
+LEGACY_TOU_CSV = os.path.join(DATA_DIR, "Reporting_CostSavings_TOU.csv")
+LEGACY_CO2_CSV = os.path.join(DATA_DIR, "Reporting_CO2_Avoidance_GRU.csv")
+LEGACY_COMPARE_CSV = os.path.join(DATA_DIR, "Reporting_Cost_C1_vs_TOU.csv")
+LEGACY_CSVS = [LEGACY_SAVINGS_CSV, LEGACY_C1_CSV, LEGACY_TOU_CSV, LEGACY_CO2_CSV, LEGACY_COMPARE_CSV]
+
+# -------------------------------------------------
+# COLUMN GROUPS (match the legacy stage outputs)
+# -------------------------------------------------
+INPUT_COLS = ["Actual Power (kW)", "Adjusted Baseline Power (kW)"]
+
+SAVINGS_COLS = [
+    "Savings Power (kW)",
+    "Savings Energy (kWh)",
+    "Cumulative Savings Energy (kWh)",
+    "Negative Savings Flag",
+]
+C1_COLS = [
+    "Cost Savings (RM)",
+    "Cumulative Cost Savings (RM)",
+    "Negative Cost Savings Flag",
+]
+TOU_COLS = [
+    "TOU Period",
+    "TOU Rate (RM/kWh)",
+    "TOU Cost Savings (RM)",
+    "Cumulative TOU Cost Savings (RM)",
+    "Negative TOU Savings Flag",
+]
+CO2_COLS = [
+    "CO2 Avoided (kg)",
+    "Cumulative CO2 Avoided (kg)",
+    "Cumulative CO2 Avoided (tonnes)",
+]
+CUMULATIVE_COLS = [
+    "Cumulative Savings Energy (kWh)",
+    "Cumulative Cost Savings (RM)",
+    "Cumulative TOU Cost Savings (RM)",
+    "Cumulative CO2 Avoided (kg)",
+]
+
+
+# -------------------------------------------------
+# VECTORISED CALCULATIONS
+# -------------------------------------------------
+def compute_derived(df, carry=None, exact=False):
+    """
+    All interval-level savings, cost, TOU and CO2 columns in one pass.
+    df: DateTime-indexed frame with Actual / Adjusted Baseline Power (kW).
+    carry: {cumulative column: total so far} to continue the running
+           totals from (incremental updates); totals start at 0 otherwise.
+    exact: keep every value float64, as the per-stage scripts computed
+           them (legacy outputs; df should then be read as float64 too).
+    """
+    carry = carry or {}
+    actual = df["Actual Power (kW)"].to_numpy(dtype=float)
+    baseline = df["Adjusted Baseline Power (kW)"].to_numpy(dtype=float)
+
+    # Interval values are narrowed to float32 (schema.MEASURE) before the
+    # running totals, so each total is the float64 sum of the stored values
+    def measure(values):
+        return np.asarray(values).astype(schema.TOTAL if exact else schema.MEASURE)
+
+    savings_kw = measure(baseline - actual)
+    savings_kwh = measure(savings_kw * INTERVAL_HOURS)
+
+    _, c1_rate = get_tariff(C1_TARIFF).assign(df.index)
+    period, tou_rate = get_tariff(TOU_TARIFF).assign(df.index)
+
+    c1_cost = measure(savings_kwh * c1_rate)
+    tou_cost = measure(savings_kwh * tou_rate)
+    co2_kg = measure(savings_kwh * GRID_EMISSION_FACTOR)
+
+    def cumsum(values, col):
+        start = np.array([carry.get(col, 0.0)], dtype=schema.TOTAL)
+        return schema.cumsum(np.concatenate([start, values]))[1:]
+
+    cum_co2_kg = cumsum(co2_kg, "Cumulative CO2 Avoided (kg)")
+
+    frame = pd.DataFrame(
+        {
+            "Savings Power (kW)": savings_kw,
+            "Savings Energy (kWh)": savings_kwh,
+            "Cumulative Savings Energy (kWh)": cumsum(savings_kwh, "Cumulative Savings Energy (kWh)"),
+            "Negative Savings Flag": (savings_kwh < 0).astype(int),
+            "Cost Savings (RM)": c1_cost,
+            "Cumulative Cost Savings (RM)": cumsum(c1_cost, "Cumulative Cost Savings (RM)"),
+            "Negative Cost Savings Flag": (c1_cost < 0).astype(int),
+            "TOU Period": period,
+            "TOU Rate (RM/kWh)": tou_rate,
+            "TOU Cost Savings (RM)": tou_cost,
+            "Cumulative TOU Cost Savings (RM)": cumsum(tou_cost, "Cumulative TOU Cost Savings (RM)"),
+            "Negative TOU Savings Flag": (tou_cost < 0).astype(int),
+            "CO2 Avoided (kg)": co2_kg,
+            "Cumulative CO2 Avoided (kg)": cum_co2_kg,
+            "Cumulative CO2 Avoided (tonnes)": cum_co2_kg / 1000,
+        },
+        index=df.index,
+    )
+    return frame if exact else schema.apply(frame, "derived")
+
+
+def running_totals(derived, carry=None):
+    """
+    Last running total of each cumulative column (the carry for the next
+    rows). Columns with no value in `derived` keep their `carry` total.
+    """
+    carry = carry or {}
+    return {
+        col: float(derived[col].dropna().iloc[-1]) if derived[col].notna().any() else carry.get(col, 0.0)
+        for col in CUMULATIVE_COLS
+    }
+
+
+def compute_monthly_md(df):
+    """Monthly MD savings (same engine as md_savings_calculation)."""
+    tracker = MaximumDemandTracker(TOTAL_MD_CHARGE, BILLING_CYCLE_START_DAY, MD_WINDOW)
+    tracker.update(df)
+    return schema.apply(tracker.to_frame(), "md")
+
+
+# -------------------------------------------------
+# LEGACY EXPORTS
+# -------------------------------------------------
+def read_exact(input_csv=INPUT_CSV):
+    """
+    The adjusted baseline (or a per-stage CSV) in float64. round_trip
+    parsing gives back exactly the floats that were written, so a stage
+    that reads another stage's CSV computes what --legacy computes.
+    """
+    df = pd.read_csv(input_csv, parse_dates=["DateTime"], float_precision="round_trip")
+    return df.sort_values("DateTime").set_index("DateTime")
+
+
+def legacy_frames(df, carry=None):
+    """
+    {path: frame} for the per-stage CSVs in their original column layouts
+    and values: df is read_exact()'s float64 frame, derived in float64
+    (carry: running totals to continue, as for compute_derived).
+    """
+    full = pd.concat([df[INPUT_COLS], compute_derived(df, carry, exact=True)], axis=1)
+
+    return {
+        LEGACY_SAVINGS_CSV: full[INPUT_COLS + SAVINGS_COLS],
+        LEGACY_C1_CSV: full[INPUT_COLS + SAVINGS_COLS + C1_COLS],
+        LEGACY_TOU_CSV: full[INPUT_COLS + SAVINGS_COLS + TOU_COLS],
+        LEGACY_CO2_CSV: full[INPUT_COLS + SAVINGS_COLS + CO2_COLS],
+        LEGACY_COMPARE_CSV: full[["Cumulative Cost Savings (RM)", "Cumulative TOU Cost Savings (RM)"]].rename(
+            columns={
+                "Cumulative Cost Savings (RM)": "C1 Cumulative Cost Savings (RM)",
+                "Cumulative TOU Cost Savings (RM)": "TOU Cumulative Cost Savings (RM)",
+            }
+        ),
+    }
+
+
+def write_legacy_outputs(input_csv=INPUT_CSV):
+    """Write the per-stage CSVs in their original column layouts."""
+    frames = legacy_frames(read_exact(input_csv))
+    for path, frame in frames.items():
+        frame.to_csv(path)
+    return list(frames)
+
+
+# -------------------------------------------------
+# MAIN PROCESS
+# -------------------------------------------------
+def run(input_csv=INPUT_CSV, legacy=False, csv=False):
+    print("🔹 Loading adjusted baseline results...")
+    step("read_csv")
+    df = schema.read_csv(input_csv, "adjusted")
+    df = df.sort_values("DateTime").set_index("DateTime")
+    rows(len(df))
+
+    print("🔹 Computing savings, C1/TOU cost, CO₂ and MD in one pass...")
+    step("derive", rows=len(df))
+    derived = compute_derived(df)
+    step("monthly_md", rows=len(df))
+    monthly_md = compute_monthly_md(df)
+
+    print("🔹 Building rollup cube...")
+    step("rollup_cube")
+    clean = load_clean(CLEAN_CSV) if os.path.exists(CLEAN_CSV) else None
+    save_cube(build_cube(pd.concat([df[INPUT_COLS], derived], axis=1), clean), CUBE_NPZ)
+    print(f"✅ Rollup cube saved to: {CUBE_NPZ}")
+
+    step("results_store")
+    write_results(df, derived, monthly_md, clean, STORE_DIR)
+    print(f"✅ Results store saved to: {STORE_DIR}")
+
+    if csv:
+        step("write_csv", rows=len(derived))
+        derived.to_csv(DERIVED_CSV)
+        monthly_md.to_csv(MD_CSV, index=False)
+        print(f"✅ Derived savings saved to: {DERIVED_CSV}")
+        print(f"✅ Monthly MD savings saved to: {MD_CSV}")
+
+    if legacy:
+        step("legacy_csv", rows=len(derived))
+        for path in write_legacy_outputs(input_csv):
+            print(f"✅ Legacy output saved to: {path}")
+
+    return derived, monthly_md
+
+
+@stage("savings_engine")
+def main():
+    parser = argparse.ArgumentParser(description="Fused M&V savings engine")
+    parser.add_argument(
+        "--csv",
+        action="store_true",
+        help="also write Reporting_Savings_Derived.csv and Reporting_MD_Savings.csv",
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="also write the per-stage CSVs in their original layouts",
+    )
+    args = parser.parse_args()
+
+    derived, _ = run(legacy=args.legacy, csv=args.csv)
+    step("report")
+    print(derived.tail())
+
+
+if __name__ == "__main__":
+    main()
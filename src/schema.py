@@ -0,0 +1,307 @@
+# src/schema.py
+"""
+Declared column dtypes for every pipeline dataset.
+
+- FLAG      uint8     0/1 quality, calendar and negative-savings flags
+- MEASURE   float32   interval measurements (kW, kWh, RM, kg)
+- TOTAL     float64   running totals and monthly money, which float32
+                      cannot hold to FLOAT32_ABS_TOL once they grow
+- READING   float64   raw meter Wh values (rollover readings reach 1e12
+                      and are kept in the clean output)
+- CALENDAR  int8      Day / Hour / Time features
+- LABEL     category  repeated labels (TOU Period)
+
+Loaders call read_csv(path, dataset): float and label columns are parsed
+straight into their schema dtype (no float64 intermediate), flags and
+calendar features are narrowed after parsing (CSV flags arrive as 0/1,
+1.0 or True/False). Stages call apply() on frames they build before
+writing them, and cumsum() for running totals, which always accumulates
+in float64.
+
+Integer columns that contain NaN cannot be uint8 / int8; they fall back
+to float32 for that frame.
+
+RUN (load time / memory / precision report for data/):
+    python src/schema.py
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# -------------------------------------------------
+# DTYPES
+# -------------------------------------------------
+FLAG = "uint8"
+MEASURE = "float32"
+TOTAL = "float64"
+READING = "float64"
+CALENDAR = "int8"
+LABEL = "category"
+
+FLOAT32_ABS_TOL = 1e-3  # same tolerance as results_store
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"  # time columns as the stages write them, midnight included
+
+COLUMN_TYPES = {
+    # calendar features
+    "Day": CALENDAR,
+    "Hour": CALENDAR,
+    "Time": CALENDAR,
+    # flags
+    "Lecture/Non-lecture": FLAG,
+    "Public Holiday": FLAG,
+    "Semester Break": FLAG,
+    "Semester : Lecture/Office": FLAG,
+    "Energy_Rejected_Flag": FLAG,
+    "Interpolated Flag": FLAG,
+    "Outage Flag": FLAG,
+    "Valid Data Flag": FLAG,
+    "Negative Savings Flag": FLAG,
+    "Negative Cost Savings Flag": FLAG,
+    "Negative TOU Savings Flag": FLAG,
+    # raw meter readings (Wh)
+    "import_energy": READING,
+    "export_energy": READING,
+    "self_consume": READING,
+    # interval measurements
+    "Energy (kWh)": MEASURE,
+    "Power (kW)": MEASURE,
+    "Load Consumption (kW)": MEASURE,
+    "Day Lagged Load": MEASURE,
+    "Week Lagged Load": MEASURE,
+    "Actual Power (kW)": MEASURE,
+    "Adjusted Baseline Power (kW)": MEASURE,
+    "Savings Power (kW)": MEASURE,
+    "Savings Energy (kWh)": MEASURE,
+    "Cost Savings (RM)": MEASURE,
+    "TOU Rate (RM/kWh)": MEASURE,
+    "TOU Cost Savings (RM)": MEASURE,
+    "CO2 Avoided (kg)": MEASURE,
+    "Actual_MD_kW": MEASURE,
+    "Baseline_MD_kW": MEASURE,
+    "MD Savings (kW)": MEASURE,
+    # running totals / monthly money
+    "Cumulative Savings Energy (kWh)": TOTAL,
+    "Cumulative Cost Savings (RM)": TOTAL,
+    "Cumulative TOU Cost Savings (RM)": TOTAL,
+    "Cumulative CO2 Avoided (kg)": TOTAL,
+    "Cumulative CO2 Avoided (tonnes)": TOTAL,
+    "C1 Cumulative Cost Savings (RM)": TOTAL,
+    "TOU Cumulative Cost Savings (RM)": TOTAL,
+    "MD Cost Savings (RM)": TOTAL,
+    # labels
+    "TOU Period": LABEL,
+}
+
+_FEATURES = [
+    "Day", "Hour", "Lecture/Non-lecture", "Public Holiday", "Semester Break",
+    "Semester : Lecture/Office", "Day Lagged Load", "Week Lagged Load",
+    "Load Consumption (kW)", "Time",
+]
+_CLEAN = [
+    "import_energy", "self_consume", "Energy (kWh)", "Power (kW)",
+    "Energy_Rejected_Flag", "Interpolated Flag", "Outage Flag", "Valid Data Flag",
+]
+_ADJUSTED = ["Actual Power (kW)", "Adjusted Baseline Power (kW)"]
+_SAVINGS = _ADJUSTED + [
+    "Savings Power (kW)", "Savings Energy (kWh)", "Cumulative Savings Energy (kWh)",
+    "Negative Savings Flag",
+]
+_DERIVED = [
+    "Savings Power (kW)", "Savings Energy (kWh)", "Cumulative Savings Energy (kWh)",
+    "Negative Savings Flag", "Cost Savings (RM)", "Cumulative Cost Savings (RM)",
+    "Negative Cost Savings Flag", "TOU Period", "TOU Rate (RM/kWh)", "TOU Cost Savings (RM)",
+    "Cumulative TOU Cost Savings (RM)", "Negative TOU Savings Flag", "CO2 Avoided (kg)",
+    "Cumulative CO2 Avoided (kg)", "Cumulative CO2 Avoided (tonnes)",
+]
+
+# dataset -> (file in data/, time column or None, columns)
+DATASETS = {
+    "raw": ("ReportingPeriodData.csv", "time", ["import_energy", "export_energy", "self_consume"]),
+    "baseline": ("PenangBaselineData.csv", "DateTime", _FEATURES),
+    "clean": ("Reporting_Clean_30min.csv", "DateTime", _CLEAN),
+    "gru_ready": ("Reporting_GRU_Ready.csv", "DateTime", _FEATURES + [
+        "import_energy", "self_consume", "Energy (kWh)",
+        "Energy_Rejected_Flag", "Interpolated Flag", "Outage Flag", "Valid Data Flag",
+    ]),
+    "adjusted": ("Reporting_AdjustedBaseline_GRU.csv", "DateTime", _ADJUSTED),
+    "savings": ("Reporting_Savings_GRU.csv", "DateTime", _SAVINGS),
+    "cost_c1": ("Reporting_CostSavings_C1.csv", "DateTime", _SAVINGS + [
+        "Cost Savings (RM)", "Cumulative Cost Savings (RM)", "Negative Cost Savings Flag",
+    ]),
+    "cost_tou": ("Reporting_CostSavings_TOU.csv", "DateTime", _SAVINGS + [
+        "TOU Period", "TOU Rate (RM/kWh)", "TOU Cost Savings (RM)",
+        "Cumulative TOU Cost Savings (RM)", "Negative TOU Savings Flag",
+    ]),
+    "co2": ("Reporting_CO2_Avoidance_GRU.csv", "DateTime", _SAVINGS + [
+        "CO2 Avoided (kg)", "Cumulative CO2 Avoided (kg)", "Cumulative CO2 Avoided (tonnes)",
+    ]),
+    "compare": ("Reporting_Cost_C1_vs_TOU.csv", "DateTime", [
+        "C1 Cumulative Cost Savings (RM)", "TOU Cumulative Cost Savings (RM)",
+    ]),
+    "derived": ("Reporting_Savings_Derived.csv", "DateTime", _DERIVED),
+    "md": ("Reporting_MD_Savings.csv", None, [
+        "Actual_MD_kW", "Baseline_MD_kW", "MD Savings (kW)", "MD Cost Savings (RM)",
+    ]),
+}
+
+SCHEMAS = {name: {col: COLUMN_TYPES[col] for col in spec[2]} for name, spec in DATASETS.items()}
+
+_PARSE_AS = (MEASURE, TOTAL, READING, LABEL)  # dtypes read_csv can parse into directly
+
+
+# -------------------------------------------------
+# API
+# -------------------------------------------------
+_FLAG_TEXT = {"True": 1.0, "False": 0.0, "1": 1.0, "0": 0.0, "1.0": 1.0, "0.0": 0.0}
+
+
+def _flag_values(values):
+    """0/1 flags written as True/False (bool, or text in older CSVs) -> 0.0/1.0."""
+    if pd.api.types.is_bool_dtype(values):
+        return values.astype(float)
+    text = values.astype(str).str.strip()
+    numeric = text.map(_FLAG_TEXT).where(~values.isna())
+    bad = numeric.isna() & values.notna()
+    if bad.any():
+        raise ValueError(f"{values.name}: not a 0/1 flag: {text[bad].iloc[0]!r}")
+    return numeric.astype(float)
+
+
+def apply(df, dataset):
+    """Cast the schema columns present in df; other columns are left alone."""
+    mapping = {}
+    for col, dtype in SCHEMAS[dataset].items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        textual = not pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col])
+        if dtype == FLAG and textual:
+            df = df.assign(**{col: _flag_values(df[col])})
+        if dtype in (FLAG, CALENDAR) and df[col].isna().any():
+            dtype = MEASURE  # integer dtypes cannot hold NaN
+        mapping[col] = dtype
+    return df.astype(mapping) if mapping else df
+
+
+def read_csv(path, dataset, **kwargs):
+    """pd.read_csv with the dataset schema applied and its time column parsed."""
+    _, time_col, _ = DATASETS[dataset]
+    usecols = kwargs.get("usecols")
+    dtypes = {
+        col: dtype for col, dtype in SCHEMAS[dataset].items()
+        if dtype in _PARSE_AS and (usecols is None or col in usecols)
+    }
+    if time_col is not None and (usecols is None or time_col in usecols):
+        kwargs.setdefault("parse_dates", [time_col])
+    df = pd.read_csv(path, dtype=dtypes, **kwargs)
+    return apply(df, dataset)
+
+
+def last_time(path):
+    """Timestamp in the first column of a CSV's last row (None without rows), read from the tail."""
+    with open(path, "rb") as fh:
+        header = len(fh.readline())
+        size = fh.seek(0, os.SEEK_END)
+        if size <= header:
+            return None
+        fh.seek(max(size - 4096, header))
+        last = fh.read().splitlines()[-1]
+    return pd.Timestamp(last.split(b",", 1)[0].decode())
+
+
+def cumsum(values):
+    """NaN-aware running total (Series.cumsum semantics), always float64."""
+    if isinstance(values, pd.Series):
+        return values.astype(TOTAL).cumsum()
+    return pd.Series(np.asarray(values, dtype=TOTAL)).cumsum().to_numpy()
+
+
+# -------------------------------------------------
+# MEASUREMENT
+# -------------------------------------------------
+def _load(path, dataset):
+    """(seconds, frame MB, tracemalloc peak MB) for plain and schema loads."""
+    def plain():
+        time_col = DATASETS[dataset][1]
+        return pd.read_csv(path, parse_dates=[time_col] if time_col else None)
+
+    def typed():
+        return read_csv(path, dataset)
+
+    out = []
+    for loader in (plain, typed):
+        start = time.perf_counter()
+        df = loader()
+        seconds = time.perf_counter() - start
+        frame_mb = df.memory_usage(deep=True).sum() / 1e6
+        del df
+
+        tracemalloc.start()
+        loader()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        out.append((seconds, frame_mb, peak_mb))
+    return out
+
+
+def precision_report(path):
+    """
+    Running-total error when interval savings are held as float32:
+    float64 totals over float32 values (what the stages do) and, for
+    comparison, float32 totals.
+    """
+    df64 = pd.read_csv(path)
+    df32 = read_csv(path, "adjusted")
+    ref = (df64["Adjusted Baseline Power (kW)"] - df64["Actual Power (kW)"]) * 0.5
+    s32 = (df32["Adjusted Baseline Power (kW)"] - df32["Actual Power (kW)"]) * 0.5
+
+    ref_total = ref.cumsum()
+    interval_err = (s32.astype(TOTAL) - ref).abs().max()
+    total_err = (cumsum(s32) - ref_total).abs().max()
+    f32_total_err = (s32.cumsum().astype(TOTAL) - ref_total).abs().max()
+    return interval_err, total_err, f32_total_err, ref_total.abs().max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dataset schema: load time / memory report")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+
+    print("📊 CSV loads: plain pd.read_csv vs schema.read_csv")
+    print(f"   {'dataset':<10} {'load s':>15} {'frame MB':>15} {'peak MB':>15}")
+    totals = np.zeros((2, 3))
+    for name, (filename, _, _) in DATASETS.items():
+        path = os.path.join(args.data_dir, filename)
+        if not os.path.exists(path):
+            continue
+        (p_s, p_mb, p_peak), (t_s, t_mb, t_peak) = _load(path, name)
+        totals += [[p_s, p_mb, p_peak], [t_s, t_mb, t_peak]]
+        print(f"   {name:<10} {p_s:>6.3f} -> {t_s:<6.3f} {p_mb:>6.2f} -> {t_mb:<6.2f} "
+              f"{p_peak:>6.1f} -> {t_peak:<6.1f}")
+    (p_s, p_mb, _), (t_s, t_mb, _) = totals
+    print(f"   {'total':<10} {p_s:>6.3f} -> {t_s:<6.3f} {p_mb:>6.2f} -> {t_mb:<6.2f}")
+
+    adjusted = os.path.join(args.data_dir, DATASETS["adjusted"][0])
+    if os.path.exists(adjusted):
+        interval_err, total_err, f32_total_err, largest = precision_report(adjusted)
+        print("📊 Savings precision with float32 interval values "
+              f"(largest running total {largest:,.1f} kWh)")
+        print(f"   interval kWh, max abs error        : {interval_err:.2e}")
+        print(f"   float64 running total, max abs error: {total_err:.2e}")
+        print(f"   float32 running total, max abs error: {f32_total_err:.2e}  (why totals stay float64)")
+        ok = interval_err <= FLOAT32_ABS_TOL
+        print(f"{'✅' if ok else '❌'} interval error within FLOAT32_ABS_TOL ({FLOAT32_ABS_TOL:g})")
+
+
+if __name__ == "__main__":
+    main()
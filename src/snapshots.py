@@ -0,0 +1,196 @@
+# src/snapshots.py
+"""
+Prepared-array snapshots for training and evaluation.
+
+The baseline pipeline (read CSV -> sort -> split by date -> scale -> window)
+is run once and its outputs are stored as plain .npy files under
+cache/snapshots/<key>/, which every entry point loads memory-mapped.
+
+The key is a hash of:
+- PenangBaselineData.csv content
+- feature list and target column
+- SEQ_LEN
+- train/val/test split dates
+- saved x/y scaler files
+
+Any mismatch (new data, new scalers, changed constants) triggers a rebuild.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from data_preproc import (
+    prepare_scaled_baseline,
+    split_slices,
+    create_sequence_windows_from_array,
+    load_scalers,
+    BASELINE_CSV,
+    CACHE_DIR,
+    X_SCALER_PATH,
+    Y_SCALER_PATH,
+    DEFAULT_FEATURES,
+    TARGET_COL,
+    SEQ_LEN,
+    TRAIN_END,
+    VAL_START,
+    VAL_END,
+    TEST_START,
+    TEST_END,
+)
+
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "snapshots")
+MANIFEST_NAME = "manifest.json"
+
+SPLITS = ("train", "val", "test")
+KEEP_SNAPSHOTS = 3
+
+_digest_cache = {}
+
+
+# -------------------------------------------------
+# KEY
+# -------------------------------------------------
+def file_digest(path):
+    """sha256 of a file, memoised on (path, mtime, size) within the process."""
+    if not os.path.exists(path):
+        return "missing"
+
+    stat = os.stat(path)
+    stamp = (path, stat.st_mtime_ns, stat.st_size)
+    if stamp not in _digest_cache:
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        _digest_cache[stamp] = h.hexdigest()
+
+    return _digest_cache[stamp]
+
+
+def snapshot_key():
+    params = {
+        "source": file_digest(BASELINE_CSV),
+        "features": DEFAULT_FEATURES,
+        "target": TARGET_COL,
+        "seq_len": SEQ_LEN,
+        "splits": [TRAIN_END, VAL_START, VAL_END, TEST_START, TEST_END],
+        "x_scaler": file_digest(X_SCALER_PATH),
+        "y_scaler": file_digest(Y_SCALER_PATH),
+    }
+    blob = json.dumps(params, sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16], params
+
+
+# -------------------------------------------------
+# BUILD / LOAD
+# -------------------------------------------------
+def build_snapshot(fit):
+    """
+    Run the preprocessing pipeline once and store every split as .npy:
+    <split>_X / <split>_y        flat rows (ANN)
+    <split>_Xseq / <split>_yseq  SEQ_LEN windows (LSTM/GRU)
+    <split>_index                int64 ns timestamps of the split
+    """
+    scaled, index, _, _ = prepare_scaled_baseline(fit=fit)
+
+    # Scalers may have just been refitted, so key on what is on disk now
+    key, params = snapshot_key()
+    final_dir = os.path.join(SNAPSHOT_DIR, key)
+    tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    for name, rows in split_slices(index).items():
+        block = scaled[rows]
+        X_seq, y_seq = create_sequence_windows_from_array(block, SEQ_LEN)
+
+        np.save(os.path.join(tmp_dir, f"{name}_X.npy"), block[:, :-1])
+        np.save(os.path.join(tmp_dir, f"{name}_y.npy"), block[:, -1:])
+        np.save(os.path.join(tmp_dir, f"{name}_Xseq.npy"), X_seq)
+        np.save(os.path.join(tmp_dir, f"{name}_yseq.npy"), y_seq)
+        np.save(
+            os.path.join(tmp_dir, f"{name}_index.npy"),
+            index[rows].to_numpy(dtype="datetime64[ns]").view("i8"),
+        )
+
+    with open(os.path.join(tmp_dir, MANIFEST_NAME), "w") as fh:
+        json.dump({"key": key, "fitted": bool(fit), "params": params}, fh, indent=2)
+
+    if os.path.exists(final_dir):
+        shutil.rmtree(final_dir)
+    os.replace(tmp_dir, final_dir)
+
+    _prune_snapshots(keep=key)
+    return key
+
+
+def _read_manifest(key):
+    path = os.path.join(SNAPSHOT_DIR, key, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _prune_snapshots(keep):
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return
+    entries = [
+        os.path.join(SNAPSHOT_DIR, d)
+        for d in os.listdir(SNAPSHOT_DIR)
+        if d != keep
+    ]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for path in entries[KEEP_SNAPSHOTS - 1:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def load_snapshot(fit=False):
+    """
+    Return the prepared arrays (memory-mapped) plus scalers.
+
+    fit=False (evaluation): reuse the saved scalers; rebuild on any mismatch.
+    fit=True  (training): additionally require a snapshot whose scalers were
+    fitted on the current data; otherwise refit and rebuild.
+    """
+    key, _ = snapshot_key()
+    manifest = _read_manifest(key)
+
+    if manifest is None or (fit and not manifest.get("fitted")):
+        print("🔹 Prepared-array snapshot missing or stale, rebuilding...")
+        key = build_snapshot(fit=fit or file_digest(X_SCALER_PATH) == "missing")
+    else:
+        print(f"🔹 Using prepared-array snapshot {key}")
+
+    snap_dir = os.path.join(SNAPSHOT_DIR, key)
+    arrays = {}
+    for name in SPLITS:
+        for part in ("X", "y", "Xseq", "yseq"):
+            arrays[f"{name}_{part}"] = np.load(
+                os.path.join(snap_dir, f"{name}_{part}.npy"), mmap_mode="r"
+            )
+        stamps = np.load(os.path.join(snap_dir, f"{name}_index.npy"))
+        arrays[f"{name}_index"] = pd.DatetimeIndex(
+            stamps.view("datetime64[ns]"), name="DateTime"
+        )
+
+    x_scaler, y_scaler = load_scalers()
+    arrays["x_scaler"] = x_scaler
+    arrays["y_scaler"] = y_scaler
+    arrays["key"] = key
+
+    return arrays
+
+
+if __name__ == "__main__":
+    snap = load_snapshot(fit=False)
+    print("✅ Snapshot ready:", os.path.join(SNAPSHOT_DIR, snap["key"]))
+    for name in SPLITS:
+        print(f"   {name}: flat {snap[name + '_X'].shape}, windows {snap[name + '_Xseq'].shape}")
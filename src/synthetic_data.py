@@ -0,0 +1,263 @@
+# src/synthetic_data.py
+"""
+Synthetic 30-min campus load at configurable scale.
+
+For each meter, writes the same files the pipeline reads:
+- PenangBaselineData.csv              (pre-ECM training period, with features)
+- ReportingPeriodData.csv             (raw meter export: time, import_energy,
+                                       export_energy, self_consume in Wh)
+- Reporting_AdjustedBaseline_GRU.csv  (stand-in for the model output, so the
+                                       savings stages run without TensorFlow)
+
+The load has a daily occupancy curve, weekday / weekend / holiday levels,
+semester breaks, an annual season and correlated noise; the reporting period
+has an ECM saving and rooftop solar. The raw reporting export carries the
+defects reporting_preprocessing.py has to handle: short gaps, multi-day
+outages and out-of-range (rollover / negative) readings.
+
+RUN:
+    python src/synthetic_data.py --out /tmp/synth --years 10
+    python src/synthetic_data.py --out /tmp/synth --years 2 --meters 100
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------
+# DEFAULTS
+# -------------------------------------------------
+REPORTING_START = pd.Timestamp("2024-05-01")
+STEP = pd.Timedelta(minutes=30)
+INTERVAL_HOURS = 0.5
+PER_DAY = 48
+WEEK_LAG = PER_DAY * 7
+
+# Same month-day windows as reporting_gru_preprocessor.add_academic_flags,
+# repeated every year
+SEMESTER_BREAKS = [("02-24", "03-23"), ("08-11", "09-28")]
+
+NIGHT_KW = 550.0
+PEAK_KW = 3000.0
+WEEKDAY_OCCUPANCY = np.array([1.0, 1.0, 1.0, 1.0, 1.0, 0.35, 0.15])  # Mon..Sun
+BREAK_OCCUPANCY = 0.6
+HOLIDAYS_PER_YEAR = 12
+SEASON_AMPLITUDE = 0.08
+NOISE_SIGMA = 0.04
+
+ECM_SAVINGS = 0.12
+SOLAR_SHARE = 0.15  # solar capacity / peak load
+MODEL_ERROR = 0.04  # relative noise on the stand-in adjusted baseline
+
+GAP_RATE = 0.002  # short gaps (1-4 intervals) started per interval
+OUTAGES_PER_YEAR = 2  # 1-3 day outages
+SPIKE_RATE = 0.001  # out-of-range readings per interval
+
+
+# -------------------------------------------------
+# LOAD MODEL
+# -------------------------------------------------
+def _semester_break(index):
+    flag = np.zeros(len(index), dtype=bool)
+    month_day = index.strftime("%m-%d")
+    for start, end in SEMESTER_BREAKS:
+        flag |= (month_day >= start) & (month_day <= end)
+    return flag
+
+
+def _holidays(index, rng):
+    """Random weekday holidays, HOLIDAYS_PER_YEAR per calendar year."""
+    days = index.normalize()
+    holidays = []
+    for year in np.unique(index.year):
+        candidates = pd.date_range(f"{year}-01-01", f"{year}-12-31", freq="B")
+        holidays.append(rng.choice(candidates.to_numpy(), HOLIDAYS_PER_YEAR, replace=False))
+    return days.isin(np.concatenate(holidays))
+
+
+def _smooth_noise(n, rng, sigma=NOISE_SIGMA, span=24):
+    """Correlated noise: white noise through an exponential kernel."""
+    kernel = np.exp(-np.arange(span) / (span / 4))
+    kernel /= np.sqrt((kernel ** 2).sum())
+    white = rng.standard_normal(n + span)
+    return sigma * np.convolve(white, kernel, mode="valid")[:n]
+
+
+def campus_load(index, rng, scale=1.0):
+    """Counterfactual (pre-ECM) load in kW on a 30-min index."""
+    hour = index.hour.to_numpy() + index.minute.to_numpy() / 60
+    bump = np.where((hour >= 6) & (hour <= 20), 0.5 * (1 - np.cos(2 * np.pi * (hour - 6) / 14)), 0.0)
+
+    occupancy = WEEKDAY_OCCUPANCY[index.dayofweek.to_numpy()]
+    occupancy = np.where(_semester_break(index), occupancy * BREAK_OCCUPANCY, occupancy)
+    occupancy = np.where(_holidays(index, rng), WEEKDAY_OCCUPANCY[6], occupancy)
+
+    season = 1 + SEASON_AMPLITUDE * np.sin(2 * np.pi * index.dayofyear.to_numpy() / 365.25)
+    load = (NIGHT_KW + (PEAK_KW - NIGHT_KW) * bump * occupancy) * season
+    return scale * load * (1 + _smooth_noise(len(index), rng))
+
+
+def solar_output(index, rng, capacity_kw):
+    """Rooftop PV in kW: clear-sky bell times a daily cloud factor."""
+    hour = index.hour.to_numpy() + index.minute.to_numpy() / 60
+    bell = np.clip(np.sin(np.pi * (hour - 7) / 12), 0, None)
+    day = (index.normalize() - index[0].normalize()).days.to_numpy()
+    cloud = rng.uniform(0.3, 1.0, day.max() + 1)[day]
+    return capacity_kw * bell * cloud
+
+
+# -------------------------------------------------
+# FILES
+# -------------------------------------------------
+def baseline_frame(load):
+    """PenangBaselineData.csv layout (features as reporting_gru_preprocessor builds them)."""
+    index = load.index
+    brk = _semester_break(index).astype(int)
+    df = pd.DataFrame(
+        {
+            "Day": index.dayofweek,
+            "Hour": index.hour,
+            "Lecture/Non-lecture": (1 - brk).astype(float),
+            "Public Holiday": 0.0,
+            "Semester Break": brk.astype(float),
+            "Semester : Lecture/Office": (1 - brk).astype(float),
+            "Day Lagged Load": load.shift(PER_DAY),
+            "Week Lagged Load": load.shift(WEEK_LAG),
+            "Load Consumption (kW)": load,
+            "Time": index.hour * 2 + index.minute // 30,
+        },
+        index=index,
+    )
+    df.index.name = "DateTime"
+    return df.iloc[WEEK_LAG:]  # drop rows without a week of history
+
+
+def _drop_runs(n, starts, lengths):
+    keep = np.ones(n, dtype=bool)
+    for s, length in zip(starts, lengths):
+        keep[s:s + length] = False
+    return keep
+
+
+def raw_reporting_frame(load_kw, solar_kw, rng, gap_rate, outages_per_year, spike_rate):
+    """
+    ReportingPeriodData.csv layout, Wh per interval, with gaps, outages and
+    out-of-range readings. Also returns the per-interval keep mask.
+    """
+    n = len(load_kw)
+    load = load_kw.to_numpy()
+    self_consume = np.minimum(solar_kw, load)
+    to_wh = INTERVAL_HOURS * 1000
+    df = pd.DataFrame(
+        {
+            "time": load_kw.index,
+            "import_energy": ((load - self_consume) * to_wh).round(),
+            "export_energy": ((solar_kw - self_consume) * to_wh).round(),
+            "self_consume": (self_consume * to_wh).round(),
+        }
+    )
+
+    spikes = rng.choice(n, int(n * spike_rate), replace=False)
+    rollover = rng.random(len(spikes)) < 0.7
+    df.loc[spikes[rollover], "import_energy"] = rng.uniform(1e7, 1e12, rollover.sum()).round()
+    df.loc[spikes[~rollover], "import_energy"] *= -1
+
+    years = n / (PER_DAY * 365)
+    n_outages = rng.poisson(outages_per_year * years)
+    n_gaps = rng.poisson(gap_rate * n)
+    keep = _drop_runs(
+        n,
+        np.concatenate([rng.integers(0, n, n_outages), rng.integers(0, n, n_gaps)]),
+        np.concatenate([rng.integers(PER_DAY, 3 * PER_DAY + 1, n_outages), rng.integers(1, 5, n_gaps)]),
+    )
+    return df[keep], keep
+
+
+def adjusted_baseline_frame(counterfactual, actual, keep, rng):
+    """Reporting_AdjustedBaseline_GRU.csv layout, starting one window in."""
+    adjusted = counterfactual * (1 + MODEL_ERROR * rng.standard_normal(len(counterfactual)))
+    df = pd.DataFrame(
+        {
+            "Actual Power (kW)": np.where(keep, actual, np.nan).round(3),
+            "Adjusted Baseline Power (kW)": adjusted.round(3),
+        },
+        index=counterfactual.index,
+    )
+    df.index.name = "DateTime"
+    return df.iloc[PER_DAY:]
+
+
+def generate_meter(out_dir, years, baseline_years=1.0, seed=0, scale=1.0,
+                   gap_rate=GAP_RATE, outages_per_year=OUTAGES_PER_YEAR, spike_rate=SPIKE_RATE):
+    """Write one meter's files into out_dir. Returns row counts per file."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+
+    baseline_start = REPORTING_START - pd.Timedelta(days=round(365 * baseline_years) + 7)
+    index = pd.date_range(baseline_start, REPORTING_START + pd.Timedelta(days=round(365 * years)),
+                          freq=STEP, inclusive="left")
+    load = pd.Series(campus_load(index, rng, scale), index=index)
+
+    baseline = baseline_frame(load[:REPORTING_START - STEP])
+    baseline.to_csv(os.path.join(out_dir, "PenangBaselineData.csv"))
+
+    counterfactual = load[REPORTING_START:]
+    actual = counterfactual * (1 - ECM_SAVINGS)
+    solar = solar_output(actual.index, rng, SOLAR_SHARE * PEAK_KW * scale)
+    raw, keep = raw_reporting_frame(actual, solar, rng, gap_rate, outages_per_year, spike_rate)
+    raw.to_csv(os.path.join(out_dir, "ReportingPeriodData.csv"), index=False)
+
+    adjusted = adjusted_baseline_frame(counterfactual, actual.to_numpy(), keep, rng)
+    adjusted.to_csv(os.path.join(out_dir, "Reporting_AdjustedBaseline_GRU.csv"))
+
+    return {"baseline": len(baseline), "reporting": len(raw), "adjusted": len(adjusted)}
+
+
+def meter_dirs(out_dir, meters):
+    return [os.path.join(out_dir, f"meter_{i:03d}") for i in range(meters)]
+
+
+def generate(out_dir, years, meters=1, baseline_years=1.0, seed=0, **defects):
+    """
+    Write `meters` independent sites under out_dir/meter_NNN. Meter 0 has the
+    reference site size; the others are scaled log-normally around it.
+    """
+    sizes = np.random.default_rng(seed).lognormal(0.0, 0.5, meters)
+    sizes[0] = 1.0
+    counts = []
+    for i, path in enumerate(meter_dirs(out_dir, meters)):
+        counts.append(generate_meter(path, years, baseline_years, seed + i, sizes[i], **defects))
+    return counts
+
+
+# -------------------------------------------------
+# MAIN
+# -------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic M&V meter data")
+    parser.add_argument("--out", required=True, help="output directory (one meter_NNN/ per meter)")
+    parser.add_argument("--years", type=float, default=1.0, help="reporting-period length")
+    parser.add_argument("--baseline-years", type=float, default=1.0)
+    parser.add_argument("--meters", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gap-rate", type=float, default=GAP_RATE)
+    parser.add_argument("--outages-per-year", type=float, default=OUTAGES_PER_YEAR)
+    parser.add_argument("--spike-rate", type=float, default=SPIKE_RATE)
+    args = parser.parse_args()
+
+    print(f"🔹 Generating {args.meters} meter(s), {args.years} year(s) of reporting data...")
+    start = time.perf_counter()
+    counts = generate(
+        args.out, args.years, args.meters, args.baseline_years, args.seed,
+        gap_rate=args.gap_rate, outages_per_year=args.outages_per_year, spike_rate=args.spike_rate,
+    )
+    rows = sum(c["reporting"] for c in counts)
+    print(f"✅ Synthetic data saved to: {args.out} ({rows:,} raw reporting rows, "
+          f"{time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# src/tariff_scenarios.py
+"""
+Vectorised tariff scenario sweep (what-if cost analysis).
+
+Evaluates many tariff scenarios (energy rates, TOU windows, MD charges and
+MD windows) against the reporting-period savings in one matrix computation:
+
+1. Savings energy is binned once per distinct TOU layout into a
+   (month x tariff-version x period) matrix with np.bincount.
+2. Energy cost savings for every scenario sharing that layout is a single
+   matrix product with the scenarios' rate matrix.
+3. Monthly MD savings (kW) is computed once per distinct MD window and
+   multiplied by each scenario's MD charge.
+
+Scenario file (config/tariff_scenarios.json):
+    {"scenarios": [
+        {"name": ..., "tariff": "<name in tariffs.json>"}                 or
+        {"name": ..., "definition": {<tariff definition as in tariffs.json>}},
+        optional: "rate_scale", "md_charge_rm_per_kw", "md_window": ["08:00", "22:00"]
+    ]}
+
+Outputs (in --out-dir, default: cache/tariff_scenarios/):
+- Reporting_Tariff_Scenarios.csv          totals per scenario
+- Reporting_Tariff_Scenarios_Monthly.csv  monthly breakdown
+
+RUN:
+    python src/tariff_scenarios.py
+    python src/tariff_scenarios.py --expand-rates 0.8 1.2 41 --expand-md 60 100 9
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from savings_calculation import INTERVAL_HOURS
+from md_savings_calculation import TOTAL_MD_CHARGE
+from tariff_engine import TariffEngine, holiday_calendar, load_tariff_config, TARIFF_CONFIG, CONFIG_DIR
+
+# -------------------------------------------------
+# PATHS
+# -------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+INPUT_CSV = os.path.join(DATA_DIR, "Reporting_AdjustedBaseline_GRU.csv")
+SCENARIO_CONFIG = os.path.join(CONFIG_DIR, "tariff_scenarios.json")
+DEFAULT_OUT_DIR = os.path.join(BASE_DIR, "cache", "tariff_scenarios")
+TOTALS_CSV = "Reporting_Tariff_Scenarios.csv"
+MONTHLY_CSV = "Reporting_Tariff_Scenarios_Monthly.csv"
+
+DEFAULT_MD_WINDOW = ("08:00", "22:00")
+
+
+# -------------------------------------------------
+# SCENARIOS
+# -------------------------------------------------
+def load_scenarios(path=SCENARIO_CONFIG, tariff_config=None):
+    """Resolve scenario entries into TariffEngine objects plus MD settings."""
+    tariff_config = tariff_config or load_tariff_config(TARIFF_CONFIG)
+    slot_minutes = tariff_config.get("slot_minutes", 30)
+
+    with open(path) as fh:
+        entries = json.load(fh)["scenarios"]
+
+    scenarios = []
+    for entry in entries:
+        if "definition" in entry:
+            definition = copy.deepcopy(entry["definition"])
+        else:
+            definition = copy.deepcopy(tariff_config["tariffs"][entry["tariff"]])
+
+        scale = entry.get("rate_scale", 1.0)
+        for version in definition["versions"]:
+            version["rates"] = {p: r * scale for p, r in version["rates"].items()}
+
+        holidays, years = holiday_calendar(tariff_config, definition.get("holiday_calendar"))
+        scenarios.append({
+            "name": entry["name"],
+            "engine": TariffEngine(entry["name"], definition, holidays, slot_minutes, years),
+            "md_charge": entry.get("md_charge_rm_per_kw", TOTAL_MD_CHARGE),
+            "md_window": tuple(entry.get("md_window", DEFAULT_MD_WINDOW)),
+        })
+    return scenarios
+
+
+def expand_scenarios(scenarios, rate_factors=None, md_charges=None):
+    """Cartesian expansion: every scenario x rate factor x MD charge."""
+    rate_factors = [1.0] if rate_factors is None else list(rate_factors)
+    md_charges = [None] if md_charges is None else list(md_charges)
+
+    expanded = []
+    for s in scenarios:
+        for factor in rate_factors:
+            for md in md_charges:
+                name = s["name"]
+                if len(rate_factors) > 1:
+                    name += f" | rates x{factor:.3f}"
+                if md is not None:
+                    name += f" | MD {md:.2f}"
+                expanded.append({
+                    **s,
+                    "name": name,
+                    "rate_scale": factor,
+                    "md_charge": s["md_charge"] if md is None else md,
+                })
+    return expanded
+
+
+def _layout_key(engine):
+    return (
+        engine.tables.tobytes(),
+        engine.starts.tobytes(),
+        engine.ends.tobytes(),
+        engine.holidays.tobytes(),
+        tuple(engine.periods),
+    )
+
+
+# -------------------------------------------------
+# SWEEP
+# -------------------------------------------------
+def sweep(df, scenarios):
+    """
+    df: DateTime-indexed frame with Actual / Adjusted Baseline Power (kW).
+    Returns (totals, monthly) DataFrames.
+    """
+    index = df.index
+    savings_kwh = np.nan_to_num(
+        (df["Adjusted Baseline Power (kW)"] - df["Actual Power (kW)"]).to_numpy(dtype=float)
+        * INTERVAL_HOURS
+    )
+
+    month_period = index.to_period("M")
+    months, month_code = np.unique(month_period.asi8, return_inverse=True)
+    month_labels = pd.PeriodIndex.from_ordinals(months, freq="M").astype(str)
+    n_months = len(months)
+
+    n = len(scenarios)
+    energy_cost = np.zeros((n_months, n))
+    md_cost = np.zeros((n_months, n))
+
+    # ---- energy cost: one bincount per distinct TOU layout ----
+    layouts = {}
+    for i, s in enumerate(scenarios):
+        layouts.setdefault(_layout_key(s["engine"]), []).append(i)
+
+    for members in layouts.values():
+        engine = scenarios[members[0]]["engine"]
+        version, code = engine.codes(index)
+        n_bins = engine.rates.size  # versions x periods
+        bin_code = version * engine.rates.shape[1] + code
+
+        energy = np.bincount(
+            month_code * n_bins + bin_code,
+            weights=savings_kwh,
+            minlength=n_months * n_bins,
+        ).reshape(n_months, n_bins)
+
+        rates = np.stack([
+            np.nan_to_num(scenarios[i]["engine"].rates.ravel()) * scenarios[i].get("rate_scale", 1.0)
+            for i in members
+        ])
+        energy_cost[:, members] = energy @ rates.T
+
+    # ---- MD cost: one monthly max per distinct MD window ----
+    windows = {}
+    for i, s in enumerate(scenarios):
+        windows.setdefault(s["md_window"], []).append(i)
+
+    for window, members in windows.items():
+        in_window = np.zeros(len(index), dtype=bool)
+        in_window[index.indexer_between_time(*window)] = True
+
+        peaks = (
+            df.loc[in_window, ["Actual Power (kW)", "Adjusted Baseline Power (kW)"]]
+            .groupby(month_code[in_window])
+            .max()
+            .reindex(range(n_months))
+        )
+        md_kw = np.nan_to_num(
+            (peaks["Adjusted Baseline Power (kW)"] - peaks["Actual Power (kW)"]).to_numpy()
+        )
+        charges = np.array([scenarios[i]["md_charge"] for i in members])
+        md_cost[:, members] = md_kw[:, None] * charges[None, :]
+
+    names = [s["name"] for s in scenarios]
+    total = energy_cost + md_cost
+
+    totals = pd.DataFrame({
+        "Scenario": names,
+        "Energy Cost Savings (RM)": energy_cost.sum(axis=0),
+        "MD Cost Savings (RM)": md_cost.sum(axis=0),
+        "Total Cost Savings (RM)": total.sum(axis=0),
+    })
+
+    monthly = pd.DataFrame({
+        "Month": np.repeat(month_labels, n),
+        "Scenario": np.tile(names, n_months),
+        "Energy Cost Savings (RM)": energy_cost.ravel(),
+        "MD Cost Savings (RM)": md_cost.ravel(),
+        "Total Cost Savings (RM)": total.ravel(),
+    })
+
+    return totals, monthly
+
+
+# -------------------------------------------------
+# MAIN PROCESS
+# -------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Tariff what-if scenario sweep")
+    parser.add_argument("--scenarios", default=SCENARIO_CONFIG)
+    parser.add_argument("--input", default=INPUT_CSV)
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR, help="output directory (default: %(default)s)")
+    parser.add_argument(
+        "--expand-rates", nargs=3, type=float, metavar=("LO", "HI", "N"),
+        help="multiply each scenario's energy rates by N factors in [LO, HI]",
+    )
+    parser.add_argument(
+        "--expand-md", nargs=3, type=float, metavar=("LO", "HI", "N"),
+        help="evaluate N MD charges (RM/kW) in [LO, HI] for each scenario",
+    )
+    args = parser.parse_args()
+
+    print("🔹 Loading adjusted baseline results...")
+    df = pd.read_csv(args.input, parse_dates=["DateTime"])
+    df = df.sort_values("DateTime").set_index("DateTime")
+
+    scenarios = load_scenarios(args.scenarios)
+    rate_factors = np.linspace(*args.expand_rates[:2], int(args.expand_rates[2])) if args.expand_rates else None
+    md_charges = np.linspace(*args.expand_md[:2], int(args.expand_md[2])) if args.expand_md else None
+    scenarios = expand_scenarios(scenarios, rate_factors, md_charges)
+
+    print(f"🔹 Sweeping {len(scenarios)} tariff scenarios over {len(df):,} intervals...")
+    start = time.perf_counter()
+    totals, monthly = sweep(df, scenarios)
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    totals_csv = os.path.join(args.out_dir, TOTALS_CSV)
+    monthly_csv = os.path.join(args.out_dir, MONTHLY_CSV)
+    totals.to_csv(totals_csv, index=False)
+    monthly.to_csv(monthly_csv, index=False)
+
+    print(f"✅ Sweep finished in {elapsed:.3f}s")
+    print(f"✅ Scenario totals saved to: {totals_csv}")
+    print(f"✅ Monthly breakdown saved to: {monthly_csv}")
+    print(totals.sort_values("Total Cost Savings (RM)", ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
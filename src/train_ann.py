@@ -3,16 +3,10 @@ import os
 import joblib
 import matplotlib.pyplot as plt
 import numpy as np
+import pandas as pd
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 
-from data_preproc import (
-    load_and_prepare,
-    train_val_test_split_by_dates,
-    fit_scalers,
-    transform_features,
-    DEFAULT_FEATURES,
-    TARGET_COL
-)
+from snapshots import load_snapshot
 from models_ann import build_dense_ann
 from utils import compute_metrics
 # ---------------------------------------------------------
@@ -26,13 +20,17 @@ os.makedirs(MODEL_DIR, exist_ok=True)
 os.makedirs(EXPERIMENT_DIR, exist_ok=True)
 
 def prepare_data():
-    df = load_and_prepare()
-    train, val, test = train_val_test_split_by_dates(df)
-    x_scaler, y_scaler = fit_scalers(train)
-    X_train, y_train = transform_features(train, x_scaler, y_scaler)
-    X_val, y_val = transform_features(val, x_scaler, y_scaler)
-    X_test, y_test = transform_features(test, x_scaler, y_scaler)
-    return X_train, y_train, X_val, y_val, X_test, y_test, x_scaler, y_scaler, test
+    # Flat scaled arrays come from the prepared-array snapshot (rebuilt
+    # automatically, including scaler fitting, when data or config change)
+    snap = load_snapshot(fit=True)
+    test = pd.DataFrame(index=snap["test_index"])
+    return (
+        snap["train_X"], snap["train_y"],
+        snap["val_X"], snap["val_y"],
+        snap["test_X"], snap["test_y"],
+        snap["x_scaler"], snap["y_scaler"],
+        test
+    )
 
 def train():
     (X_train, y_train, X_val, y_val, X_test, y_test, x_scaler, y_scaler, test_df) = prepare_data()
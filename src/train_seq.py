@@ -2,17 +2,12 @@
 import os
 import joblib
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 
-from data_preproc import (
-    load_and_prepare,
-    train_val_test_split_by_dates,
-    fit_scalers,
-    create_sequence_windows,
-    DEFAULT_FEATURES,
-    TARGET_COL
-)
+from data_preproc import SEQ_LEN
+from snapshots import load_snapshot
 from models_seq import build_lstm, build_gru
 from utils import compute_metrics
 
@@ -26,41 +21,17 @@ EXPERIMENT_DIR = os.path.join(BASE_DIR, "experiments")
 os.makedirs(MODEL_DIR, exist_ok=True)
 os.makedirs(EXPERIMENT_DIR, exist_ok=True)
 
-SEQ_LEN = 48  # 1 day sequence window
-
 def prepare_seq_data():
-    df = load_and_prepare()
-    train, val, test = train_val_test_split_by_dates(df)
-
-    # Fit scalers using training data
-    x_scaler, y_scaler = fit_scalers(train)
-
-    # Scale entire dataframe so sliding windows are consistent
-    full_features = x_scaler.transform(df[DEFAULT_FEATURES])
-    scaled_target = y_scaler.transform(df[[TARGET_COL]])
-
-    df_scaled = df.copy()
-    df_scaled[DEFAULT_FEATURES] = full_features
-    df_scaled[TARGET_COL] = scaled_target
-
-    # Create sliding windows for each split
-    X_train, y_train = create_sequence_windows(
-        df_scaled.loc[train.index.min() : train.index.max()], SEQ_LEN
-    )
-
-    X_val, y_val = create_sequence_windows(
-        df_scaled.loc[val.index.min() : val.index.max()], SEQ_LEN
-    )
-
-    X_test, y_test = create_sequence_windows(
-        df_scaled.loc[test.index.min() : test.index.max()], SEQ_LEN
-    )
+    # Sliding windows per split come from the prepared-array snapshot;
+    # scalers are fitted on the training period when it is (re)built
+    snap = load_snapshot(fit=True)
+    test = pd.DataFrame(index=snap["test_index"])
 
     return (
-        X_train, y_train,
-        X_val, y_val,
-        X_test, y_test,
-        x_scaler, y_scaler,
+        snap["train_Xseq"], snap["train_yseq"],
+        snap["val_Xseq"], snap["val_yseq"],
+        snap["test_Xseq"], snap["test_yseq"],
+        snap["x_scaler"], snap["y_scaler"],
         test
     )
 
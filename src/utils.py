@@ -1,17 +1,152 @@
 # src/utils.py
+"""
+Streaming regression / M&V metrics.
+
+MetricsAccumulator ingests (y_true, y_pred) in chunks and keeps, per group,
+a handful of running statistics:
+
+    n, mean(y), M2(y)                      Welford / Chan (stable SST)
+    sum(e), sum(|e|), sum(e^2)             e = y_true - y_pred
+    sum(|e / y|), count(y != 0)            MAPE
+
+From these it reports MAE, RMSE, R2, MAPE, CV(RMSE) and NMBE (ASHRAE
+Guideline 14 definitions). Grouped breakdowns (month, semester vs break,
+TOU period, ...) are computed in the same pass, and partial accumulators
+from parallel workers are combined with merge().
+"""
+
 import numpy as np
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+import pandas as pd
 
-def compute_metrics(y_true, y_pred):
-    y_true = np.asarray(y_true).reshape(-1)
-    y_pred = np.asarray(y_pred).reshape(-1)
-    mae = mean_absolute_error(y_true, y_pred)
-    rmse = mean_squared_error(y_true, y_pred) ** 0.5 #FIXED
-    r2 = r2_score(y_true, y_pred)
-    # handle divide by zero for MAPE:
+ALL = "all"
+
+# Column order of the per-group statistics vector
+_N, _MEAN, _M2, _SUM_E, _SUM_ABS, _SUM_SQ, _SUM_APE, _N_APE = range(8)
+_N_STATS = 8
+
+
+def _chunk_stats(y_true, y_pred, codes, n_groups):
+    """Per-group statistics of one chunk, vectorised with bincount."""
+    err = y_true - y_pred
     nonzero = y_true != 0
-    if nonzero.sum() > 0:
-        mape = (np.abs((y_true[nonzero] - y_pred[nonzero]) / y_true[nonzero])).mean() * 100
+    ape = np.zeros_like(y_true)
+    ape[nonzero] = np.abs(err[nonzero] / y_true[nonzero])
+
+    def total(weights=None):
+        return np.bincount(codes, weights=weights, minlength=n_groups)
+
+    stats = np.zeros((n_groups, _N_STATS))
+    stats[:, _N] = total()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stats[:, _MEAN] = np.nan_to_num(total(y_true) / stats[:, _N])
+    stats[:, _M2] = total((y_true - stats[codes, _MEAN]) ** 2)
+    stats[:, _SUM_E] = total(err)
+    stats[:, _SUM_ABS] = total(np.abs(err))
+    stats[:, _SUM_SQ] = total(err ** 2)
+    stats[:, _SUM_APE] = total(ape)
+    stats[:, _N_APE] = total(nonzero.astype(float))
+    return stats
+
+
+def _combine(a, b):
+    """Merge two statistics vectors (Chan et al. parallel variance)."""
+    n = a[_N] + b[_N]
+    if n == 0:
+        return a.copy()
+    out = a + b
+    delta = b[_MEAN] - a[_MEAN]
+    out[_N] = n
+    out[_MEAN] = a[_MEAN] + delta * b[_N] / n
+    out[_M2] = a[_M2] + b[_M2] + delta ** 2 * a[_N] * b[_N] / n
+    return out
+
+
+def _finalize(s, n_params=0):
+    n, mean = s[_N], s[_MEAN]
+    if n == 0:
+        return {k: np.nan for k in ("MAE", "RMSE", "R2", "MAPE", "CV(RMSE)", "NMBE")} | {"n": 0}
+
+    rmse = np.sqrt(s[_SUM_SQ] / n)
+    if s[_M2] > 0:
+        r2 = 1 - s[_SUM_SQ] / s[_M2]
     else:
-        mape = np.nan
-    return {"MAE": mae, "RMSE": rmse, "R2": r2, "MAPE": mape}
+        # Constant target: same convention as sklearn's r2_score
+        r2 = 1.0 if s[_SUM_SQ] == 0 else 0.0
+
+    dof = n - n_params
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cv_rmse = np.sqrt(s[_SUM_SQ] / dof) / mean * 100 if dof > 0 else np.nan
+        nmbe = s[_SUM_E] / (dof * mean) * 100 if dof > 0 else np.nan
+
+    return {
+        "MAE": float(s[_SUM_ABS] / n),
+        "RMSE": float(rmse),
+        "R2": float(r2),
+        "MAPE": float(s[_SUM_APE] / s[_N_APE] * 100) if s[_N_APE] else np.nan,
+        "CV(RMSE)": float(cv_rmse),
+        "NMBE": float(nmbe),
+        "n": int(n),
+    }
+
+
+class MetricsAccumulator:
+    """
+    One-pass, mergeable metrics over chunks of (y_true, y_pred).
+
+    acc = MetricsAccumulator()
+    for y, p, month in chunks:
+        acc.update(y, p, groups={"month": month})
+    acc.result()            # overall metrics
+    acc.grouped("month")    # DataFrame, one row per month
+    """
+
+    def __init__(self, n_params=0):
+        # n_params: model parameters p in the CV(RMSE) / NMBE denominators
+        self.n_params = n_params
+        self.stats = {ALL: {ALL: np.zeros(_N_STATS)}}
+
+    def update(self, y_true, y_pred, groups=None):
+        """
+        Fold a chunk in. groups: {dimension: labels}, labels aligned with y.
+        NaN pairs are skipped.
+        """
+        y_true = np.asarray(y_true, dtype=float).reshape(-1)
+        y_pred = np.asarray(y_pred, dtype=float).reshape(-1)
+        valid = ~(np.isnan(y_true) | np.isnan(y_pred))
+        y_true, y_pred = y_true[valid], y_pred[valid]
+
+        dims = {ALL: np.zeros(len(y_true), dtype=np.int64)}
+        labels_of = {ALL: np.array([ALL], dtype=object)}
+        for dim, labels in (groups or {}).items():
+            labels_of[dim], dims[dim] = np.unique(np.asarray(labels)[valid], return_inverse=True)
+
+        for dim, codes in dims.items():
+            chunk = _chunk_stats(y_true, y_pred, codes, len(labels_of[dim]))
+            table = self.stats.setdefault(dim, {})
+            for label, row in zip(labels_of[dim], chunk):
+                key = label.item() if hasattr(label, "item") else label
+                table[key] = _combine(table[key], row) if key in table else row
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. from a worker process) into this one."""
+        for dim, table in other.stats.items():
+            mine = self.stats.setdefault(dim, {})
+            for label, row in table.items():
+                mine[label] = _combine(mine[label], row) if label in mine else row.copy()
+        return self
+
+    def result(self):
+        return _finalize(self.stats[ALL][ALL], self.n_params)
+
+    def grouped(self, dim):
+        table = self.stats.get(dim, {})
+        rows = {label: _finalize(table[label], self.n_params) for label in sorted(table, key=str)}
+        return pd.DataFrame.from_dict(rows, orient="index").rename_axis(dim)
+
+
+def compute_metrics(y_true, y_pred):
+    """MAE, RMSE, R2, MAPE, CV(RMSE) and NMBE for in-memory arrays."""
+    metrics = MetricsAccumulator().update(y_true, y_pred).result()
+    metrics.pop("n")
+    return metrics
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# src/ modules import each other as top-level modules, as when run as scripts;
+# dashboard/ modules likewise (streamlit runs them from that directory)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "dashboard"))
@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+
+import exports
+from shared_data import SharedTable
+
+START, END = pd.Timestamp("2024-05-01"), pd.Timestamp("2024-08-01")  # 1 May - 31 July
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", str(tmp_path))
+
+
+def read_export(name, fmt):
+    path = exports.build_export([name], fmt, ("test", fmt), START, END)
+    return pd.read_parquet(path) if fmt == "parquet" else pd.read_csv(path)
+
+
+@pytest.mark.parametrize("fmt", ["csv.gz", "parquet"])
+def test_export_matches_shared_table(fmt):
+    df = read_export("savings", fmt)
+    table = SharedTable.load("savings").frame(start=START, end=END)
+    assert pd.to_datetime(df["DateTime"]).max() < END
+    assert pd.DatetimeIndex(pd.to_datetime(df["DateTime"])).equals(pd.DatetimeIndex(table.index))
+    assert len(df) == len(table)
+
+
+def test_md_export_matches_shared_table():
+    df = read_export("md", "csv.gz")
+    table = SharedTable.load("md", index_col="Month").frame(start=START, end=END, index_name="Month")
+    assert list(pd.to_datetime(df["Month"])) == list(table.index)
@@ -0,0 +1,108 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import schema
+import ingest_service
+from rollup_cube import RollupCube, load_clean
+from savings_engine import legacy_frames, read_exact
+from md_savings_calculation import source_state
+
+DATA_DIR = ingest_service.DATA_DIR
+CLEAN = "Reporting_Clean_30min.csv"
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Copy of the committed data/ CSVs."""
+    for name in os.listdir(DATA_DIR):
+        if name.endswith(".csv"):
+            shutil.copy(os.path.join(DATA_DIR, name), tmp_path)
+    return tmp_path
+
+
+def next_day(data_dir):
+    """The last raw day moved one day on, and a replay baseline that covers it."""
+    raw = schema.read_csv(data_dir / "ReportingPeriodData.csv", "raw")
+    day = raw[raw["time"] > raw["time"].max() - pd.Timedelta("1D")].copy()
+    day["time"] += pd.Timedelta("1D")
+    readings = [
+        ingest_service.Reading(r.time, r.import_energy, r.export_energy, r.self_consume, 0.0)
+        for r in day.itertuples()
+    ]
+
+    adjusted = schema.read_csv(data_dir / "Reporting_AdjustedBaseline_GRU.csv", "adjusted")
+    ahead = adjusted.tail(2 * 48).copy()
+    ahead["DateTime"] += pd.Timedelta("2D")
+    replay = data_dir / "replay.csv"
+    pd.concat([adjusted, ahead]).to_csv(replay, index=False)
+    return readings, ingest_service.ReplayBaseline(replay)
+
+
+def ingest_one_day(data_dir):
+    readings, baseline = next_day(data_dir)
+    chain = ingest_service.LiveChain(baseline, str(data_dir), str(data_dir / "md_state.json"))
+    before = chain.published_until
+    until, accepted = chain.process(readings)
+    assert accepted == len(readings)
+    assert until > before
+    return chain
+
+
+def assert_outputs_load(data_dir, until):
+    clean = schema.read_csv(data_dir / CLEAN, "clean")
+    assert clean["DateTime"].max() == until
+    assert clean["Outage Flag"].dtype == schema.FLAG
+    assert load_clean(str(data_dir / CLEAN)).index.max() == until
+    ready = schema.read_csv(data_dir / "Reporting_GRU_Ready.csv", "gru_ready")
+    assert ready["DateTime"].max() == until
+    for dataset in ("savings", "cost_c1", "cost_tou", "co2", "compare"):
+        path, _, _ = schema.DATASETS[dataset]
+        assert schema.read_csv(data_dir / path, dataset)["DateTime"].max() == until
+
+
+def test_bootstrap_from_committed_data(data_dir):
+    chain = ingest_one_day(data_dir)
+    assert len(chain.legacy) == len(ingest_service.LEGACY_CSVS)
+    assert_outputs_load(data_dir, chain.published_until)
+
+
+def test_bootstrap_rewrites_true_false_flags(data_dir):
+    # Clean CSV as written before the schema: Outage Flag as True/False
+    clean = pd.read_csv(data_dir / CLEAN)
+    clean["Outage Flag"] = clean["Outage Flag"].astype(bool)
+    clean.to_csv(data_dir / CLEAN, index=False)
+
+    chain = ingest_one_day(data_dir)
+    text = pd.read_csv(data_dir / CLEAN, usecols=["Outage Flag"], dtype=str)
+    assert set(text["Outage Flag"]) <= {"0", "1"}
+    assert_outputs_load(data_dir, chain.published_until)
+
+
+def test_artifacts_rebuild_from_last_publish(data_dir):
+    chain = ingest_one_day(data_dir)
+    sizes = chain.snapshot()
+    assert sizes == {k: os.path.getsize(chain.paths[k]) for k in ("adjusted", "clean")}
+
+    # an append in progress on the processing thread: half a row, clean only
+    with open(chain.paths["clean"], "a") as fh:
+        fh.write("2030-01-01 00:00:00,12.")
+    assert chain.snapshot() == sizes
+
+    chain.refresh_artifacts(chain.snapshot())
+    assert RollupCube.load(chain.paths["cube"]).end == chain.published_until
+
+
+def test_appended_legacy_rows_match_a_full_rebuild(data_dir):
+    ingest_one_day(data_dir)
+    frames = legacy_frames(read_exact(data_dir / "Reporting_AdjustedBaseline_GRU.csv"))
+    for path, frame in frames.items():
+        written = (data_dir / os.path.basename(path)).read_text()
+        assert written == frame.to_csv(date_format=schema.DATE_FORMAT)
+
+
+def test_md_source_follows_appends(data_dir):
+    chain = ingest_one_day(data_dir)
+    assert chain.tracker.source == source_state(chain.paths["adjusted"])
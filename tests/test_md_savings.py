@@ -0,0 +1,40 @@
+from md_engine import MaximumDemandTracker
+from md_savings_calculation import TOTAL_MD_CHARGE, read_new_rows
+import ingest_service
+
+ADJUSTED = ingest_service.ADJUSTED_CSV
+
+
+def split_adjusted(tmp_path, rows):
+    with open(ADJUSTED, "rb") as fh:
+        lines = fh.readlines()
+    path = tmp_path / "adjusted.csv"
+    path.write_bytes(b"".join(lines[: rows + 1]))
+    return path, lines[rows + 1:]
+
+
+def test_reads_only_appended_rows(tmp_path):
+    path, rest = split_adjusted(tmp_path, 1000)
+    tracker = MaximumDemandTracker(TOTAL_MD_CHARGE)
+    assert len(read_new_rows(path, tracker)) == 1000
+    tracker.update(read_new_rows(path, tracker))  # nothing new
+
+    with open(path, "ab") as fh:
+        fh.write(b"".join(rest[:48]))
+    new = read_new_rows(path, tracker)
+    assert len(new) == 48
+    assert tracker.source["offset"] == path.stat().st_size
+
+
+def test_rewritten_history_is_reparsed(tmp_path):
+    path, _ = split_adjusted(tmp_path, 1000)
+    tracker = MaximumDemandTracker(TOTAL_MD_CHARGE)
+    tracker.update(read_new_rows(path, tracker))
+
+    # same size, last digit of the last consumed row changed
+    text = path.read_bytes()
+    digit = b"8" if text[-2:-1] == b"9" else b"9"
+    path.write_bytes(text[:-2] + digit + b"\n")
+    df = read_new_rows(path, tracker)
+    assert len(df) == 1000
+    assert tracker.rows_seen == 0
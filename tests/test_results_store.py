@@ -0,0 +1,62 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import results_store
+
+
+def frames(scale):
+    index = pd.date_range("2024-05-01", periods=4 * 48 * 31, freq="30min", name="DateTime")
+    df = pd.DataFrame({
+        "Actual Power (kW)": np.full(len(index), 100.0 * scale),
+        "Adjusted Baseline Power (kW)": np.full(len(index), 110.0 * scale),
+    }, index=index)
+    derived = pd.DataFrame({"Savings Power (kW)": np.full(len(index), 10.0 * scale)}, index=index)
+    md = pd.DataFrame({"Month": ["2024-05"], "MD Savings (kW)": [10.0 * scale]})
+    return df, derived, md
+
+
+def test_previous_version_stays_readable(tmp_path):
+    results_store.write_results(*frames(1), root=str(tmp_path))
+    first = results_store.dataset_dir("savings", str(tmp_path))  # a reader resolved this
+
+    results_store.write_results(*frames(2), root=str(tmp_path))
+    assert os.path.isdir(first)
+    df = results_store.read_dataset("savings", root=str(tmp_path))
+    assert (df["Savings Power (kW)"] == 20.0).all()
+
+    results_store.write_results(*frames(3), root=str(tmp_path))
+    assert not os.path.exists(first)
+    assert len(os.listdir(tmp_path / "savings")) == 2
+
+
+def test_unchanged_write_keeps_version(tmp_path):
+    results_store.write_results(*frames(1), root=str(tmp_path))
+    path = results_store.read_manifest(str(tmp_path))["savings"]["path"]
+    results_store.write_results(*frames(1), root=str(tmp_path))
+    assert results_store.read_manifest(str(tmp_path))["savings"]["path"] == path
+    assert os.listdir(tmp_path / "savings") == [path.split("/")[1]]
+
+
+def test_reads_during_rewrites(tmp_path):
+    root = str(tmp_path)
+    results_store.write_results(*frames(1), root=root)
+    errors, done = [], threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                df = results_store.read_dataset("savings", ["Savings Power (kW)"], "2024-06-01", "2024-07-01", root)
+                assert len(df) == 30 * 48
+            except Exception as exc:  # noqa: BLE001 - any failure is the bug
+                errors.append(exc)
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for scale in range(2, 12):
+        results_store.write_results(*frames(scale), root=root)
+    done.set()
+    reader.join()
+    assert not errors
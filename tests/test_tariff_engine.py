@@ -0,0 +1,34 @@
+import warnings
+
+import pandas as pd
+import pytest
+
+from tariff_engine import HolidayCalendarWarning, get_tariff, holiday_calendar, load_tariff_config
+
+
+def test_covered_years_assign_without_warning():
+    engine = get_tariff("TNB_C1_MV_ETOU")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", HolidayCalendarWarning)
+        engine.assign(pd.date_range("2024-05-01", "2025-12-31 23:30", freq="30min"))
+
+
+def test_uncovered_years_warn():
+    engine = get_tariff("TNB_C1_MV_ETOU")
+    with pytest.warns(HolidayCalendarWarning, match="not 2026"):
+        engine.assign(pd.date_range("2025-12-31", "2026-01-02", freq="30min"))
+
+
+def test_calendar_years():
+    config = load_tariff_config()
+    dates, years = holiday_calendar(config, "MY-PNG")
+    assert years == (2024, 2025) and "2025-12-25" in dates
+    assert holiday_calendar(config, None) == ([], None)
+
+    # plain list: covers the years its dates fall in
+    plain = {"holiday_calendars": {"X": ["2024-01-01", "2026-05-01"]}}
+    assert holiday_calendar(plain, "X")[1] == (2024, 2026)
+
+    bad = {"holiday_calendars": {"X": {"years": [2024, 2024], "dates": ["2025-01-01"]}}}
+    with pytest.raises(ValueError):
+        holiday_calendar(bad, "X")